@@ -8,11 +8,80 @@ class Settings(BaseSettings):
     SSH_USERNAME: str = "admin"
     SSH_PASSWORD: str = "n0m3l0"
     SSH_SECRET: str | None = None  
+    SSH_PORT: int = 22
+    SSH_CONNECT_TIMEOUT: float = 10.0
+    SSH_COMMAND_TIMEOUT: float = 60.0       # plazo para recibir toda la salida de un comando
+    SSH_READ_CHUNK: int = 65536             # bytes por lectura de la salida
+
+    # Pool de conexiones SSH (transportes ya autenticados, por equipo)
+    SSH_POOL_MAX_PER_HOST: int = 2          # sesiones simultáneas por equipo
+    SSH_POOL_IDLE_TIMEOUT: float = 120.0    # se cierra la conexión tras este tiempo sin uso
+    SSH_POOL_HEALTH_CHECK: float = 30.0     # sin uso por más de esto -> se prueba antes de reusar
+    SSH_POOL_WAIT: float = 30.0             # espera máxima por una sesión libre
+
+    # Cambios de configuración por router que llegan juntos se aplican en
+    # una sola sesión con un solo "write memory"
+    CONFIG_BATCH_WINDOW: float = 0.5        # segundos que se esperan más cambios
+    CONFIG_BATCH_MAX: int = 100             # comandos por lote (se manda antes si se llena)
     
     NEW_USER_PASSWORD: str = "Redes2025"
+    # Cambios de usuarios en toda la red (/usuarios)
+    USER_FANOUT_CONCURRENCY: int = 50       # routers configurándose a la vez
+    USER_FANOUT_TIMEOUT: float = 60.0       # plazo por router
 
     SNMP_COMMUNITY: str = "REDES"
     SNMP_PORT: int = 161
+    SNMP_TIMEOUT: float = 1.0       # segundos por intento
+    SNMP_RETRIES: int = 2
+    SNMP_MAX_OIDS_PER_PDU: int = 24  # se parte en varios PDUs si hay más
+    SNMP_BULK_MAX_REPETITIONS: int = 25
+    SNMP_CACHE_TTL: float = 2.0             # caché de /estado y sysinfo (0 = sin caché)
+    FLEET_STATUS_CONCURRENCY: int = 200     # sondeos en vuelo en GET /routers/estado
+
+    # Poller de fondo (ifTable de todos los routers)
+    POLLER_ENABLED: bool = True
+    POLL_INTERVAL: float = 10.0             # segundos entre ciclos por router
+    POLL_MAX_CONCURRENCY: int = 100         # consultas en vuelo en total
+    POLL_MAX_INFLIGHT_PER_HOST: int = 1     # consultas en vuelo por equipo
+    POLL_ROUTERS_REFRESH: float = 60.0      # cada cuánto se relee la tabla routers
+
+    # Receptor de trampas SNMP v2c (162 requiere root; el router debe
+    # mandarlas con udp-port 1162)
+    SNMP_TRAP_ENABLED: bool = True
+    SNMP_TRAP_HOST: str = "0.0.0.0"
+    SNMP_TRAP_PORT: int = 1162
+
+    # Vigilancia de operStatus de interfaces con captura activa
+    LINK_WATCH_ENABLED: bool = True
+    LINK_WATCH_INTERVAL: float = 5.0
+    LINK_EVENTS_PER_IF: int = 100           # eventos guardados por interfaz
+    LINK_EVENTS_GLOBAL: int = 10000         # eventos recientes de toda la red (memoria)
+
+    # Bitácora de eventos en BD (tabla link_events)
+    EVENT_LOG_QUEUE_SIZE: int = 10000       # eventos pendientes de escribir
+    EVENT_LOG_BATCH_SIZE: int = 500         # filas por transacción
+    EVENT_LOG_FLUSH_SECONDS: float = 1.0    # espera máxima para juntar un lote
+
+    # Gráficas PNG (pool de procesos y caché de imágenes)
+    CHART_WORKERS: int = 2
+    CHART_CACHE_TTL: float = 300.0
+    CHART_CACHE_MAX: int = 256
+
+    # Descubrimiento de topología (CDP/LLDP)
+    DISCOVERY_INTERVAL: int = 300           # segundos entre pasadas
+    DISCOVERY_CONCURRENCY: int = 50         # equipos recorriéndose a la vez
+    DISCOVERY_MAX_ROUTERS: int = 1000       # tope de equipos por pasada
+    TOPOLOGY_SNAPSHOTS: int = 100           # versiones guardadas para /topologia/cambios
+
+    # Muestras guardadas por interfaz (buffer circular)
+    TS_CAPACITY: int = 3600
+
+    # Streaming en vivo (SSE) de muestras
+    STREAM_MAX_SUBSCRIBERS_PER_IF: int = 50
+    STREAM_QUEUE_SIZE: int = 100            # muestras pendientes por cliente
+    STREAM_KEEPALIVE_SECONDS: float = 15.0
+    STREAM_RETRY_SECONDS: float = 5.0       # espera tras un error de SNMP
+    STREAM_CLIENT_RETRY_MS: int = 3000      # "retry:" de SSE (reconexión del cliente)
 
     class Config:
         env_file = ".env"
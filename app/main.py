@@ -1,9 +1,20 @@
 # app/main.py
 from fastapi import FastAPI
 from .config import settings
-from .db import engine, Base
+from .db import engine, Base, add_missing_columns
 from .routers import ping, usuarios, routers as routers_api, ssh_test,snmp_test, topologia
-from .routers import monitor
+from .routers import monitor, eventos
+from .services.snmp_engine import close_snmp_engine
+from .services.poller_service import fleet_poller
+from .services.monitor_jobs import cancel_all_jobs
+from .services.sample_hub import sample_hub
+from .services.trap_receiver import trap_receiver
+from .services.link_watcher import link_watcher
+from .services.event_log import event_log
+from .services.charts import shutdown_chart_pool
+from .services.discovery_service import discovery_daemon
+from .services.topology_service import refresh_topology
+from .services.ssh_service import config_batcher, ssh_pool
 
 
 app = FastAPI(
@@ -14,11 +25,14 @@ app = FastAPI(
 # Incluir routers
 app.include_router(ping.router)
 app.include_router(usuarios.router)
+# monitor va antes que routers_api para que /routers/estado no lo
+# capture GET /routers/{hostname}
+app.include_router(monitor.router)
 app.include_router(routers_api.router)
 app.include_router(ssh_test.router)
 app.include_router(snmp_test.router)
 app.include_router(topologia.router)
-app.include_router(monitor.router)
+app.include_router(eventos.router)
 
 
 
@@ -27,6 +41,44 @@ async def startup_event():
     # Crear tablas de la BD si no existen
     async with engine.begin() as conn:
         await conn.run_sync(Base.metadata.create_all)
+        await conn.run_sync(add_missing_columns)
+
+    # Primera versión de la topología (base de /topologia/cambios)
+    await refresh_topology()
+
+    # Escritura por lotes de eventos linkUp/linkDown
+    await event_log.start()
+
+    # Poller de fondo de interfaces
+    if settings.POLLER_ENABLED:
+        await fleet_poller.start()
+
+    # Receptor de trampas linkUp/linkDown
+    if settings.SNMP_TRAP_ENABLED:
+        await trap_receiver.start()
+
+    # Vigilancia de operStatus de interfaces con captura activa
+    if settings.LINK_WATCH_ENABLED:
+        await link_watcher.start()
+
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    await fleet_poller.stop()
+    await discovery_daemon.stop()
+    await trap_receiver.stop()
+    await link_watcher.stop()
+    await event_log.stop()
+    await cancel_all_jobs()
+    await sample_hub.close()
+    shutdown_chart_pool()
+
+    # Aplicar los cambios de configuración pendientes y cerrar el pool SSH
+    await config_batcher.close()
+    await ssh_pool.close_all()
+
+    # Cerrar el socket UDP del motor SNMP
+    close_snmp_engine()
 
 @app.get("/")
 async def root():
@@ -1,3 +1,4 @@
 # app/models/__init__.py
 from app.db import Base
 from .router import Router, Interface, RouterUser
+from .link_event import LinkEvent
@@ -0,0 +1,26 @@
+# app/models/link_event.py
+from sqlalchemy import Column, DateTime, ForeignKey, Index, Integer, String
+from app.db import Base
+
+
+class LinkEvent(Base):
+    __tablename__ = "link_events"
+
+    id = Column(Integer, primary_key=True)
+    # NULL si el evento llegó de una IP que no está en la tabla routers
+    router_id = Column(Integer, ForeignKey("routers.id"), nullable=True)
+    host = Column(String, nullable=False)          # ip_admin / IP origen
+    hostname = Column(String, nullable=True)
+    if_index = Column(Integer, nullable=False)
+    timestamp = Column(DateTime, nullable=False)   # UTC
+    event = Column(String, nullable=False)         # linkUp / linkDown
+    old_status = Column(Integer, nullable=True)
+    new_status = Column(Integer, nullable=True)
+    source = Column(String, nullable=True)         # poll / watcher / trap
+
+    __table_args__ = (
+        Index("ix_link_events_router_if_ts", "router_id", "if_index", "timestamp"),
+        # Para ?hostname= sin if_index (evita ordenar en memoria)
+        Index("ix_link_events_router_ts", "router_id", "timestamp"),
+        Index("ix_link_events_timestamp", "timestamp"),
+    )
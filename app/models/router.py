@@ -44,6 +44,9 @@ class Interface(Base):
     router = relationship("Router", back_populates="interfaces")
 
     neighbor_hostname = Column(String, nullable=True)
+    # "discovery" si el enlace lo escribió el demonio de descubrimiento;
+    # NULL si se capturó a mano (el demonio nunca lo borra)
+    neighbor_source = Column(String, nullable=True)
 
 
 class RouterUser(Base):
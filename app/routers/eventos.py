@@ -0,0 +1,142 @@
+# app/routers/eventos.py
+from datetime import datetime, timezone
+from itertools import islice
+from typing import List, Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+from pydantic import BaseModel
+from sqlalchemy import and_, or_, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.db import get_db
+from app.models.link_event import LinkEvent
+from app.models.router import Router
+from app.services.monitor_service import LINK_EVENTS
+
+router = APIRouter(prefix="/eventos", tags=["Eventos"])
+
+
+# ---------- Esquemas Pydantic ----------
+
+class EventoRead(BaseModel):
+    id: int
+    hostname: Optional[str] = None
+    host: str
+    if_index: int
+    timestamp: datetime
+    event: str
+    old_status: Optional[int] = None
+    new_status: Optional[int] = None
+    source: Optional[str] = None
+
+    class Config:
+        from_attributes = True
+
+
+class EventoReciente(BaseModel):
+    host: str
+    if_index: int
+    timestamp: str
+    event: str
+    old_status: Optional[int] = None
+    new_status: Optional[int] = None
+    source: Optional[str] = None
+
+
+class EventosResponse(BaseModel):
+    eventos: List[EventoRead]
+    # Pasar como ?cursor= para pedir la siguiente página (None = no hay más)
+    siguiente: Optional[str] = None
+
+
+# ---------- Helpers ----------
+
+def _as_utc(value: datetime) -> datetime:
+    """Los timestamps se guardan en UTC sin zona horaria."""
+    if value.tzinfo is None:
+        return value
+    return value.astimezone(timezone.utc).replace(tzinfo=None)
+
+
+def _encode_cursor(ev: LinkEvent) -> str:
+    return f"{ev.timestamp.isoformat()}_{ev.id}"
+
+
+def _decode_cursor(cursor: str) -> tuple[datetime, int]:
+    try:
+        ts, ev_id = cursor.rsplit("_", 1)
+        return datetime.fromisoformat(ts), int(ev_id)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Cursor inválido")
+
+
+# ---------- Endpoints ----------
+
+@router.get("/", response_model=EventosResponse)
+async def list_eventos(
+    desde: Optional[datetime] = Query(None, description="Inicio (UTC, inclusivo)"),
+    hasta: Optional[datetime] = Query(None, description="Fin (UTC, exclusivo)"),
+    hostname: Optional[str] = None,
+    if_index: Optional[int] = None,
+    limite: int = Query(100, ge=1, le=1000),
+    cursor: Optional[str] = None,
+    db: AsyncSession = Depends(get_db),
+):
+    """
+    Eventos linkUp/linkDown guardados, en orden cronológico.
+
+    La paginación es por llave (timestamp, id) en lugar de OFFSET: cada
+    página arranca justo después del último evento de la anterior, así que
+    el costo no crece con el número de página.
+    """
+    stmt = select(LinkEvent)
+
+    if hostname is not None:
+        result = await db.execute(select(Router.id).where(Router.hostname == hostname))
+        router_id = result.scalar_one_or_none()
+        if router_id is None:
+            raise HTTPException(status_code=404, detail="Router no encontrado")
+        stmt = stmt.where(LinkEvent.router_id == router_id)
+        if if_index is not None:
+            stmt = stmt.where(LinkEvent.if_index == if_index)
+    elif if_index is not None:
+        raise HTTPException(status_code=400, detail="if_index requiere hostname")
+
+    if desde is not None:
+        stmt = stmt.where(LinkEvent.timestamp >= _as_utc(desde))
+    if hasta is not None:
+        stmt = stmt.where(LinkEvent.timestamp < _as_utc(hasta))
+
+    if cursor is not None:
+        ts, ev_id = _decode_cursor(cursor)
+        stmt = stmt.where(
+            or_(
+                LinkEvent.timestamp > ts,
+                and_(LinkEvent.timestamp == ts, LinkEvent.id > ev_id),
+            )
+        )
+
+    stmt = stmt.order_by(LinkEvent.timestamp, LinkEvent.id).limit(limite + 1)
+    result = await db.execute(stmt)
+    rows = result.scalars().all()
+
+    siguiente = None
+    if len(rows) > limite:
+        rows = rows[:limite]
+        siguiente = _encode_cursor(rows[-1])
+
+    return EventosResponse(
+        eventos=[EventoRead.model_validate(ev) for ev in rows],
+        siguiente=siguiente,
+    )
+
+
+@router.get("/recientes", response_model=List[EventoReciente])
+async def eventos_recientes(limite: int = Query(100, ge=1, le=1000)):
+    """
+    Últimos eventos linkUp/linkDown de toda la red, del más reciente al
+    más viejo. Se leen de memoria (LINK_EVENTS, hasta LINK_EVENTS_GLOBAL
+    eventos), sin consultar la BD; para rangos de tiempo o historia de
+    antes del arranque usar GET /eventos.
+    """
+    return list(islice(reversed(LINK_EVENTS), limite))
@@ -1,54 +1,100 @@
 # app/routers/monitor.py
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query
 from pydantic import BaseModel
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Tuple
 
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
 
+from app.config import settings
 from app.db import get_db
 from app.models.router import Router
 from app.services.monitor_service import (
-    monitor_interface_octets,
     get_router_state,
+    get_fleet_state,
     get_interface_state, 
     start_trap_capture,  
     stop_trap_capture,   
 )
+from app.services.iftable_service import sample_router_interfaces
+from app.services.poller_service import POLL_RESULTS, fleet_poller
+from app.services.timeseries_store import (
+    SOURCE_MONITOR,
+    SOURCE_POLLER,
+    SOURCES,
+    InterfaceSeries,
+    sample_store,
+)
+from app.services.sample_hub import TooManySubscribers, sample_hub
+from app.services.trap_receiver import trap_receiver
+from app.services.charts import (
+    PLOT_WIDTH_PX,
+    render_octets_png,
+    render_png,
+    series_args,
+)
+from app.services.downsample import downsample_samples
+from app.services.monitor_jobs import (
+    MonitorJob,
+    cancel_job,
+    forget_job,
+    get_job,
+    get_job_for,
+    start_job,
+)
 
-import io
-import matplotlib.pyplot as plt
-from fastapi.responses import StreamingResponse
+import asyncio
+import json
+import time
+from datetime import datetime, timezone
+from fastapi.responses import Response, StreamingResponse
 
 router = APIRouter(prefix="/routers", tags=["Monitoreo"])
 
 # ----------------- MEMORIA DE MONITOREO -----------------
-# key = "<hostname>:<if_index>"
-# value = {
-#   "seconds": int,
-#   "data": {
-#       "samples": [...],
-#       "avg_in_bps": ...,
-#       "avg_out_bps": ...,
-#       "last_in_octets": ...,
-#       "last_out_octets": ...
-#   }
-# }
-MONITOREOS_OCTETOS: Dict[str, Dict[str, Any]] = {}
+# Las muestras viven en sample_store (buffer circular por interfaz y por
+# fuente: "monitor" para POST/streaming, "poller" para el poller de fondo)
+# y los monitoreos lanzados por POST son trabajos en segundo plano
+# (monitor_jobs).
 
 
 class Sample(BaseModel):
-    t: int
+    t: float
     in_bps: float
     out_bps: float
 
 
 class OctetosResponse(BaseModel):
     samples: List[Sample]
+    sample_count: int = 0     # muestras en el rango (antes de reducir)
     avg_in_bps: float
     avg_out_bps: float
     last_in_octets: int
     last_out_octets: int
+    min_in_bps: float | None = None
+    max_in_bps: float | None = None
+    min_out_bps: float | None = None
+    max_out_bps: float | None = None
+    job_id: str | None = None
+    running: bool = False
+    fuente: str = SOURCE_MONITOR  # serie de la que salen las muestras
+
+
+class InterfaceRate(BaseModel):
+    if_index: int
+    descr: str | None = None
+    admin_status: int | None = None
+    oper_status: int | None = None
+    in_octets: int | None = None
+    out_octets: int | None = None
+    in_bps: float | None = None
+    out_bps: float | None = None
+
+
+class RouterOctetosResponse(BaseModel):
+    hostname: str
+    intervalo: float
+    interfaces: List[InterfaceRate]
 
 
 class EstadoRouterResponse(BaseModel):
@@ -58,11 +104,24 @@ class EstadoRouterResponse(BaseModel):
     ultima_respuesta: str | None = None
     error: str | None = None
     
+class EstadoRouterFlota(EstadoRouterResponse):
+    hostname: str
+    ip_admin: str
+
+
+class EstadoFlotaResponse(BaseModel):
+    total: int
+    up: int
+    down: int
+    routers: List[EstadoRouterFlota]
+
+
 class TrapEvent(BaseModel):
     timestamp: str
     event: str
     old_status: int | None = None
     new_status: int | None = None
+    source: str | None = None   # "poll", "watcher" o "trap"
 
 
 class EstadoInterfazResponse(BaseModel):
@@ -75,12 +134,15 @@ class EstadoInterfazResponse(BaseModel):
     trap_capture_active: bool
     last_change: str | None = None
     events: List[TrapEvent] = []
+    # Receptor de trampas UDP (SNMP_TRAP_PORT); error si no pudo escuchar
+    trap_receiver_running: bool = False
+    trap_receiver_error: str | None = None
 
 
 class MonitorState(BaseModel):
     """
     Estado lógico del monitoreo de octetos en una interfaz.
-    Se usa como respuesta para POST y DELETE.
+    Se usa como respuesta para POST, DELETE y GET /routers/monitoreos/{job_id}.
     """
     hostname: str
     if_index: int
@@ -89,6 +151,9 @@ class MonitorState(BaseModel):
     samples_count: int
     avg_in_bps: float | None = None
     avg_out_bps: float | None = None
+    missed_ticks: int = 0
+    job_id: str | None = None
+    error: str | None = None
 
 
 async def get_router_by_hostname(
@@ -103,8 +168,137 @@ async def get_router_by_hostname(
     return router
 
 
-def _build_monitor_key(hostname: str, if_index: int) -> str:
-    return f"{hostname}:{if_index}"
+def _epoch(value: datetime) -> float:
+    """Fecha del query string a time.time(); sin zona horaria se toma UTC."""
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return value.timestamp()
+
+
+def _stored_series(
+    hostname: str,
+    if_index: int,
+    fuente: str | None,
+) -> Tuple[InterfaceSeries | None, str]:
+    """
+    Serie guardada de la interfaz y su fuente. Sin `fuente` se usa la del
+    monitoreo (POST/streaming) si tiene muestras y si no la del poller. Las
+    fuentes nunca se mezclan: cada una tiene su propio ritmo de muestreo.
+    """
+    if fuente is not None:
+        if fuente not in SOURCES:
+            raise HTTPException(
+                status_code=400,
+                detail=f"fuente debe ser una de: {', '.join(SOURCES)}",
+            )
+        return sample_store.get(hostname, if_index, fuente), fuente
+
+    series = sample_store.get(hostname, if_index, SOURCE_MONITOR)
+    if series is not None and len(series) > 0:
+        return series, SOURCE_MONITOR
+    return sample_store.get(hostname, if_index, SOURCE_POLLER), SOURCE_POLLER
+
+
+def _job_state(job: MonitorJob) -> MonitorState:
+    """Estado de un trabajo, con promedios de lo que él ha muestreado."""
+    return MonitorState(
+        hostname=job.hostname,
+        if_index=job.if_index,
+        tiempo=job.seconds,
+        running=job.running,
+        samples_count=job.samples_count,
+        avg_in_bps=job.avg_in_bps,
+        avg_out_bps=job.avg_out_bps,
+        missed_ticks=job.missed_ticks,
+        job_id=job.id,
+        error=job.error,
+    )
+
+
+def _octetos_from_series(
+    series: InterfaceSeries,
+    tiempo: int,
+    max_points: int | None = None,
+) -> OctetosResponse:
+    """
+    Arma la respuesta con las muestras de los últimos `tiempo` segundos.
+    Con `max_points` las muestras se reducen con LTTB; las estadísticas se
+    calculan siempre sobre todas.
+    """
+    last = series.last()
+    n = series.count_after(last["timestamp"] - tiempo) if last else 0
+    stats = series.stats(n)
+
+    samples = series.latest(n)
+    if max_points is not None:
+        samples = downsample_samples(samples, max_points)
+
+    return OctetosResponse(
+        samples=[Sample(**s) for s in samples],
+        sample_count=n,
+        avg_in_bps=stats["avg_in_bps"],
+        avg_out_bps=stats["avg_out_bps"],
+        last_in_octets=last["in_octets"] if last else 0,
+        last_out_octets=last["out_octets"] if last else 0,
+        min_in_bps=stats["min_in_bps"],
+        max_in_bps=stats["max_in_bps"],
+        min_out_bps=stats["min_out_bps"],
+        max_out_bps=stats["max_out_bps"],
+    )
+
+
+# --------- GET /routers/{hostname}/interfaces/octetos ---------
+
+
+@router.get(
+    "/{hostname}/interfaces/octetos",
+    response_model=RouterOctetosResponse,
+)
+async def obtener_octetos_router(
+    hostname: str,
+    intervalo: float | None = None,
+    db: AsyncSession = Depends(get_db),
+):
+    """
+    Regresa las tasas in/out (bps) de TODAS las interfaces del router,
+    calculadas en un solo ciclo de muestreo: dos recorridos GETBULK del
+    ifTable separados `intervalo` segundos.
+
+    Si no se pide un `intervalo` y el poller de fondo ya tiene un ciclo
+    reciente de ese router, se regresa ese ciclo sin consultar al equipo.
+    """
+    if intervalo is not None and intervalo <= 0:
+        raise HTTPException(status_code=400, detail="El intervalo debe ser > 0")
+
+    router = await get_router_by_hostname(hostname, db)
+
+    polled = POLL_RESULTS.get(router.hostname)
+    if (
+        intervalo is None
+        and fleet_poller.running
+        and polled is not None
+        and polled["interfaces"]
+        and polled["error"] is None
+    ):
+        return RouterOctetosResponse(
+            hostname=router.hostname,
+            intervalo=polled["interval"],
+            interfaces=[InterfaceRate(**i) for i in polled["interfaces"]],
+        )
+
+    if intervalo is None:
+        intervalo = 1.0
+
+    try:
+        data = await sample_router_interfaces(router.ip_admin, intervalo)
+    except Exception as e:
+        raise HTTPException(status_code=502, detail=str(e))
+
+    return RouterOctetosResponse(
+        hostname=router.hostname,
+        intervalo=data["interval"],
+        interfaces=[InterfaceRate(**i) for i in data["interfaces"]],
+    )
 
 
 # --------- GET /routers/{hostname}/interfaces/{if_index}/octetos/{tiempo} ---------
@@ -118,40 +312,44 @@ async def obtener_octetos_interfaz(
     hostname: str,
     if_index: int,
     tiempo: int,
+    max_points: int | None = Query(None, ge=4),
+    fuente: str | None = None,
     db: AsyncSession = Depends(get_db),
 ):
     """
-    Regresa los datos de monitoreo de octetos de la interfaz.
+    Regresa los datos de monitoreo de octetos de la interfaz guardados en
+    memoria (por un POST o por el poller de fondo): las muestras de los
+    últimos `tiempo` segundos, con promedio, mínimo y máximo. Si hay un
+    monitoreo en curso, regresa las muestras parciales que lleva.
+
+    Con `max_points` la lista de muestras se reduce (LTTB) a lo mucho ese
+    número de puntos, p.ej. el ancho en pixeles de la gráfica del cliente.
+
+    `fuente` elige la serie ("monitor" o "poller"); por defecto la del
+    monitoreo si tiene muestras, si no la del poller.
 
-    Comportamiento:
-      1) Si existe un monitoreo guardado para (hostname, if_index),
-         regresa esas muestras (todas las que se tengan hasta el momento).
-      2) Si NO existe, hace un muestreo “en vivo” durante `tiempo` segundos
-         y regresa el resultado (sin guardarlo).
+    No consulta al equipo; si no hay muestras regresa 404.
     """
+    if tiempo < 1:
+        raise HTTPException(status_code=400, detail="El tiempo debe ser >= 1 segundo")
+
     router = await get_router_by_hostname(hostname, db)
-    key = _build_monitor_key(router.hostname, if_index)
-
-    entry = MONITOREOS_OCTETOS.get(key)
-
-    if entry is not None:
-        # Usar los datos ya muestreados y almacenados
-        data = entry["data"]
-    else:
-        # Muestreo en vivo de respaldo (como tenías originalmente)
-        data = await monitor_interface_octets(
-            host=router.ip_admin,
-            if_index=if_index,
-            seconds=tiempo,
+
+    series, fuente = _stored_series(router.hostname, if_index, fuente)
+    if series is None or len(series) == 0:
+        raise HTTPException(
+            status_code=404,
+            detail="No hay muestras almacenadas para esa interfaz",
         )
 
-    return OctetosResponse(
-        samples=[Sample(**s) for s in data["samples"]],
-        avg_in_bps=data["avg_in_bps"],
-        avg_out_bps=data["avg_out_bps"],
-        last_in_octets=data["last_in_octets"],
-        last_out_octets=data["last_out_octets"],
-    )
+    data = _octetos_from_series(series, tiempo, max_points)
+    data.fuente = fuente
+
+    job = get_job_for(router.hostname, if_index)
+    if job is not None:
+        data.job_id = job.id
+        data.running = job.running
+    return data
 
 
 # --------- POST /routers/{hostname}/interfaces/{if_index}/octetos/{tiempo} ---------
@@ -171,37 +369,25 @@ async def iniciar_monitoreo_octetos(
     Activa el monitoreo de octetos de entrada/salida en la interfaz
     correspondiente durante `tiempo` segundos.
 
-    Hace el muestreo (SNMP) en este momento, guarda el resultado en memoria
-    y regresa el estado lógico del monitoreo.
+    El muestreo (SNMP) corre en segundo plano: se responde de inmediato con
+    el job_id y running=True. Cada muestra se agrega al buffer de la
+    interfaz, así que GET regresa las muestras parciales mientras corre.
+    Si ya había un monitoreo en curso para la interfaz, se reemplaza.
     """
     if tiempo < 1:
         raise HTTPException(status_code=400, detail="El tiempo debe ser >= 1 segundo")
 
     router = await get_router_by_hostname(hostname, db)
-    key = _build_monitor_key(router.hostname, if_index)
 
-    # Ejecuta el muestreo real vía SNMP
-    data = await monitor_interface_octets(
+    job = await start_job(
+        hostname=router.hostname,
         host=router.ip_admin,
         if_index=if_index,
         seconds=tiempo,
+        on_sample=sample_hub.sample_writer(router.hostname, if_index),
     )
 
-    # Guarda en memoria para futuros GET
-    MONITOREOS_OCTETOS[key] = {
-        "seconds": tiempo,
-        "data": data,
-    }
-
-    return MonitorState(
-        hostname=router.hostname,
-        if_index=if_index,
-        tiempo=tiempo,
-        running=False,  # ya terminó el muestreo (fue síncrono)
-        samples_count=len(data["samples"]),
-        avg_in_bps=data["avg_in_bps"],
-        avg_out_bps=data["avg_out_bps"],
-    )
+    return _job_state(job)
 
 
 # --------- DELETE /routers/{hostname}/interfaces/{if_index}/octetos/{tiempo} ---------
@@ -218,32 +404,157 @@ async def detener_monitoreo_octetos(
     db: AsyncSession = Depends(get_db),
 ):
     """
-    Para (lógicamente) el proceso de monitoreo de octetos de la interfaz,
-    borrando los datos almacenados en memoria para esa interfaz.
+    Detiene el monitoreo de octetos de la interfaz (cancela la tarea en
+    segundo plano, si sigue corriendo) y borra los datos almacenados en
+    memoria para esa interfaz.
 
     Regresa el último estado que se tenía antes de eliminarlo.
     """
     router = await get_router_by_hostname(hostname, db)
-    key = _build_monitor_key(router.hostname, if_index)
 
-    entry = MONITOREOS_OCTETOS.pop(key, None)
-    if entry is None:
+    job = get_job_for(router.hostname, if_index)
+    if job is not None:
+        await cancel_job(job)
+        forget_job(job)
+
+    # Solo la serie del monitoreo; la del poller sigue su propio ciclo
+    series = sample_store.drop(router.hostname, if_index, SOURCE_MONITOR)
+    if job is None and series is None:
         raise HTTPException(
             status_code=404,
             detail="No hay monitoreo activo (o datos almacenados) para esa interfaz",
         )
 
-    data = entry["data"]
-    segundos = entry.get("seconds", tiempo)
+    if job is not None:
+        return _job_state(job)
 
+    stats = series.stats()
     return MonitorState(
         hostname=router.hostname,
         if_index=if_index,
-        tiempo=segundos,
+        tiempo=tiempo,
         running=False,
-        samples_count=len(data["samples"]),
-        avg_in_bps=data["avg_in_bps"],
-        avg_out_bps=data["avg_out_bps"],
+        samples_count=stats["count"],
+        avg_in_bps=stats["avg_in_bps"],
+        avg_out_bps=stats["avg_out_bps"],
+    )
+
+
+# --------- GET /routers/monitoreos/{job_id} ---------
+
+
+@router.get(
+    "/monitoreos/{job_id}",
+    response_model=MonitorState,
+)
+async def estado_monitoreo(job_id: str):
+    """
+    Regresa el estado de un monitoreo lanzado con POST .../octetos/{tiempo}.
+    """
+    job = get_job(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Monitoreo no encontrado")
+
+    return _job_state(job)
+
+
+# --------- GET /routers/{hostname}/interfaces/{if_index}/stream ---------
+
+
+class SubscriptionStreamingResponse(StreamingResponse):
+    """
+    StreamingResponse que cancela la suscripción al hub al terminar,
+    aunque el cliente se desconecte antes de que empiece el cuerpo (si no,
+    la suscripción se queda para siempre y el hub sigue muestreando).
+    """
+
+    def __init__(self, content, sub, **kwargs):
+        super().__init__(content, **kwargs)
+        self._sub = sub
+
+    async def __call__(self, scope, receive, send):
+        try:
+            await super().__call__(scope, receive, send)
+        finally:
+            sample_hub.unsubscribe(self._sub)
+
+
+
+@router.get("/{hostname}/interfaces/{if_index}/stream")
+async def stream_octetos_interfaz(
+    hostname: str,
+    if_index: int,
+    db: AsyncSession = Depends(get_db),
+):
+    """
+    Server-Sent Events con cada muestra nueva de la interfaz, en cuanto se
+    produce (evento `sample`, data = JSON con in/out bps y octetos).
+
+    Todos los clientes de la misma interfaz comparten un solo ciclo de
+    muestreo. Si un cliente no consume a tiempo se descartan sus muestras
+    más viejas (campo `dropped`). Hay un máximo de suscriptores por
+    interfaz (429 si se excede).
+    """
+    router = await get_router_by_hostname(hostname, db)
+
+    try:
+        sub = sample_hub.subscribe(router.hostname, router.ip_admin, if_index)
+    except TooManySubscribers as e:
+        raise HTTPException(status_code=429, detail=str(e))
+
+    async def event_stream():
+        seq = 0
+        yield f"retry: {settings.STREAM_CLIENT_RETRY_MS}\n\n"
+        while True:
+            try:
+                item = await asyncio.wait_for(
+                    sub.queue.get(), settings.STREAM_KEEPALIVE_SECONDS
+                )
+            except asyncio.TimeoutError:
+                yield ": keepalive\n\n"
+                continue
+
+            seq += 1
+            event = "error" if "error" in item else "sample"
+            payload = json.dumps(dict(item, dropped=sub.dropped))
+            yield f"id: {seq}\nevent: {event}\ndata: {payload}\n\n"
+
+    return SubscriptionStreamingResponse(
+        event_stream(),
+        sub,
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+# --------- GET /routers/estado ---------
+
+
+@router.get(
+    "/estado",
+    response_model=EstadoFlotaResponse,
+)
+async def obtener_estado_flota(db: AsyncSession = Depends(get_db)):
+    """
+    Estado UP/DOWN, uptime y tiempo sin respuesta de TODOS los routers.
+
+    Lee los routers en una sola consulta a la BD y los sondea en paralelo
+    (FLEET_STATUS_CONCURRENCY en vuelo), así que tarda más o menos lo que
+    el equipo más lento.
+    """
+    result = await db.execute(
+        select(Router.hostname, Router.ip_admin).order_by(Router.hostname)
+    )
+    rows = [(hostname, ip) for hostname, ip in result.all()]
+
+    estados = await get_fleet_state(rows)
+    up = sum(1 for e in estados if e["estado"] == "UP")
+
+    return EstadoFlotaResponse(
+        total=len(estados),
+        up=up,
+        down=len(estados) - up,
+        routers=[EstadoRouterFlota(**e) for e in estados],
     )
 
 
@@ -278,7 +589,11 @@ async def obtener_estado_router(
 async def grafica_monitoreo_interfaz(
     hostname: str,
     if_index: int,
-    segundos: int = 10,   # puedes cambiar el default si quieres
+    segundos: int = Query(600, ge=1),
+    desde: datetime | None = None,
+    hasta: datetime | None = None,
+    max_points: int | None = Query(None, ge=4),
+    fuente: str | None = None,
     db: AsyncSession = Depends(get_db),
 ):
     """
@@ -287,57 +602,51 @@ async def grafica_monitoreo_interfaz(
     Genera una imagen PNG con la gráfica del monitoreo de octetos
     de la interfaz indicada (ifIndex SNMP).
 
-    Usa internamente monitor_interface_octets para tomar muestras
-    durante 'segundos' segundos.
+    Dibuja las muestras ya guardadas en sample_store (poller de fondo,
+    monitoreos por POST o streaming); no consulta al equipo. El rango es
+    [desde, hasta] (UTC) si se indica `desde`; si no, los últimos
+    `segundos` segundos. Los rangos largos se reducen con LTTB a
+    `max_points` puntos (por defecto, el ancho en pixeles de la imagen).
+    `fuente` ("monitor" o "poller") funciona igual que en GET .../octetos.
     """
     # 1) Verificar que el router exista en la BD
     router = await get_router_by_hostname(hostname, db)
 
-    # 2) Obtener muestras de tráfico con la misma función que /octetos/{tiempo}
-    data: Dict[str, Any] = await monitor_interface_octets(
-        host=router.ip_admin,
-        if_index=if_index,
-        seconds=segundos,
+    # 2) Muestras del rango pedido (de una sola fuente)
+    series, _ = _stored_series(router.hostname, if_index, fuente)
+    samples: List[Dict[str, Any]] = []
+    if series is not None and len(series) > 0:
+        if desde is not None:
+            end = _epoch(hasta) if hasta is not None else time.time()
+            samples = series.between(_epoch(desde), end)
+        else:
+            last = series.last()
+            samples = series.between(last["timestamp"] - segundos, last["timestamp"])
+
+    samples = downsample_samples(samples, max_points or PLOT_WIDTH_PX)
+
+    # 3) Dibujar en el pool de procesos (no bloquea el event loop)
+    png = await render_png(
+        render_octets_png, f"{hostname} - ifIndex {if_index}", *series_args(samples)
     )
 
-    samples = data.get("samples", [])
-
-    # 3) Construir la gráfica con matplotlib
-    fig = plt.figure(figsize=(6, 4))
-
-    if samples:
-        t = [s["t"] for s in samples]
-        in_bps = [s["in_bps"] for s in samples]
-        out_bps = [s["out_bps"] for s in samples]
-
-        plt.plot(t, in_bps, label="In bps")
-        plt.plot(t, out_bps, label="Out bps")
-
-        plt.xlabel("Tiempo (s)")
-        plt.ylabel("Tráfico (bps)")
-        plt.title(f"{hostname} - ifIndex {if_index}")
-        plt.legend()
-        plt.grid(True)
-    else:
-        # Si por alguna razón no hay samples, mostramos un mensaje
-        plt.text(
-            0.5,
-            0.5,
-            "Sin datos de monitoreo",
-            ha="center",
-            va="center",
-            fontsize=12,
-        )
-        plt.axis("off")
+    return Response(content=png, media_type="image/png")
 
-    # 4) Enviar la imagen como respuesta HTTP
-    buf = io.BytesIO()
-    plt.tight_layout()
-    plt.savefig(buf, format="png")
-    plt.close(fig)
-    buf.seek(0)
 
-    return StreamingResponse(buf, media_type="image/png")
+def _estado_interfaz(data: Dict[str, Any]) -> EstadoInterfazResponse:
+    return EstadoInterfazResponse(
+        host=data["host"],
+        if_index=data["if_index"],
+        admin_status=data["admin_status"],
+        oper_status=data["oper_status"],
+        admin_status_text=data["admin_status_text"],
+        oper_status_text=data["oper_status_text"],
+        trap_capture_active=data["trap_capture_active"],
+        last_change=data["last_change"],
+        events=[TrapEvent(**e) for e in data.get("events", [])],
+        trap_receiver_running=trap_receiver.running,
+        trap_receiver_error=trap_receiver.error,
+    )
 
 
 @router.get(
@@ -356,19 +665,7 @@ async def obtener_estado_interfaz(
     router = await get_router_by_hostname(hostname, db)
 
     data = await get_interface_state(router.ip_admin, if_index)
-    events = [TrapEvent(**e) for e in data.get("events", [])]
-
-    return EstadoInterfazResponse(
-        host=data["host"],
-        if_index=data["if_index"],
-        admin_status=data["admin_status"],
-        oper_status=data["oper_status"],
-        admin_status_text=data["admin_status_text"],
-        oper_status_text=data["oper_status_text"],
-        trap_capture_active=data["trap_capture_active"],
-        last_change=data["last_change"],
-        events=events,
-    )
+    return _estado_interfaz(data)
 
 
 @router.post(
@@ -387,19 +684,7 @@ async def activar_trampas_link(
     router = await get_router_by_hostname(hostname, db)
 
     data = await start_trap_capture(router.ip_admin, if_index)
-    events = [TrapEvent(**e) for e in data.get("events", [])]
-
-    return EstadoInterfazResponse(
-        host=data["host"],
-        if_index=data["if_index"],
-        admin_status=data["admin_status"],
-        oper_status=data["oper_status"],
-        admin_status_text=data["admin_status_text"],
-        oper_status_text=data["oper_status_text"],
-        trap_capture_active=data["trap_capture_active"],
-        last_change=data["last_change"],
-        events=events,
-    )
+    return _estado_interfaz(data)
 
 
 @router.delete(
@@ -418,16 +703,4 @@ async def detener_trampas_link(
     router = await get_router_by_hostname(hostname, db)
 
     data = await stop_trap_capture(router.ip_admin, if_index)
-    events = [TrapEvent(**e) for e in data.get("events", [])]
-
-    return EstadoInterfazResponse(
-        host=data["host"],
-        if_index=data["if_index"],
-        admin_status=data["admin_status"],
-        oper_status=data["oper_status"],
-        admin_status_text=data["admin_status_text"],
-        oper_status_text=data["oper_status_text"],
-        trap_capture_active=data["trap_capture_active"],
-        last_change=data["last_change"],
-        events=events,
-    )
\ No newline at end of file
+    return _estado_interfaz(data)
\ No newline at end of file
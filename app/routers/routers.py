@@ -9,6 +9,7 @@ from sqlalchemy.orm import selectinload
 from app.db import get_db
 from app.models.router import Router, Interface, RouterUser
 
+from app.services.topology_service import refresh_topology
 from app.services.ssh_service import (
     create_user_on_router,
     update_user_on_router,
@@ -118,6 +119,7 @@ async def crear_router(router_in: RouterCreate, db: AsyncSession = Depends(get_d
     db.add(router)
     await db.commit()
     await db.refresh(router)
+    await refresh_topology(db)
     return router
 
 
@@ -1,13 +1,35 @@
 # app/routers/ssh_test.py
+from typing import Optional
+
 from fastapi import APIRouter, HTTPException
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
-from app.services.ssh_service import run_command
+from app.services.ssh_service import run_command, stream_command
 
 router = APIRouter(prefix="/ssh", tags=["SSH"])
 
+
+class ClosingStreamingResponse(StreamingResponse):
+    """
+    StreamingResponse que cierra el generador de salida SSH al terminar,
+    aunque el cliente se desconecte antes de leer el cuerpo (así se libera
+    la sesión del pool y su lugar en SSH_POOL_MAX_PER_HOST).
+    """
+
+    def __init__(self, content, source, **kwargs):
+        super().__init__(content, **kwargs)
+        self._source = source
+
+    async def __call__(self, scope, receive, send):
+        try:
+            await super().__call__(scope, receive, send)
+        finally:
+            await self._source.aclose()
+
 class SSHRequest(BaseModel):
     host: str          # IP o hostname del router
     command: str = "show ip interface brief"  # comando por defecto
+    timeout: Optional[float] = None  # segundos; por defecto SSH_COMMAND_TIMEOUT
 
 @router.post("/test")
 async def ssh_test(req: SSHRequest):
@@ -15,7 +37,7 @@ async def ssh_test(req: SSHRequest):
     Prueba conexión SSH y ejecución de un comando.
     """
     try:
-        output = await run_command(req.host, req.command)
+        output = await run_command(req.host, req.command, req.timeout)
         return {
             "host": req.host,
             "command": req.command,
@@ -24,3 +46,41 @@ async def ssh_test(req: SSHRequest):
     except Exception as e:
         # Puedes loguear e en algún lado si quieres
         raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.post("/test/stream")
+async def ssh_test_stream(req: SSHRequest):
+    """
+    Igual que POST /ssh/test, pero la salida se manda como text/plain
+    conforme llega del equipo (útil para show running-config, show ip
+    route, etc.).
+
+    Los errores de conexión regresan 500; si el comando falla o se vence
+    el plazo cuando ya se mandó parte de la salida, se agrega una última
+    línea "[error] ...".
+    """
+    chunks = stream_command(req.host, req.command, req.timeout)
+
+    # El primer pedazo se espera aquí para poder responder 500 si no hay
+    # conexión, antes de mandar los headers
+    try:
+        first = await chunks.__anext__()
+    except StopAsyncIteration:
+        first = ""
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+    async def body():
+        try:
+            yield first
+            async for chunk in chunks:
+                yield chunk
+        except Exception as e:
+            yield f"\n[error] {e}\n"
+
+    return ClosingStreamingResponse(
+        body(),
+        chunks,
+        media_type="text/plain; charset=utf-8",
+        headers={"X-Accel-Buffering": "no"},
+    )
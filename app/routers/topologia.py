@@ -1,25 +1,29 @@
 # app/routers/topologia.py
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, HTTPException
 from pydantic import BaseModel
 from typing import List, Optional, Dict
 
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
-from sqlalchemy.orm import selectinload
 
 from app.db import get_db
-from app.models.router import Router, Interface
 
-import io
-import networkx as nx
-import matplotlib.pyplot as plt
-from fastapi.responses import StreamingResponse
+from fastapi.responses import Response
+
+from app.services.charts import render_png, render_topology_png
+from app.services.discovery_service import discovery_daemon
+from app.services.graph_index import get_graph_index
+from app.services.topology_service import (
+    TOPOLOGY_EPOCH,
+    refresh_topology,
+    topology_cache,
+    topology_changes,
+)
 
 router = APIRouter(prefix="/topologia", tags=["Topología"])
 
 # ----------------- ESTADO DEL “DEMONIO” -----------------
-DEMON_RUNNING: bool = False
-DEMON_INTERVAL: int = 300  # segundos (5 minutos por defecto)
+# El demonio (discovery_daemon) recorre las tablas CDP/LLDP de los routers
+# cada `interval` segundos; ver app/services/discovery_service.py
 
 
 # ----------------- ESQUEMAS Pydantic -----------------
@@ -42,9 +46,18 @@ class Link(BaseModel):
 class DaemonState(BaseModel):
     running: bool
     interval_seconds: int
+    last_run: Optional[str] = None
+    last_duration_seconds: Optional[float] = None
+    routers_walked: int = 0
+    new_routers: int = 0
+    changes: int = 0
+    errors: Dict[str, str] = {}
 
 
 class TopologyRead(BaseModel):
+    version: int
+    # Cambia en cada arranque de la app (las versiones vuelven a 1)
+    epoca: str
     routers: List[RouterNode]
     enlaces: List[Link]
     daemon: DaemonState
@@ -54,63 +67,79 @@ class DaemonUpdate(BaseModel):
     interval_seconds: int
 
 
-# ----------------- FUNCIÓN INTERNA: construir topología -----------------
+class RutaResponse(BaseModel):
+    version: int
+    origen: str
+    destino: str
+    saltos: int
+    ruta: List[str]
 
 
-async def build_topology(db: AsyncSession) -> TopologyRead:
-    result = await db.execute(
-        select(Router).options(selectinload(Router.interfaces))
+class SaltosResponse(BaseModel):
+    version: int
+    # origen -> {destino: saltos}; los inalcanzables no aparecen
+    saltos: Dict[str, Dict[str, int]]
+
+
+class Puente(BaseModel):
+    source: str
+    target: str
+    # Routers que quedan separados del resto si se cae este enlace
+    aislados: List[str]
+
+
+class PuntosCriticosResponse(BaseModel):
+    version: int
+    articulaciones: List[str]
+    puentes: List[Puente]
+
+
+class CambiosTopologia(BaseModel):
+    desde_version: int
+    version: int
+    epoca: str
+    # True si desde_version ya no se conserva (o es de otra época): los
+    # "agregados" son la topología completa y el cliente debe reemplazar
+    # lo que tenga
+    completo: bool
+    routers_agregados: List[RouterNode]
+    routers_modificados: List[RouterNode]
+    routers_eliminados: List[str]
+    enlaces_agregados: List[Link]
+    enlaces_eliminados: List[Link]
+
+
+# ----------------- FUNCIONES INTERNAS -----------------
+
+
+def _daemon_state() -> DaemonState:
+    d = discovery_daemon
+    return DaemonState(
+        running=d.running,
+        interval_seconds=d.interval,
+        last_run=d.last_run.isoformat() + "Z" if d.last_run else None,
+        last_duration_seconds=d.last_duration,
+        routers_walked=d.routers_walked,
+        new_routers=d.new_routers,
+        changes=d.changes,
+        errors=d.errors,
     )
-    routers = result.scalars().unique().all()
-
-    router_nodes: List[RouterNode] = []
-    enlaces: List[Link] = []
-
-    # Diccionario para ver si existe un router con cierto hostname
-    known_hostnames = {r.hostname for r in routers}
-
-    for r in routers:
-        router_nodes.append(
-            RouterNode(
-                hostname=r.hostname,
-                ip_admin=r.ip_admin,
-                loopback=r.loopback,
-                role=r.role,
-                vendor=r.vendor,
-                os_version=r.os_version,
-            )
-        )
-
-        for iface in r.interfaces:
-            if iface.neighbor_hostname:
-                enlaces.append(
-                    Link(
-                        source=r.hostname,
-                        target=iface.neighbor_hostname,
-                        interface=iface.name,
-                    )
-                )
-                # Si el vecino no está en la tabla de routers, lo añadimos “huérfano”
-                if iface.neighbor_hostname not in known_hostnames:
-                    router_nodes.append(
-                        RouterNode(
-                            hostname=iface.neighbor_hostname,
-                            ip_admin=None,
-                            loopback=None,
-                            role=None,
-                            vendor=None,
-                            os_version=None,
-                        )
-                    )
-                    known_hostnames.add(iface.neighbor_hostname)
+
+
+
+async def build_topology(db: AsyncSession) -> TopologyRead:
+    # Lee la BD y registra la foto (sube la versión si algo cambió)
+    snap = await refresh_topology(db)
 
     return TopologyRead(
-        routers=router_nodes,
-        enlaces=enlaces,
-        daemon=DaemonState(
-            running=DEMON_RUNNING,
-            interval_seconds=DEMON_INTERVAL,
-        ),
+        version=snap.version,
+        epoca=TOPOLOGY_EPOCH,
+        routers=[RouterNode(hostname=h, **data) for h, data in snap.routers.items()],
+        enlaces=[
+            Link(source=source, target=target, interface=interface)
+            for source, target, interface in snap.links
+        ],
+        daemon=_daemon_state(),
     )
 
 
@@ -131,13 +160,11 @@ async def obtener_topologia(db: AsyncSession = Depends(get_db)):
 async def iniciar_demonio_topologia(db: AsyncSession = Depends(get_db)):
     """
     POST /topologia
-    Activa un “demonio” lógico que cada cierto tiempo
-    explora la red (aquí solo guardamos el estado).
+    Activa el demonio que cada `interval_seconds` explora la red por
+    SNMP (vecinos CDP/LLDP) y actualiza routers y enlaces en la BD.
+    La primera pasada arranca de inmediato, en segundo plano.
     """
-    global DEMON_RUNNING
-    DEMON_RUNNING = True
-    # Aquí en un proyecto grande podrías lanzar un thread/Task
-    # que use SSH/SNMP para descubrir cambios.
+    discovery_daemon.start()
     return await build_topology(db)
 
 
@@ -150,9 +177,10 @@ async def actualizar_intervalo_demonio(
     Permite cambiar el intervalo de tiempo en el que el demonio
     explora la topología.
     """
-    global DEMON_INTERVAL
-    DEMON_INTERVAL = cfg.interval_seconds
-    return DaemonState(running=DEMON_RUNNING, interval_seconds=DEMON_INTERVAL)
+    if cfg.interval_seconds < 1:
+        raise HTTPException(status_code=400, detail="El intervalo debe ser >= 1 segundo")
+    discovery_daemon.set_interval(cfg.interval_seconds)
+    return _daemon_state()
 
 
 @router.delete("/", response_model=DaemonState)
@@ -161,41 +189,107 @@ async def detener_demonio_topologia():
     DELETE /topologia
     Detiene el demonio que explora la topología.
     """
-    global DEMON_RUNNING
-    DEMON_RUNNING = False
-    return DaemonState(running=DEMON_RUNNING, interval_seconds=DEMON_INTERVAL)
+    await discovery_daemon.stop()
+    return _daemon_state()
 
 
-# ----------------- /topologia/grafica -----------------
+# ----------------- /topologia/cambios -----------------
 
 
-@router.get("/grafica")
-async def grafica_topologia(db: AsyncSession = Depends(get_db)):
+@router.get("/cambios", response_model=CambiosTopologia)
+async def cambios_topologia(desde_version: int = 0, epoca: Optional[str] = None):
     """
-    GET /topologia/grafica
-    Regresa una imagen PNG con la topología actual.
+    GET /topologia/cambios?desde_version=N&epoca=E
+    Regresa solo los routers y enlaces agregados/eliminados desde la
+    versión N (la `version` de GET /topologia o de la llamada anterior).
+    Si `epoca` no coincide con la actual (la app se reinició), regresa la
+    topología completa con completo=true.
     """
-    topo = await build_topology(db)
+    try:
+        return topology_changes(desde_version, epoca)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
 
-    G = nx.Graph()
-    for r in topo.routers:
-        G.add_node(r.hostname)
-    for e in topo.enlaces:
-        G.add_edge(e.source, e.target)
 
-    # Dibujar grafo
-    fig = plt.figure(figsize=(6, 4))
-    if G.number_of_nodes() > 0:
-        pos = nx.spring_layout(G)
-        nx.draw(G, pos, with_labels=True)
-    buf = io.BytesIO()
-    plt.tight_layout()
-    plt.savefig(buf, format="png")
-    plt.close(fig)
-    buf.seek(0)
+# ----------------- CONSULTAS DEL GRAFO -----------------
 
-    return StreamingResponse(buf, media_type="image/png")
 
+@router.get("/ruta", response_model=RutaResponse)
+async def ruta_topologia(origen: str, destino: str):
+    """
+    GET /topologia/ruta?origen=Edge&destino=R5
+    Ruta con menos saltos entre dos routers.
+    """
+    index = await get_graph_index()
+    for name in (origen, destino):
+        if not index.has_node(name):
+            raise HTTPException(status_code=404, detail=f"Router {name} no está en la topología")
+
+    ruta = index.shortest_path(origen, destino)
+    if ruta is None:
+        raise HTTPException(status_code=404, detail="No hay ruta entre esos routers")
+
+    return RutaResponse(
+        version=index.version,
+        origen=origen,
+        destino=destino,
+        saltos=len(ruta) - 1,
+        ruta=ruta,
+    )
 
 
+@router.get("/saltos", response_model=SaltosResponse)
+async def saltos_topologia(origen: Optional[str] = None):
+    """
+    GET /topologia/saltos[?origen=R1]
+    Número de saltos entre todos los pares de routers (o solo desde
+    `origen`).
+    """
+    index = await get_graph_index()
+    if origen is not None:
+        if not index.has_node(origen):
+            raise HTTPException(status_code=404, detail=f"Router {origen} no está en la topología")
+        return SaltosResponse(version=index.version, saltos={origen: index.hops_from(origen)})
+    return SaltosResponse(version=index.version, saltos=index.all_hops())
+
+
+@router.get("/puntos_criticos", response_model=PuntosCriticosResponse)
+async def puntos_criticos_topologia():
+    """
+    GET /topologia/puntos_criticos
+    Routers (articulaciones) y enlaces (puentes) cuya falla parte la red.
+    """
+    index = await get_graph_index()
+    return PuntosCriticosResponse(
+        version=index.version,
+        articulaciones=index.articulation_points,
+        puentes=[
+            Puente(source=a, target=b, aislados=aislados)
+            for a, b, aislados in index.bridges
+        ],
+    )
+
+
+# ----------------- /topologia/grafica -----------------
+
+
+@router.get("/grafica")
+async def grafica_topologia():
+    """
+    GET /topologia/grafica
+    Regresa una imagen PNG con la topología actual.
+    """
+    # Grafo y posiciones se reutilizan mientras no cambie la versión
+    graph = await topology_cache.get()
+
+    # Se dibuja en el pool de procesos (no bloquea el event loop); el PNG
+    # de cada versión se guarda en caché
+    png = await render_png(
+        render_topology_png,
+        graph.nodes,
+        graph.edges,
+        graph.positions,
+        key=f"v{graph.version}",
+    )
 
+    return Response(content=png, media_type="image/png")
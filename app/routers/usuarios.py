@@ -14,6 +14,7 @@ from app.services.ssh_service import (
     create_user_on_router,
     update_user_on_router,
     delete_user_on_router,
+    run_on_routers,
 )
 
 
@@ -41,6 +42,19 @@ class GlobalUserRead(GlobalUserBase):
     routers: List[str]  # URLs a /routers/<hostname>/usuarios/<username>
 
 
+class ResultadoRouter(BaseModel):
+    hostname: str
+    ip_admin: str
+    ok: bool
+    error: Optional[str] = None
+    latencia: float  # segundos
+
+
+class GlobalUserOperacion(GlobalUserRead):
+    # Resultado de aplicar el cambio por SSH en cada router
+    reporte: List[ResultadoRouter]
+
+
 # ---------- Helpers internos ----------
 
 async def get_all_routers(db: AsyncSession) -> List[Router]:
@@ -99,18 +113,23 @@ async def listar_usuarios_globales(db: AsyncSession = Depends(get_db)):
     return result
 
 
-@router.post("/", response_model=GlobalUserRead)
+@router.post("/", response_model=GlobalUserOperacion)
 async def crear_usuario_global(
     user_in: GlobalUserCreate,
     db: AsyncSession = Depends(get_db),
 ):
     """
     Agregar un nuevo usuario a todos los routers,
-    regresar json con la misma info de GET pero solo del usuario agregado.
+    regresar json con la misma info de GET pero solo del usuario agregado,
+    más el resultado en cada router (`reporte`).
+
+    Los routers se configuran en paralelo (USER_FANOUT_CONCURRENCY a la
+    vez, USER_FANOUT_TIMEOUT por router); la BD se actualiza en orden.
     """
     routers = await get_all_routers(db)
 
     # Crear el usuario en cada router (si no existe)
+    targets = []
     for r in routers:
         existing = next(
             (u for u in r.users if u.username == user_in.username),
@@ -128,29 +147,30 @@ async def crear_usuario_global(
         )
         db.add(new_user)
         r.users.append(new_user)
+        targets.append((r.hostname, r.ip_admin))
 
-        try:
-            await create_user_on_router(
-                host=r.ip_admin,
-                username=user_in.username,
-                privilege=user_in.privilege,
-            )
-        except Exception as e:
-            # Si falla en algún router, puedes loguear y seguir, o hacer rollback.
-            print(f"Error creando usuario {user_in.username} en {r.hostname}: {e}")
+    reporte = await run_on_routers(
+        targets,
+        lambda ip: create_user_on_router(
+            host=ip,
+            username=user_in.username,
+            privilege=user_in.privilege,
+        ),
+    )
 
     await db.commit()
 
     urls = build_user_urls(user_in.username, routers)
-    return GlobalUserRead(
+    return GlobalUserOperacion(
         username=user_in.username,
         privilege=user_in.privilege,
         permissions=user_in.permissions,
         routers=sorted(urls),
+        reporte=reporte,
     )
 
 
-@router.put("/{username}", response_model=GlobalUserRead)
+@router.put("/{username}", response_model=GlobalUserOperacion)
 async def actualizar_usuario_global(
     username: str,
     user_in: GlobalUserUpdate,
@@ -158,16 +178,19 @@ async def actualizar_usuario_global(
 ):
     """
     Actualizar un usuario en todos los routers,
-    regresar json con la misma info de GET pero del usuario actualizado.
+    regresar json con la misma info de GET pero del usuario actualizado,
+    más el resultado en cada router (`reporte`).
     """
     routers = await get_all_routers(db)
 
     # Buscar el usuario en todos los routers
     usuarios_en_red: List[RouterUser] = []
+    targets = []
     for r in routers:
         for u in r.users:
             if u.username == username:
                 usuarios_en_red.append(u)
+                targets.append((r.hostname, r.ip_admin))
 
     if not usuarios_en_red:
         raise HTTPException(status_code=404, detail="Usuario no existe en la red")
@@ -179,43 +202,49 @@ async def actualizar_usuario_global(
         if user_in.permissions is not None:
             u.permissions = user_in.permissions
 
-        try:
-            await update_user_on_router(
-                host=u.router.ip_admin,
-                username=u.username,
-                privilege=u.privilege,
-            )
-        except Exception as e:
-            print(f"Error actualizando usuario {u.username} en {u.router.hostname}: {e}")
+    # Privilegio de cada router (puede venir distinto si no se cambió)
+    privilegios = {ip: u.privilege for (_, ip), u in zip(targets, usuarios_en_red)}
+    reporte = await run_on_routers(
+        targets,
+        lambda ip: update_user_on_router(
+            host=ip,
+            username=username,
+            privilege=privilegios[ip],
+        ),
+    )
 
     await db.commit()
 
     ref = usuarios_en_red[0]
     urls = build_user_urls(ref.username, routers)
-    return GlobalUserRead(
+    return GlobalUserOperacion(
         username=ref.username,
         privilege=ref.privilege,
         permissions=ref.permissions,
         routers=sorted(urls),
+        reporte=reporte,
     )
 
 
-@router.delete("/{username}", response_model=GlobalUserRead)
+@router.delete("/{username}", response_model=GlobalUserOperacion)
 async def eliminar_usuario_global(
     username: str,
     db: AsyncSession = Depends(get_db),
 ):
     """
     Eliminar usuario común a todos los routers,
-    regresar json con la misma información de GET, pero del usuario eliminado.
+    regresar json con la misma información de GET, pero del usuario eliminado,
+    más el resultado en cada router (`reporte`).
     """
     routers = await get_all_routers(db)
 
     usuarios_en_red: List[RouterUser] = []
+    targets = []
     for r in routers:
         for u in r.users:
             if u.username == username:
                 usuarios_en_red.append(u)
+                targets.append((r.hostname, r.ip_admin))
 
     if not usuarios_en_red:
         raise HTTPException(status_code=404, detail="Usuario no existe en la red")
@@ -225,25 +254,20 @@ async def eliminar_usuario_global(
     urls = build_user_urls(ref.username, routers)
 
     # Borrar de todos los routers
-    for u in usuarios_en_red:
-        try:
-            await delete_user_on_router(
-                host=u.router.ip_admin,
-                username=u.username,
-            )
-        except Exception as e:
-            print(f"Error borrando usuario {u.username} en {u.router.hostname}: {e}")
+    reporte = await run_on_routers(
+        targets,
+        lambda ip: delete_user_on_router(host=ip, username=username),
+    )
 
+    for u in usuarios_en_red:
         await db.delete(u)
 
     await db.commit()
 
-    return GlobalUserRead(
+    return GlobalUserOperacion(
         username=ref.username,
         privilege=ref.privilege,
         permissions=ref.permissions,
         routers=sorted(urls),
+        reporte=reporte,
     )
-
-
-
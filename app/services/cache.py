@@ -0,0 +1,80 @@
+# app/services/cache.py
+"""
+Caché en memoria con TTL y "single-flight" para consultas a los equipos.
+
+- Si hay un valor guardado y no ha expirado, se regresa sin consultar.
+- Si no, la primera llamada lanza la consulta y las llamadas concurrentes
+  con la misma llave esperan ESA misma consulta en lugar de repetirla.
+
+La consulta corre en su propia tarea, así que si el cliente que la lanzó
+se desconecta (cancelación), los demás que la están esperando no se ven
+afectados.
+"""
+import asyncio
+import time
+from typing import Any, Awaitable, Callable, Dict, Hashable, Tuple
+
+from app.config import settings
+
+
+class AsyncTTLCache:
+    def __init__(self, ttl: float, max_entries: int = 10000):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._values: Dict[Hashable, Tuple[float, Any]] = {}
+        self._inflight: Dict[Hashable, asyncio.Task] = {}
+
+    async def get_or_compute(
+        self,
+        key: Hashable,
+        factory: Callable[[], Awaitable[Any]],
+        ttl: float | None = None,
+    ) -> Any:
+        entry = self._values.get(key)
+        if entry is not None and entry[0] > time.monotonic():
+            return entry[1]
+
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.create_task(self._compute(key, factory, ttl))
+            self._inflight[key] = task
+
+        return await asyncio.shield(task)
+
+    async def _compute(
+        self,
+        key: Hashable,
+        factory: Callable[[], Awaitable[Any]],
+        ttl: float | None,
+    ) -> Any:
+        try:
+            value = await factory()
+            if ttl is None:
+                ttl = self.ttl
+            if ttl > 0:
+                self._store(key, value, ttl)
+            return value
+        finally:
+            self._inflight.pop(key, None)
+
+    def _store(self, key: Hashable, value: Any, ttl: float) -> None:
+        now = time.monotonic()
+        if len(self._values) >= self.max_entries:
+            # Primero se tiran los expirados; si no alcanza, los más viejos
+            for k in [k for k, (exp, _) in self._values.items() if exp <= now]:
+                del self._values[k]
+            while len(self._values) >= self.max_entries:
+                del self._values[next(iter(self._values))]
+
+        self._values.pop(key, None)
+        self._values[key] = (now + ttl, value)
+
+    def invalidate(self, key: Hashable) -> None:
+        self._values.pop(key, None)
+
+    def clear(self) -> None:
+        self._values.clear()
+
+
+# Caché compartida de consultas SNMP (estado de routers, interfaces, sysinfo)
+snmp_cache = AsyncTTLCache(settings.SNMP_CACHE_TTL)
@@ -0,0 +1,162 @@
+# app/services/charts.py
+"""
+Generación de gráficas PNG fuera del event loop.
+
+Las funciones render_* corren en un ProcessPoolExecutor (procesos
+"spawn", así no heredan el event loop ni los sockets del proceso
+principal) y usan la API orientada a objetos de matplotlib (Figure), no
+el estado global de pyplot.
+
+matplotlib y networkx se importan dentro de las funciones de dibujo, así
+que solo se cargan en los procesos trabajadores y la primera vez que se
+pide una gráfica; el proceso de la API nunca los importa.
+
+render_png() guarda cada PNG en chart_cache con una llave que es el hash
+de los datos de entrada: si nadie cambió los datos, la imagen se regresa
+sin volver a dibujar.
+"""
+import asyncio
+import hashlib
+import io
+import multiprocessing
+import pickle
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Callable, Dict, List, Sequence, Tuple
+
+from app.config import settings
+from app.services.cache import AsyncTTLCache
+
+FIGSIZE = (6, 4)
+DPI = 100
+# Puntos que vale la pena dibujar: uno por pixel de ancho
+PLOT_WIDTH_PX = int(FIGSIZE[0] * DPI)
+
+# PNGs ya generados (llave = hash de los datos)
+chart_cache = AsyncTTLCache(settings.CHART_CACHE_TTL, settings.CHART_CACHE_MAX)
+
+_pool: ProcessPoolExecutor | None = None
+
+
+# ----------------- DIBUJO (corre en el proceso trabajador) -----------------
+
+
+def _to_png(fig) -> bytes:
+    buf = io.BytesIO()
+    fig.tight_layout()
+    fig.savefig(buf, format="png", dpi=DPI)
+    return buf.getvalue()
+
+
+def render_octets_png(
+    title: str,
+    t: Sequence[float],
+    in_bps: Sequence[float],
+    out_bps: Sequence[float],
+) -> bytes:
+    from matplotlib.figure import Figure
+
+    fig = Figure(figsize=FIGSIZE)
+    ax = fig.add_subplot()
+
+    if len(t):
+        ax.plot(t, in_bps, label="In bps")
+        ax.plot(t, out_bps, label="Out bps")
+
+        ax.set_xlabel("Tiempo (s)")
+        ax.set_ylabel("Tráfico (bps)")
+        ax.set_title(title)
+        ax.legend()
+        ax.grid(True)
+    else:
+        # Si por alguna razón no hay samples, mostramos un mensaje
+        ax.text(
+            0.5,
+            0.5,
+            "Sin datos de monitoreo",
+            ha="center",
+            va="center",
+            fontsize=12,
+        )
+        ax.axis("off")
+
+    return _to_png(fig)
+
+
+def render_topology_png(
+    nodes: Sequence[str],
+    edges: Sequence[Tuple[str, str]],
+    pos: Dict[str, Tuple[float, float]] | None = None,
+) -> bytes:
+    import networkx as nx
+    from matplotlib.figure import Figure
+
+    G = nx.Graph()
+    G.add_nodes_from(nodes)
+    G.add_edges_from(edges)
+
+    fig = Figure(figsize=FIGSIZE)
+    ax = fig.add_subplot()
+    ax.set_axis_off()
+    if G.number_of_nodes() > 0:
+        if pos is None:
+            pos = nx.spring_layout(G)
+        nx.draw_networkx(G, pos, ax=ax, with_labels=True)
+
+    return _to_png(fig)
+
+
+# ----------------- POOL Y CACHÉ (proceso principal) -----------------
+
+
+def _get_pool() -> ProcessPoolExecutor:
+    global _pool
+    if _pool is None:
+        _pool = ProcessPoolExecutor(
+            max_workers=settings.CHART_WORKERS,
+            mp_context=multiprocessing.get_context("spawn"),
+        )
+    return _pool
+
+
+def shutdown_chart_pool() -> None:
+    """Se llama en el shutdown de la app."""
+    global _pool
+    if _pool is not None:
+        _pool.shutdown(wait=False, cancel_futures=True)
+        _pool = None
+
+
+async def run_in_pool(func: Callable[..., Any], *args: Any) -> Any:
+    """Ejecuta func(*args) en el pool de procesos de gráficas."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_get_pool(), func, *args)
+
+
+def chart_key(func: Callable[..., bytes], *args: Any) -> str:
+    data = pickle.dumps((func.__name__, args), protocol=pickle.HIGHEST_PROTOCOL)
+    return hashlib.sha1(data).hexdigest()
+
+
+async def render_png(
+    func: Callable[..., bytes],
+    *args: Any,
+    key: str | None = None,
+) -> bytes:
+    """
+    Ejecuta func(*args) en el pool de procesos y regresa el PNG.
+    Llamadas con los mismos datos (o la misma `key`) reutilizan la imagen.
+    """
+    if key is None:
+        key = chart_key(func, *args)
+
+    return await chart_cache.get_or_compute(
+        (func.__name__, key), lambda: run_in_pool(func, *args)
+    )
+
+
+def series_args(samples: List[Dict[str, Any]]) -> Tuple[List[float], List[float], List[float]]:
+    return (
+        [s["t"] for s in samples],
+        [s["in_bps"] for s in samples],
+        [s["out_bps"] for s in samples],
+    )
@@ -0,0 +1,412 @@
+# app/services/discovery_service.py
+"""
+Demonio de descubrimiento de topología por SNMP (CDP y LLDP).
+
+Cada `interval` segundos:
+  1. Recorre con GETBULK, en paralelo, la caché de vecinos CDP
+     (CISCO-CDP-MIB cdpCacheTable) y LLDP (LLDP-MIB lldpRemTable) de todos
+     los routers de la BD.
+  2. Los vecinos que no están en la BD y reportan dirección de
+     administración se agregan como routers nuevos y se recorren en la
+     misma pasada (crawl), hasta DISCOVERY_MAX_ROUTERS equipos.
+  3. Actualiza Interface.neighbor_hostname de todos los routers en una sola
+     transacción y, si algo cambió, registra la nueva versión de la topología.
+     Los enlaces que escribe el demonio se marcan con
+     Interface.neighbor_source = "discovery" y solo esos se borran cuando
+     dejan de aparecer; los capturados a mano se conservan. Si una interfaz
+     reporta varios vecinos se queda uno fijo (CDP primero, luego por
+     nombre) para que la topología no cambie en cada pasada.
+
+Los nombres de interfaz se normalizan al formato corto de la BD
+("FastEthernet1/0" y "Fa1/0" -> "f1_0", "Loopback0" -> "loopback0").
+"""
+import asyncio
+import re
+import time
+from datetime import datetime
+from typing import Any, Dict, List, Tuple
+
+from sqlalchemy import select
+
+from app.config import settings
+from app.db import AsyncSessionLocal
+from app.models.router import Interface, Router
+from app.services.monitor_service import snmp_bulk_walk
+from app.services.topology_service import refresh_topology
+
+IF_DESCR = "1.3.6.1.2.1.2.2.1.2"
+
+# Valor de Interface.neighbor_source para enlaces escritos por el demonio
+NEIGHBOR_SOURCE_DISCOVERY = "discovery"
+
+# CISCO-CDP-MIB::cdpCacheEntry, índice = ifIndex.deviceIndex
+CDP_CACHE_ADDRESS = "1.3.6.1.4.1.9.9.23.1.2.1.1.4"
+CDP_CACHE_DEVICE_ID = "1.3.6.1.4.1.9.9.23.1.2.1.1.6"
+CDP_CACHE_DEVICE_PORT = "1.3.6.1.4.1.9.9.23.1.2.1.1.7"
+
+# LLDP-MIB, índice = timeMark.localPortNum.remIndex
+LLDP_LOC_PORT_DESC = "1.0.8802.1.1.2.1.3.7.1.4"        # índice = localPortNum
+LLDP_REM_PORT_ID = "1.0.8802.1.1.2.1.4.1.1.7"
+LLDP_REM_SYS_NAME = "1.0.8802.1.1.2.1.4.1.1.9"
+# lldpRemManAddrIfSubtype: la dirección va en el índice
+# (timeMark.localPortNum.remIndex.addrSubtype.len.a.b.c.d)
+LLDP_REM_MAN_ADDR_IF = "1.0.8802.1.1.2.1.4.2.1.3"
+
+NEIGHBOR_COLUMNS = [
+    IF_DESCR,
+    CDP_CACHE_ADDRESS,
+    CDP_CACHE_DEVICE_ID,
+    CDP_CACHE_DEVICE_PORT,
+    LLDP_LOC_PORT_DESC,
+    LLDP_REM_PORT_ID,
+    LLDP_REM_SYS_NAME,
+    LLDP_REM_MAN_ADDR_IF,
+]
+
+# Prefijos largos / abreviados -> prefijo corto que usa la BD
+_IF_PREFIXES = [
+    ("tengigabitethernet", "te"),
+    ("gigabitethernet", "g"),
+    ("fastethernet", "f"),
+    ("ethernet", "e"),
+    ("serial", "s"),
+    ("loopback", "loopback"),
+    ("port-channel", "po"),
+    ("vlan", "vlan"),
+    ("tunnel", "tunnel"),
+    ("gi", "g"),
+    ("fa", "f"),
+    ("eth", "e"),
+    ("et", "e"),
+    ("se", "s"),
+    ("lo", "loopback"),
+    ("te", "te"),
+    ("po", "po"),
+    ("tu", "tunnel"),
+    ("vl", "vlan"),
+]
+
+_IP_RE = re.compile(r"^\d+\.\d+\.\d+\.\d+$")
+
+
+def normalize_if_name(name: str) -> str:
+    """
+    "FastEthernet1/0" -> "f1_0", "Fa1/0" -> "f1_0", "f1/0" -> "f1_0",
+    "Loopback0" -> "loopback0", "GigabitEthernet0/0.10" -> "g0_0.10"
+    """
+    name = name.strip().lower().replace(" ", "")
+    m = re.match(r"^([a-z\-]+)(.*)$", name)
+    if m:
+        prefix, rest = m.groups()
+        for long_name, short in _IF_PREFIXES:
+            if prefix == long_name:
+                name = short + rest
+                break
+    return name.replace("/", "_")
+
+
+def normalize_hostname(device_id: str) -> str:
+    """
+    El deviceId de CDP/sysName de LLDP puede traer el dominio
+    ("R2.redes.local") o un número de serie ("SW1(FOC123)").
+    """
+    name = device_id.strip()
+    name = name.split("(", 1)[0]
+    if not _IP_RE.match(name):
+        name = name.split(".", 1)[0]
+    return name
+
+
+def _text(value: Any) -> str:
+    if isinstance(value, bytes):
+        return value.decode(errors="replace")
+    return str(value)
+
+
+def _ipv4(value: Any) -> str | None:
+    if isinstance(value, bytes) and len(value) == 4:
+        return ".".join(str(b) for b in value)
+    return None
+
+
+def _suffix(oid: str, base: str) -> List[int]:
+    return [int(p) for p in oid[len(base) + 1:].split(".")]
+
+
+async def walk_neighbors(host: str, community: str | None = None) -> List[Dict[str, Any]]:
+    """
+    Vecinos CDP y LLDP de un equipo:
+      [{"local_if": "f1_0", "neighbor": "R2", "address": "10.0.0.2" | None,
+        "remote_if": "f1_0" | None, "protocol": "cdp" | "lldp"}, ...]
+    """
+    columns = await snmp_bulk_walk(host, NEIGHBOR_COLUMNS, community)
+
+    if_descr = {
+        _suffix(oid, IF_DESCR)[0]: _text(v) for oid, v in columns[IF_DESCR]
+    }
+
+    neighbors: Dict[Tuple[str, str], Dict[str, Any]] = {}
+
+    # ---- CDP ----
+    cdp: Dict[Tuple[int, int], Dict[str, Any]] = {}
+    for base, field in (
+        (CDP_CACHE_ADDRESS, "address"),
+        (CDP_CACHE_DEVICE_ID, "device_id"),
+        (CDP_CACHE_DEVICE_PORT, "port"),
+    ):
+        for oid, value in columns[base]:
+            idx = _suffix(oid, base)
+            cdp.setdefault((idx[0], idx[1]), {})[field] = value
+
+    for (if_index, _), row in cdp.items():
+        if "device_id" not in row or if_index not in if_descr:
+            continue
+        local_if = normalize_if_name(if_descr[if_index])
+        neighbor = normalize_hostname(_text(row["device_id"]))
+        neighbors[(local_if, neighbor)] = {
+            "local_if": local_if,
+            "neighbor": neighbor,
+            "address": _ipv4(row.get("address")),
+            "remote_if": normalize_if_name(_text(row["port"])) if "port" in row else None,
+            "protocol": "cdp",
+        }
+
+    # ---- LLDP ----
+    loc_ports = {
+        _suffix(oid, LLDP_LOC_PORT_DESC)[0]: _text(v)
+        for oid, v in columns[LLDP_LOC_PORT_DESC]
+    }
+    lldp: Dict[Tuple[int, int], Dict[str, Any]] = {}
+    for base, field in ((LLDP_REM_SYS_NAME, "sys_name"), (LLDP_REM_PORT_ID, "port")):
+        for oid, value in columns[base]:
+            idx = _suffix(oid, base)
+            lldp.setdefault((idx[1], idx[2]), {})[field] = value
+    for oid, _ in columns[LLDP_REM_MAN_ADDR_IF]:
+        idx = _suffix(oid, LLDP_REM_MAN_ADDR_IF)
+        # addrSubtype 1 = IPv4, seguido de la longitud (4) y los octetos
+        if len(idx) >= 9 and idx[3] == 1 and idx[4] == 4:
+            lldp.setdefault((idx[1], idx[2]), {})["address"] = ".".join(
+                str(b) for b in idx[5:9]
+            )
+
+    for (local_port, _), row in lldp.items():
+        if "sys_name" not in row or local_port not in loc_ports:
+            continue
+        local_if = normalize_if_name(loc_ports[local_port])
+        neighbor = normalize_hostname(_text(row["sys_name"]))
+        # Si CDP ya reportó el mismo enlace, solo completamos la dirección
+        known = neighbors.get((local_if, neighbor))
+        if known is not None:
+            known["address"] = known["address"] or row.get("address")
+            continue
+        neighbors[(local_if, neighbor)] = {
+            "local_if": local_if,
+            "neighbor": neighbor,
+            "address": row.get("address"),
+            "remote_if": normalize_if_name(_text(row["port"])) if "port" in row else None,
+            "protocol": "lldp",
+        }
+
+    return list(neighbors.values())
+
+
+class DiscoveryDaemon:
+    def __init__(self, interval: int | None = None):
+        self.interval = interval or settings.DISCOVERY_INTERVAL
+        self._task: asyncio.Task | None = None
+        self._wake = asyncio.Event()
+        self.last_run: datetime | None = None
+        self.last_duration: float | None = None
+        self.routers_walked = 0
+        self.new_routers = 0
+        self.changes = 0
+        self.errors: Dict[str, str] = {}
+
+    # --------- ciclo de vida ---------
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def start(self) -> None:
+        if not self.running:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    def set_interval(self, seconds: int) -> None:
+        """El nuevo intervalo aplica también a la espera en curso."""
+        self.interval = seconds
+        self._wake.set()
+
+    async def _run(self) -> None:
+        while True:
+            started = time.monotonic()
+            try:
+                await self.discover_once()
+            except Exception as e:
+                print(f"[DESCUBRIMIENTO] Error: {e}")
+
+            while True:
+                remaining = started + self.interval - time.monotonic()
+                if remaining <= 0:
+                    break
+                self._wake.clear()
+                try:
+                    await asyncio.wait_for(self._wake.wait(), remaining)
+                except asyncio.TimeoutError:
+                    break
+
+    # --------- descubrimiento ---------
+
+    async def _crawl(
+        self, routers: Dict[str, str], ip_owner: Dict[str, str]
+    ) -> Tuple[Dict[str, List[Dict[str, Any]]], Dict[str, str]]:
+        """
+        Recorre los routers conocidos y, por oleadas, los vecinos nuevos con
+        dirección de administración. `ip_owner` ({ip: hostname}, IPs de
+        administración, loopback e interfaces de la BD) sirve para reconocer
+        a un vecino conocido aunque su deviceId no sea igual a su hostname.
+
+        Regresa (vecinos por hostname, routers nuevos {hostname: ip}).
+        """
+        sem = asyncio.Semaphore(settings.DISCOVERY_CONCURRENCY)
+        results: Dict[str, List[Dict[str, Any]]] = {}
+        errors: Dict[str, str] = {}
+        new_routers: Dict[str, str] = {}
+
+        async def walk(hostname: str, host: str) -> None:
+            async with sem:
+                try:
+                    results[hostname] = await walk_neighbors(host)
+                except Exception as e:
+                    errors[hostname] = str(e)
+
+        wave = dict(routers)
+        walked = 0
+        while wave:
+            budget = settings.DISCOVERY_MAX_ROUTERS - walked
+            wave = dict(list(wave.items())[: max(0, budget)])
+            if not wave:
+                break
+            await asyncio.gather(*[walk(h, ip) for h, ip in wave.items()])
+            walked += len(wave)
+
+            next_wave: Dict[str, str] = {}
+            for hostname in wave:
+                for n in results.get(hostname, []):
+                    ip = n["address"]
+                    if ip in ip_owner:
+                        n["neighbor"] = ip_owner[ip]
+                        continue
+                    name = n["neighbor"]
+                    if ip and name not in routers and name not in new_routers:
+                        new_routers[name] = ip
+                        next_wave[name] = ip
+                        ip_owner[ip] = name
+            wave = next_wave
+
+        self.errors = errors
+        self.routers_walked = walked
+        return results, new_routers
+
+    async def _load_routers(self) -> Tuple[Dict[str, str], Dict[str, str]]:
+        """({hostname: ip_admin}, {ip: hostname}) de la BD."""
+        async with AsyncSessionLocal() as db:
+            result = await db.execute(select(Router))
+            routers = result.scalars().all()
+
+        ip_owner: Dict[str, str] = {}
+        for r in routers:
+            for iface in r.interfaces:
+                if iface.ip_address:
+                    ip_owner[iface.ip_address] = r.hostname
+            if r.loopback:
+                ip_owner[r.loopback] = r.hostname
+            ip_owner[r.ip_admin] = r.hostname
+        return {r.hostname: r.ip_admin for r in routers}, ip_owner
+
+    async def _apply(
+        self,
+        neighbors: Dict[str, List[Dict[str, Any]]],
+        new_routers: Dict[str, str],
+    ) -> int:
+        """Escribe routers nuevos y vecinos en una sola transacción."""
+        changes = 0
+        async with AsyncSessionLocal() as db:
+            result = await db.execute(select(Router))
+            db_routers = {r.hostname: r for r in result.scalars().all()}
+
+            for hostname, ip in new_routers.items():
+                if hostname in db_routers:
+                    continue
+                router = Router(hostname=hostname, ip_admin=ip, interfaces=[])
+                db.add(router)
+                db_routers[hostname] = router
+                changes += 1
+
+            for hostname, found in neighbors.items():
+                router = db_routers.get(hostname)
+                if router is None:
+                    continue
+                by_name = {normalize_if_name(i.name): i for i in router.interfaces}
+
+                # Un solo vecino por interfaz, siempre el mismo
+                chosen: Dict[str, str] = {}
+                for n in sorted(
+                    found, key=lambda n: (n["protocol"] != "cdp", n["neighbor"])
+                ):
+                    chosen.setdefault(n["local_if"], n["neighbor"])
+
+                for local_if, neighbor in chosen.items():
+                    iface = by_name.get(local_if)
+                    if iface is None:
+                        iface = Interface(name=local_if, router=router)
+                        db.add(iface)
+                        by_name[local_if] = iface
+                    if (
+                        iface.neighbor_hostname != neighbor
+                        or iface.neighbor_source != NEIGHBOR_SOURCE_DISCOVERY
+                    ):
+                        iface.neighbor_hostname = neighbor
+                        iface.neighbor_source = NEIGHBOR_SOURCE_DISCOVERY
+                        changes += 1
+
+                # Enlaces descubiertos antes que ya no aparecen en las
+                # tablas de vecinos (los capturados a mano no se tocan)
+                for name, iface in by_name.items():
+                    if (
+                        name not in chosen
+                        and iface.neighbor_source == NEIGHBOR_SOURCE_DISCOVERY
+                    ):
+                        iface.neighbor_hostname = None
+                        iface.neighbor_source = None
+                        changes += 1
+
+            if changes:
+                await db.commit()
+        return changes
+
+    async def discover_once(self) -> int:
+        """Una pasada completa. Regresa el número de cambios en la BD."""
+        t0 = time.monotonic()
+
+        # La sesión de BD no se mantiene abierta mientras se consulta la red
+        routers, ip_owner = await self._load_routers()
+        neighbors, new_routers = await self._crawl(routers, ip_owner)
+        changes = await self._apply(neighbors, new_routers)
+        if changes:
+            await refresh_topology()
+
+        self.new_routers = len(new_routers)
+        self.changes = changes
+        self.last_run = datetime.utcnow()
+        self.last_duration = time.monotonic() - t0
+        return changes
+
+
+discovery_daemon = DiscoveryDaemon()
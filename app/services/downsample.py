@@ -0,0 +1,71 @@
+# app/services/downsample.py
+"""
+Reducción de series para graficar: Largest-Triangle-Three-Buckets (LTTB).
+
+LTTB conserva la forma visual de la serie (picos y caídas) con muchos menos
+puntos: el primero y el último se conservan, el resto se parte en cubetas y
+de cada cubeta se elige el punto que forma el triángulo más grande con el
+punto elegido antes y el promedio de la cubeta siguiente.
+"""
+from typing import Any, Dict, List, Sequence
+
+
+def lttb_indices(x: Sequence[float], y: Sequence[float], threshold: int) -> List[int]:
+    """
+    Índices de los puntos que LTTB conserva (en orden). Si la serie ya
+    tiene `threshold` puntos o menos, regresa todos.
+    """
+    n = len(x)
+    if threshold >= n:
+        return list(range(n))
+    if threshold < 3:
+        return [0, n - 1]
+
+    bucket = (n - 2) / (threshold - 2)
+    selected = [0]
+    a = 0
+
+    for i in range(threshold - 2):
+        # Promedio de la cubeta siguiente
+        nxt_lo = int((i + 1) * bucket) + 1
+        nxt_hi = min(int((i + 2) * bucket) + 1, n)
+        size = nxt_hi - nxt_lo
+        avg_x = sum(x[nxt_lo:nxt_hi]) / size
+        avg_y = sum(y[nxt_lo:nxt_hi]) / size
+
+        # Punto de la cubeta actual con el triángulo más grande
+        lo = int(i * bucket) + 1
+        hi = int((i + 1) * bucket) + 1
+        ax, ay = x[a], y[a]
+        best, best_area = lo, -1.0
+        for j in range(lo, hi):
+            area = abs((ax - avg_x) * (y[j] - ay) - (ax - x[j]) * (avg_y - ay))
+            if area > best_area:
+                best, best_area = j, area
+
+        selected.append(best)
+        a = best
+
+    selected.append(n - 1)
+    return selected
+
+
+def downsample_samples(
+    samples: List[Dict[str, Any]],
+    max_points: int,
+) -> List[Dict[str, Any]]:
+    """
+    Reduce muestras de octetos ({t, in_bps, out_bps, ...}) a lo mucho
+    `max_points` (>= 4). Se corre LTTB por separado sobre in_bps y out_bps
+    (la mitad de puntos para cada una) y se juntan los índices, para no
+    perder los picos de ninguna de las dos direcciones.
+    """
+    if len(samples) <= max_points:
+        return samples
+
+    t = [s["t"] for s in samples]
+    # El primer y el último punto salen en las dos listas
+    half = max(max_points // 2 + 1, 3)
+    keep = set(lttb_indices(t, [s["in_bps"] for s in samples], half))
+    keep.update(lttb_indices(t, [s["out_bps"] for s in samples], half))
+    return [samples[i] for i in sorted(keep)]
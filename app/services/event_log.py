@@ -0,0 +1,150 @@
+# app/services/event_log.py
+"""
+Bitácora persistente de eventos linkUp/linkDown (tabla link_events).
+
+record_oper_status solo encola el evento (put_nowait, sin esperar). Una
+tarea de fondo saca los eventos de la cola y los inserta por lotes de hasta
+EVENT_LOG_BATCH_SIZE filas, o lo que se haya juntado en
+EVENT_LOG_FLUSH_SECONDS, en una sola transacción. Si la cola se llena
+(BD caída o muy lenta), los eventos nuevos se descartan y se cuentan en
+`dropped`.
+
+stop() no cancela la tarea: mete una marca de fin en la cola, la tarea
+escribe el lote que estaba juntando y termina; después se escribe lo que
+haya llegado detrás de la marca.
+"""
+import asyncio
+from typing import Any, Dict, List
+
+from sqlalchemy import insert, select
+
+from app.config import settings
+from app.db import AsyncSessionLocal
+from app.models.link_event import LinkEvent
+from app.models.router import Router
+
+# Marca de fin para la tarea de escritura
+_STOP = object()
+
+
+class EventLogWriter:
+    def __init__(self):
+        self.queue: asyncio.Queue = asyncio.Queue(settings.EVENT_LOG_QUEUE_SIZE)
+        self._task: asyncio.Task | None = None
+        self._stopping = False
+        self.written = 0
+        self.dropped = 0
+
+    def enqueue(self, event: Dict[str, Any]) -> None:
+        """
+        event = {host, if_index, timestamp (datetime UTC), event,
+                 old_status, new_status, source}
+        """
+        try:
+            self.queue.put_nowait(event)
+        except asyncio.QueueFull:
+            self.dropped += 1
+
+    # --------- ciclo de vida ---------
+
+    async def start(self) -> None:
+        if self._task is None or self._task.done():
+            self._stopping = False
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            # La tarea termina el lote en curso al encontrar la marca
+            await self.queue.put(_STOP)
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+        # Lo que quedó en la cola se escribe antes de salir
+        batch = self._drain([], settings.EVENT_LOG_QUEUE_SIZE)
+        if batch:
+            await self._write(batch)
+
+    # --------- escritura ---------
+
+    def _add(self, batch: List[Dict[str, Any]], item: Any) -> None:
+        if item is _STOP:
+            self._stopping = True
+        else:
+            batch.append(item)
+
+    def _drain(self, batch: List[Dict[str, Any]], limit: int) -> List[Dict[str, Any]]:
+        while len(batch) < limit and not self.queue.empty():
+            item = self.queue.get_nowait()
+            if item is _STOP:
+                # Marca vieja (stop() sin tarea corriendo)
+                continue
+            batch.append(item)
+        return batch
+
+    async def _collect(self) -> List[Dict[str, Any]]:
+        batch: List[Dict[str, Any]] = []
+        self._add(batch, await self.queue.get())
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + settings.EVENT_LOG_FLUSH_SECONDS
+
+        while not self._stopping and len(batch) < settings.EVENT_LOG_BATCH_SIZE:
+            while (
+                not self._stopping
+                and len(batch) < settings.EVENT_LOG_BATCH_SIZE
+                and not self.queue.empty()
+            ):
+                self._add(batch, self.queue.get_nowait())
+            remaining = deadline - loop.time()
+            if self._stopping or len(batch) >= settings.EVENT_LOG_BATCH_SIZE or remaining <= 0:
+                break
+            try:
+                self._add(batch, await asyncio.wait_for(self.queue.get(), remaining))
+            except asyncio.TimeoutError:
+                break
+        return batch
+
+    async def _write(self, batch: List[Dict[str, Any]]) -> None:
+        hosts = {ev["host"] for ev in batch}
+
+        async with AsyncSessionLocal() as session:
+            result = await session.execute(
+                select(Router.id, Router.hostname, Router.ip_admin).where(
+                    Router.ip_admin.in_(hosts)
+                )
+            )
+            by_host = {ip: (rid, name) for rid, name, ip in result.all()}
+
+            rows = []
+            for ev in batch:
+                router_id, hostname = by_host.get(ev["host"], (None, None))
+                rows.append(
+                    {
+                        "router_id": router_id,
+                        "host": ev["host"],
+                        "hostname": hostname,
+                        "if_index": ev["if_index"],
+                        "timestamp": ev["timestamp"],
+                        "event": ev["event"],
+                        "old_status": ev.get("old_status"),
+                        "new_status": ev.get("new_status"),
+                        "source": ev.get("source"),
+                    }
+                )
+
+            await session.execute(insert(LinkEvent), rows)
+            await session.commit()
+
+        self.written += len(rows)
+
+    async def _run(self) -> None:
+        while not self._stopping:
+            batch = await self._collect()
+            if not batch:
+                continue
+            try:
+                await self._write(batch)
+            except Exception as e:
+                print(f"[EVENTOS] Error guardando {len(batch)} eventos: {e}")
+
+
+event_log = EventLogWriter()
@@ -0,0 +1,182 @@
+# app/services/graph_index.py
+"""
+Índice en memoria del grafo de la topología para consultas de rutas.
+
+Se construye a partir de la foto vigente de topology_service y solo se
+reconstruye cuando cambia la versión de la topología. Al construirse:
+  - lista de adyacencia (grafo no dirigido) con el número de enlaces
+    físicos entre cada par de routers: dos enlaces paralelos entre R1 y R2
+    cuentan como 2, así que ninguno de los dos es puente,
+  - puntos de articulación y puentes (Tarjan, O(n + m)); para cada puente
+    se guardan los routers que quedan aislados si ese enlace falla.
+
+Las distancias en saltos se calculan con BFS por origen la primera vez que
+se piden y se guardan (árbol de padres + saltos), así que las consultas
+siguientes son búsquedas en dicts.
+"""
+from collections import Counter, deque
+from typing import Dict, List, Set, Tuple
+
+from app.services.topology_service import (
+    TopologySnapshot,
+    current_snapshot,
+    refresh_topology,
+)
+
+
+class GraphIndex:
+    def __init__(self, version: int, nodes: List[str], edges: List[Tuple[str, str]]):
+        self.version = version
+
+        # Cada enlace aparece una vez por cada extremo que lo reporta
+        # (R1 -> R2 desde R1 y R2 -> R1 desde R2): los enlaces entre a y b
+        # son el máximo de lo que reporta cada lado, no la suma
+        reported: Counter = Counter()
+        for a, b in edges:
+            if a != b:
+                reported[(a, b)] += 1
+
+        # vecino -> número de enlaces con ese vecino
+        self.adj: Dict[str, Counter] = {n: Counter() for n in nodes}
+        for (a, b), count in reported.items():
+            links = max(count, reported[(b, a)])
+            self.adj.setdefault(a, Counter())[b] = links
+            self.adj.setdefault(b, Counter())[a] = links
+
+        # origen -> {nodo: (saltos, padre)}
+        self._bfs: Dict[str, Dict[str, Tuple[int, str | None]]] = {}
+        self._all_hops: Dict[str, Dict[str, int]] | None = None
+
+        self.articulation_points: List[str] = []
+        # (a, b, routers aislados si se cae a-b)
+        self.bridges: List[Tuple[str, str, List[str]]] = []
+        self._tarjan()
+
+    # --------- puntos de articulación y puentes ---------
+
+    def _tarjan(self) -> None:
+        """DFS iterativo (sin recursión, sirve para grafos grandes)."""
+        disc: Dict[str, int] = {}
+        low: Dict[str, int] = {}
+        size: Dict[str, int] = {}
+        order: List[str] = []
+        articulation: Set[str] = set()
+        # (padre, hijo, inicio de su componente en `order`)
+        bridges: List[Tuple[str, str, int]] = []
+        component_end: Dict[int, int] = {}
+
+        for root in self.adj:
+            if root in disc:
+                continue
+            component_start = len(order)
+            disc[root] = low[root] = len(order)
+            order.append(root)
+            root_children = 0
+            stack = [(root, None, iter(sorted(self.adj[root])))]
+
+            while stack:
+                node, parent, neighbors = stack[-1]
+                advanced = False
+                for nxt in neighbors:
+                    # El enlace al padre no cuenta como arista de regreso,
+                    # salvo que haya otro enlace paralelo con él
+                    if nxt == parent and self.adj[node][parent] == 1:
+                        continue
+                    if nxt in disc:
+                        low[node] = min(low[node], disc[nxt])
+                        continue
+                    disc[nxt] = low[nxt] = len(order)
+                    order.append(nxt)
+                    if node == root:
+                        root_children += 1
+                    stack.append((nxt, node, iter(sorted(self.adj[nxt]))))
+                    advanced = True
+                    break
+                if advanced:
+                    continue
+
+                stack.pop()
+                size[node] = len(order) - disc[node]
+                if parent is not None:
+                    low[parent] = min(low[parent], low[node])
+                    if low[node] >= disc[parent] and parent != root:
+                        articulation.add(parent)
+                    if low[node] > disc[parent]:
+                        bridges.append((parent, node, component_start))
+
+            component_end[component_start] = len(order)
+            if root_children > 1:
+                articulation.add(root)
+
+        self.articulation_points = sorted(articulation)
+
+        for parent, child, comp_lo in bridges:
+            comp_hi = component_end[comp_lo]
+            # El subárbol DFS de `child` es el lado que se separa; se
+            # reporta el lado más chico de la componente
+            lo, hi = disc[child], disc[child] + size[child]
+            side = order[lo:hi]
+            rest = order[comp_lo:lo] + order[hi:comp_hi]
+            isolated = side if len(side) <= len(rest) else rest
+            self.bridges.append((parent, child, sorted(isolated)))
+
+    # --------- distancias ---------
+
+    def _tree(self, source: str) -> Dict[str, Tuple[int, str | None]]:
+        tree = self._bfs.get(source)
+        if tree is not None:
+            return tree
+
+        tree = {source: (0, None)}
+        queue = deque([source])
+        while queue:
+            node = queue.popleft()
+            hops = tree[node][0] + 1
+            for nxt in self.adj[node]:
+                if nxt not in tree:
+                    tree[nxt] = (hops, node)
+                    queue.append(nxt)
+
+        self._bfs[source] = tree
+        return tree
+
+    def has_node(self, node: str) -> bool:
+        return node in self.adj
+
+    def shortest_path(self, source: str, target: str) -> List[str] | None:
+        """Ruta con menos saltos (None si no hay)."""
+        # El árbol BFS se guarda por origen; reconstruimos desde el destino
+        tree = self._tree(source)
+        if target not in tree:
+            return None
+        path = [target]
+        while path[-1] != source:
+            path.append(tree[path[-1]][1])
+        path.reverse()
+        return path
+
+    def hops_from(self, source: str) -> Dict[str, int]:
+        return {node: hops for node, (hops, _) in self._tree(source).items()}
+
+    def all_hops(self) -> Dict[str, Dict[str, int]]:
+        if self._all_hops is None:
+            self._all_hops = {node: self.hops_from(node) for node in self.adj}
+        return self._all_hops
+
+
+_index: GraphIndex | None = None
+
+
+def _index_for(snap: TopologySnapshot) -> GraphIndex:
+    global _index
+    if _index is None or _index.version != snap.version:
+        _index = GraphIndex(snap.version, snap.nodes, snap.edges)
+    return _index
+
+
+async def get_graph_index() -> GraphIndex:
+    """Índice de la versión vigente (se reconstruye si la versión cambió)."""
+    snap = current_snapshot()
+    if snap is None:
+        snap = await refresh_topology()
+    return _index_for(snap)
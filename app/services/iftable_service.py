@@ -0,0 +1,127 @@
+# app/services/iftable_service.py
+import asyncio
+import time
+from typing import Any, Dict, List
+
+from app.services.monitor_service import snmp_bulk_walk
+
+# Columnas de IF-MIB::ifTable (1.3.6.1.2.1.2.2.1.X)
+IF_TABLE_COLUMNS = {
+    "descr": "1.3.6.1.2.1.2.2.1.2",
+    "admin_status": "1.3.6.1.2.1.2.2.1.7",
+    "oper_status": "1.3.6.1.2.1.2.2.1.8",
+    "in_octets": "1.3.6.1.2.1.2.2.1.10",
+    "out_octets": "1.3.6.1.2.1.2.2.1.16",
+}
+
+
+async def walk_if_table(
+    host: str,
+    community: str | None = None,
+) -> Dict[str, Any]:
+    """
+    Lee todas las interfaces del router con GETBULK (todas las columnas
+    en los mismos PDUs).
+
+    Regresa:
+      {
+        "timestamp": <time.monotonic() del muestreo>,
+        "wall_time": <time.time() del muestreo>,
+        "interfaces": {
+          if_index: {
+            "descr": str,
+            "admin_status": int,
+            "oper_status": int,
+            "in_octets": int,
+            "out_octets": int,
+          },
+          ...
+        }
+      }
+    """
+    wall0 = time.time()
+    t0 = time.monotonic()
+    columns = await snmp_bulk_walk(host, list(IF_TABLE_COLUMNS.values()), community)
+    t1 = time.monotonic()
+
+    interfaces: Dict[int, Dict[str, Any]] = {}
+    for field, base in IF_TABLE_COLUMNS.items():
+        for oid, value in columns[base]:
+            if_index = int(oid.rsplit(".", 1)[1])
+            row = interfaces.setdefault(if_index, {})
+            if isinstance(value, bytes):
+                value = value.decode(errors="replace")
+            row[field] = value
+
+    return {
+        # Punto medio del recorrido: es la mejor estimación del instante
+        # en que el agente leyó los contadores
+        "timestamp": (t0 + t1) / 2,
+        "wall_time": wall0 + (t1 - t0) / 2,
+        "interfaces": interfaces,
+    }
+
+
+def compute_if_rates(
+    prev: Dict[str, Any],
+    cur: Dict[str, Any],
+) -> List[Dict[str, Any]]:
+    """
+    Calcula in/out bps por interfaz entre dos resultados de walk_if_table.
+    """
+    elapsed = cur["timestamp"] - prev["timestamp"]
+    if elapsed <= 0:
+        elapsed = 1.0
+
+    rates: List[Dict[str, Any]] = []
+    for if_index, row in sorted(cur["interfaces"].items()):
+        before = prev["interfaces"].get(if_index, {})
+        in_bps = out_bps = None
+
+        if "in_octets" in row and "in_octets" in before:
+            delta_in = row["in_octets"] - before["in_octets"]
+            if delta_in < 0:
+                delta_in += 2**32
+            in_bps = (delta_in * 8) / elapsed
+
+        if "out_octets" in row and "out_octets" in before:
+            delta_out = row["out_octets"] - before["out_octets"]
+            if delta_out < 0:
+                delta_out += 2**32
+            out_bps = (delta_out * 8) / elapsed
+
+        rates.append(
+            {
+                "if_index": if_index,
+                "descr": row.get("descr"),
+                "admin_status": row.get("admin_status"),
+                "oper_status": row.get("oper_status"),
+                "in_octets": row.get("in_octets"),
+                "out_octets": row.get("out_octets"),
+                "in_bps": in_bps,
+                "out_bps": out_bps,
+            }
+        )
+    return rates
+
+
+async def sample_router_interfaces(
+    host: str,
+    interval: float = 1.0,
+    community: str | None = None,
+) -> Dict[str, Any]:
+    """
+    Un ciclo de muestreo de todo el router: dos recorridos del ifTable
+    separados `interval` segundos y las tasas de todas las interfaces.
+    """
+    if interval <= 0:
+        interval = 1.0
+
+    first = await walk_if_table(host, community)
+    await asyncio.sleep(interval)
+    second = await walk_if_table(host, community)
+
+    return {
+        "interval": second["timestamp"] - first["timestamp"],
+        "interfaces": compute_if_rates(first, second),
+    }
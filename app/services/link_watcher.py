@@ -0,0 +1,111 @@
+# app/services/link_watcher.py
+"""
+Vigilancia de fondo del operStatus de las interfaces con captura activa.
+
+Cada LINK_WATCH_INTERVAL segundos se agrupan las interfaces de TRAP_STATE
+con captura activa por equipo y se consulta el estado de todas las de un
+mismo equipo en una sola petición (snmp_get_if_statuses). Los cambios se
+registran con record_oper_status, así que GET .../estado responde desde
+memoria y los eventos ya no dependen de que alguien consulte el endpoint.
+
+Una interfaz que el equipo ya no tiene (p. ej. una subinterfaz borrada)
+se salta y queda en `missing`; el resto del equipo se sigue vigilando.
+"""
+import asyncio
+from typing import Dict, List
+
+from app.config import settings
+from app.services.monitor_service import (
+    TRAP_STATE,
+    record_oper_status,
+    snmp_get_if_statuses,
+)
+from app.services.sampling_clock import SamplingClock
+
+
+class LinkWatcher:
+    def __init__(self, interval: float | None = None, max_concurrency: int | None = None):
+        self.interval = interval or settings.LINK_WATCH_INTERVAL
+        self.max_concurrency = max_concurrency or settings.POLL_MAX_CONCURRENCY
+        self._task: asyncio.Task | None = None
+        self._sem: asyncio.Semaphore | None = None
+        self.rounds = 0
+        self.errors = 0
+        self.missed_ticks = 0
+        # host -> if_index con captura activa que el agente ya no reporta
+        self.missing: Dict[str, List[int]] = {}
+
+    # --------- ciclo de vida ---------
+
+    async def start(self) -> None:
+        if self.running:
+            return
+        self._sem = asyncio.Semaphore(self.max_concurrency)
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    # --------- ciclo ---------
+
+    def _active_by_host(self) -> Dict[str, List[int]]:
+        by_host: Dict[str, List[int]] = {}
+        for (host, if_index), info in TRAP_STATE.items():
+            if info["active"]:
+                by_host.setdefault(host, []).append(if_index)
+        return by_host
+
+    async def _check_host(self, host: str, if_indexes: List[int]) -> None:
+        async with self._sem:
+            try:
+                statuses = await snmp_get_if_statuses(
+                    host, if_indexes, skip_missing=True
+                )
+            except Exception as e:
+                self.errors += 1
+                print(f"[LINK WATCH] Error consultando {host}: {e}")
+                return
+
+        missing = [i for i in if_indexes if i not in statuses]
+        if missing:
+            self.missing[host] = missing
+        else:
+            self.missing.pop(host, None)
+
+        for if_index, status in statuses.items():
+            info = TRAP_STATE.get((host, if_index))
+            # La captura pudo desactivarse mientras esperábamos la respuesta
+            if info is None or not info["active"]:
+                continue
+            record_oper_status(
+                host,
+                if_index,
+                status["oper_status"],
+                source="watcher",
+                admin_status=status["admin_status"],
+            )
+
+    async def check_all(self) -> None:
+        by_host = self._active_by_host()
+        if by_host:
+            await asyncio.gather(
+                *[self._check_host(host, idx) for host, idx in by_host.items()]
+            )
+        self.rounds += 1
+
+    async def _run(self) -> None:
+        clock = SamplingClock(self.interval)
+        while True:
+            await self.check_all()
+            await clock.next_tick()
+            self.missed_ticks = clock.missed
+
+
+link_watcher = LinkWatcher()
@@ -0,0 +1,156 @@
+# app/services/monitor_jobs.py
+"""
+Trabajos de monitoreo de octetos en segundo plano.
+
+POST /routers/{hostname}/interfaces/{if_index}/octetos/{tiempo} ya no
+espera los `tiempo` segundos: crea un MonitorJob (una tarea asyncio que
+corre monitor_interface_octets y va guardando cada muestra en
+sample_store) y responde de inmediato con su job_id.
+"""
+import asyncio
+import uuid
+from collections import OrderedDict
+from datetime import datetime
+from typing import Any, Callable, Dict, List
+
+from app.services.monitor_service import monitor_interface_octets
+
+# Cuántos trabajos terminados se conservan para consultar su estado
+MAX_FINISHED_JOBS = 1000
+
+
+class MonitorJob:
+    def __init__(self, hostname: str, host: str, if_index: int, seconds: int):
+        self.id = uuid.uuid4().hex
+        self.hostname = hostname
+        self.host = host
+        self.if_index = if_index
+        self.seconds = seconds
+        self.started_at = datetime.utcnow()
+        self.finished_at: datetime | None = None
+        self.samples_count = 0
+        # Sumas de las muestras de ESTE trabajo (el buffer de la interfaz
+        # puede tener muestras de otras fuentes)
+        self.sum_in_bps = 0.0
+        self.sum_out_bps = 0.0
+        self.missed_ticks = 0
+        self.error: str | None = None
+        self.task: asyncio.Task | None = None
+
+    @property
+    def key(self) -> str:
+        return f"{self.hostname}:{self.if_index}"
+
+    @property
+    def avg_in_bps(self) -> float | None:
+        return self.sum_in_bps / self.samples_count if self.samples_count else None
+
+    @property
+    def avg_out_bps(self) -> float | None:
+        return self.sum_out_bps / self.samples_count if self.samples_count else None
+
+    @property
+    def running(self) -> bool:
+        return self.task is not None and not self.task.done()
+
+
+# job_id -> MonitorJob (en orden de creación)
+JOBS: "OrderedDict[str, MonitorJob]" = OrderedDict()
+# "<hostname>:<if_index>" -> job_id del trabajo más reciente
+JOBS_BY_KEY: Dict[str, str] = {}
+# Se llaman con cada trabajo recién lanzado (sample_hub detiene su propio
+# muestreo de esa interfaz para no duplicar consultas)
+JOB_STARTED_HOOKS: List[Callable[["MonitorJob"], None]] = []
+
+
+async def _run_job(
+    job: MonitorJob,
+    on_sample: Callable[[Dict[str, Any]], None] | None,
+) -> None:
+    def count_sample(sample: Dict[str, Any]) -> None:
+        job.samples_count += 1
+        job.sum_in_bps += sample["in_bps"]
+        job.sum_out_bps += sample["out_bps"]
+        job.missed_ticks = sample["missed_ticks"]
+        if on_sample is not None:
+            on_sample(sample)
+
+    try:
+        # Solo se conservan contadores: las muestras ya quedaron en
+        # sample_store a través de on_sample
+        result = await monitor_interface_octets(
+            host=job.host,
+            if_index=job.if_index,
+            seconds=job.seconds,
+            on_sample=count_sample,
+            keep_samples=False,
+        )
+        job.missed_ticks = result["missed_ticks"]
+    except asyncio.CancelledError:
+        raise
+    except Exception as e:
+        job.error = str(e)
+    finally:
+        job.finished_at = datetime.utcnow()
+
+
+def _prune_finished() -> None:
+    finished = [job_id for job_id, job in JOBS.items() if not job.running]
+    for job_id in finished[: max(0, len(finished) - MAX_FINISHED_JOBS)]:
+        job = JOBS.pop(job_id)
+        if JOBS_BY_KEY.get(job.key) == job_id:
+            del JOBS_BY_KEY[job.key]
+
+
+def get_job(job_id: str) -> MonitorJob | None:
+    return JOBS.get(job_id)
+
+
+def get_job_for(hostname: str, if_index: int) -> MonitorJob | None:
+    job_id = JOBS_BY_KEY.get(f"{hostname}:{if_index}")
+    return JOBS.get(job_id) if job_id else None
+
+
+async def cancel_job(job: MonitorJob) -> None:
+    """Cancela la tarea y espera a que termine."""
+    if job.task is not None and not job.task.done():
+        job.task.cancel()
+        await asyncio.gather(job.task, return_exceptions=True)
+
+
+async def start_job(
+    hostname: str,
+    host: str,
+    if_index: int,
+    seconds: int,
+    on_sample: Callable[[Dict[str, Any]], None] | None = None,
+) -> MonitorJob:
+    """
+    Lanza un monitoreo en segundo plano. Si ya había uno corriendo para la
+    misma interfaz, se cancela primero.
+    """
+    previous = get_job_for(hostname, if_index)
+    if previous is not None:
+        await cancel_job(previous)
+
+    job = MonitorJob(hostname, host, if_index, seconds)
+    job.task = asyncio.create_task(_run_job(job, on_sample))
+
+    JOBS[job.id] = job
+    JOBS_BY_KEY[job.key] = job.id
+    _prune_finished()
+
+    for hook in JOB_STARTED_HOOKS:
+        hook(job)
+    return job
+
+
+def forget_job(job: MonitorJob) -> None:
+    JOBS.pop(job.id, None)
+    if JOBS_BY_KEY.get(job.key) == job.id:
+        del JOBS_BY_KEY[job.key]
+
+
+async def cancel_all_jobs() -> None:
+    """Se llama en el shutdown de la app."""
+    await asyncio.gather(*[cancel_job(job) for job in list(JOBS.values())])
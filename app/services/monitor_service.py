@@ -1,77 +1,189 @@
 # app/services/monitor_service.py
 import asyncio
-import subprocess
+import time
+from collections import deque
 from datetime import datetime
-from typing import Tuple, List, Dict, Any
+from typing import Callable, Tuple, List, Dict, Any
 
 from app.config import settings
+from app.services.snmp_engine import (
+    END_OF_MIB_VIEW,
+    SnmpExceptionValue,
+    SnmpTimeout,
+    SnmpTooBig,
+    get_snmp_engine,
+)
+from app.services.cache import snmp_cache
+from app.services.event_log import event_log
+from app.services.sampling_clock import SamplingClock
 
 # Memoria para último OK por router (para /estado)
 LAST_OK: Dict[str, datetime] = {}
 
 TRAP_STATE: Dict[tuple[str, int], Dict[str, Any]] = {}
 
-def snmp_get_raw(host: str, oid: str, community: str | None = None) -> int:
+# Últimos eventos linkUp/linkDown de todas las interfaces (más reciente al
+# final); GET /eventos/recientes los lee sin ir a la BD
+LINK_EVENTS: deque = deque(maxlen=settings.LINK_EVENTS_GLOBAL)
+
+
+async def _get_chunk(
+    engine,
+    host: str,
+    oids: List[str],
+    community: str | None,
+) -> List[Tuple[str, Any]]:
     """
-    Ejecuta snmpget del sistema y regresa el valor como int.
-    Lanza Exception si hay error.
+    GET de un grupo de OIDs en un solo PDU. Si el agente contesta tooBig,
+    parte el grupo a la mitad y reintenta cada parte.
     """
-    if community is None:
-        community = settings.SNMP_COMMUNITY
+    try:
+        return await engine.get(host, oids, community)
+    except SnmpTooBig:
+        if len(oids) == 1:
+            raise
+        mid = len(oids) // 2
+        first, second = await asyncio.gather(
+            _get_chunk(engine, host, oids[:mid], community),
+            _get_chunk(engine, host, oids[mid:], community),
+        )
+        return first + second
 
-    cmd = [
-        "snmpget",
-        "-v2c",
-        "-c",
-        community,
-        host,
-        oid,
-    ]
-
-    proc = subprocess.run(
-        cmd,
-        capture_output=True,
-        text=True,
-        timeout=3,
-    )
 
-    if proc.returncode != 0:
-        msg = proc.stderr.strip() or proc.stdout.strip()
-        raise RuntimeError(f"snmpget error: {msg}")
+async def snmp_get_many(
+    host: str,
+    oids: List[str],
+    community: str | None = None,
+) -> Dict[str, Any]:
+    """
+    Consulta varios OIDs en el menor número posible de PDUs GET.
+
+    Los OIDs se agrupan de SNMP_MAX_OIDS_PER_PDU en SNMP_MAX_OIDS_PER_PDU
+    (los grupos se mandan en paralelo) y si algún grupo es demasiado grande
+    para el agente se parte automáticamente.
+
+    Regresa {oid: valor} en el mismo orden de `oids`. Los valores pueden ser
+    int, bytes, str o un SnmpExceptionValue (noSuchObject, etc.).
+    Lanza RuntimeError si el agente no responde.
+    """
+    if not oids:
+        return {}
+
+    engine = await get_snmp_engine()
+    size = max(1, settings.SNMP_MAX_OIDS_PER_PDU)
+    chunks = [oids[i:i + size] for i in range(0, len(oids), size)]
 
-    # Ejemplo de salida:
-    # SNMPv2-MIB::sysUpTime.0 = Timeticks: (1234567) 2 days, 3:12:34.00
-    # IF-MIB::ifInOctets.1 = Counter32: 123456
-    line = proc.stdout.strip()
-    # Nos quedamos con la parte después de ":" y convertimos a int si podemos
     try:
-        after_equals = line.split("=", 1)[1].strip()
-        # after_equals ~ "Counter32: 123456" o "Timeticks: (12345) ..."
-        if ":" in after_equals:
-            _, val_part = after_equals.split(":", 1)
-            val_part = val_part.strip()
-        else:
-            val_part = after_equals
+        results = await asyncio.gather(
+            *[_get_chunk(engine, host, chunk, community) for chunk in chunks]
+        )
+    except SnmpTimeout:
+        raise RuntimeError(f"snmpget error: Timeout: No Response from {host}")
 
-        # Para Timeticks: (123456) ...
-        if val_part.startswith("("):
-            num_str = val_part.split(")", 1)[0].strip("() ")
-        else:
-            # Counter32: 123456
-            num_str = val_part.split(" ", 1)[0]
+    values: Dict[str, Any] = {}
+    for chunk, varbinds in zip(chunks, results):
+        if len(varbinds) != len(chunk):
+            raise RuntimeError(f"Respuesta SNMP incompleta de {host}")
+        # El agente responde en el mismo orden que se pidió
+        for oid, (_, value) in zip(chunk, varbinds):
+            values[oid] = value
+    return values
 
-        return int(num_str)
-    except Exception as e:
-        raise RuntimeError(f"No se pudo parsear la salida SNMP: {line} ({e})")
+
+def _oid_key(oid: str) -> Tuple[int, ...]:
+    return tuple(int(p) for p in oid.split("."))
 
 
-def snmp_get_if_octets_sync(
+async def snmp_bulk_walk(
+    host: str,
+    base_oids: List[str],
+    community: str | None = None,
+    max_repetitions: int | None = None,
+) -> Dict[str, List[Tuple[str, Any]]]:
+    """
+    Recorre una o varias columnas/subárboles con GETBULK.
+
+    Todas las columnas viajan en el mismo PDU: cada respuesta trae
+    `max_repetitions` filas de cada columna todavía activa, así que una
+    tabla de N filas se recorre en ~N / max_repetitions PDUs.
+
+    Regresa {base_oid: [(oid, valor), ...]}.
+    """
+    if max_repetitions is None:
+        max_repetitions = settings.SNMP_BULK_MAX_REPETITIONS
+    max_repetitions = max(1, max_repetitions)
+
+    engine = await get_snmp_engine()
+    results: Dict[str, List[Tuple[str, Any]]] = {base: [] for base in base_oids}
+    cursors: Dict[str, str] = {base: base for base in base_oids}
+
+    while cursors:
+        active = list(cursors)
+        try:
+            varbinds = await engine.get_bulk(
+                host,
+                [cursors[base] for base in active],
+                max_repetitions,
+                community=community,
+            )
+        except SnmpTooBig:
+            if max_repetitions == 1:
+                raise
+            max_repetitions = max(1, max_repetitions // 2)
+            continue
+        except SnmpTimeout:
+            raise RuntimeError(f"snmpbulkwalk error: Timeout: No Response from {host}")
+
+        if not varbinds:
+            break
+
+        finished = set()
+        for i, (oid, value) in enumerate(varbinds):
+            base = active[i % len(active)]
+            if base in finished:
+                continue
+            if (
+                value is END_OF_MIB_VIEW
+                or not oid.startswith(base + ".")
+                or _oid_key(oid) <= _oid_key(cursors[base])
+            ):
+                finished.add(base)
+                continue
+            results[base].append((oid, value))
+            cursors[base] = oid
+
+        for base in finished:
+            cursors.pop(base, None)
+
+    return results
+
+
+def _as_int(oid: str, value: Any) -> int:
+    # Counter32, Gauge32, TimeTicks e INTEGER ya vienen como int
+    if isinstance(value, SnmpExceptionValue):
+        raise RuntimeError(f"snmpget error: {oid} = {value}")
+    if not isinstance(value, int):
+        raise RuntimeError(f"No se pudo parsear la salida SNMP: {oid} = {value!r}")
+    return value
+
+
+async def snmp_get_raw(host: str, oid: str, community: str | None = None) -> int:
+    """
+    Hace un SNMP GET de un solo OID y regresa el valor como int.
+    Lanza Exception si hay error.
+    """
+    values = await snmp_get_many(host, [oid], community)
+    return _as_int(oid, values[oid])
+
+
+async def snmp_get_if_octets(
     host: str,
     if_index: int,
     community: str | None = None,
 ) -> Tuple[int, int]:
     """
-    Regresa (ifInOctets, ifOutOctets) de una interfaz usando snmpget.
+    Regresa (ifInOctets, ifOutOctets) de una interfaz, tomados en el mismo
+    PDU (mismo instante en el agente).
     OIDs IF-MIB:
       ifInOctets  = 1.3.6.1.2.1.2.2.1.10.X
       ifOutOctets = 1.3.6.1.2.1.2.2.1.16.X
@@ -79,12 +191,76 @@ def snmp_get_if_octets_sync(
     in_oid = f"1.3.6.1.2.1.2.2.1.10.{if_index}"
     out_oid = f"1.3.6.1.2.1.2.2.1.16.{if_index}"
 
-    in_octets = snmp_get_raw(host, in_oid, community)
-    out_octets = snmp_get_raw(host, out_oid, community)
-    return in_octets, out_octets
+    values = await snmp_get_many(host, [in_oid, out_oid], community)
+    return _as_int(in_oid, values[in_oid]), _as_int(out_oid, values[out_oid])
+
 
+ADMIN_STATUS_TEXT = {
+    1: "up",
+    2: "down",
+    3: "testing",
+}
+OPER_STATUS_TEXT = {
+    1: "up",
+    2: "down",
+    3: "testing",
+    4: "unknown",
+    5: "dormant",
+    6: "notPresent",
+    7: "lowerLayerDown",
+}
 
-def snmp_get_if_status_sync(
+
+def _status_dict(admin: int, oper: int) -> Dict[str, Any]:
+    return {
+        "admin_status": admin,
+        "oper_status": oper,
+        "admin_status_text": ADMIN_STATUS_TEXT.get(admin, f"unknown({admin})"),
+        "oper_status_text": OPER_STATUS_TEXT.get(oper, f"unknown({oper})"),
+    }
+
+
+async def snmp_get_if_statuses(
+    host: str,
+    if_indexes: List[int],
+    community: str | None = None,
+    skip_missing: bool = False,
+) -> Dict[int, Dict[str, Any]]:
+    """
+    adminStatus y operStatus de varias interfaces del mismo equipo en una
+    sola consulta (snmp_get_many la parte en PDUs si hace falta).
+
+    Con skip_missing=True, las interfaces que el agente ya no tiene
+    (noSuchInstance, etc.) se omiten del resultado en lugar de hacer
+    fallar toda la consulta.
+    """
+    if community is None:
+        community = settings.SNMP_COMMUNITY
+
+    oids: List[str] = []
+    for if_index in if_indexes:
+        oids.append(f"1.3.6.1.2.1.2.2.1.7.{if_index}")
+        oids.append(f"1.3.6.1.2.1.2.2.1.8.{if_index}")
+
+    values = await snmp_get_many(host, oids, community)
+
+    result: Dict[int, Dict[str, Any]] = {}
+    for if_index in if_indexes:
+        admin_oid = f"1.3.6.1.2.1.2.2.1.7.{if_index}"
+        oper_oid = f"1.3.6.1.2.1.2.2.1.8.{if_index}"
+        if skip_missing and (
+            isinstance(values[admin_oid], SnmpExceptionValue)
+            or isinstance(values[oper_oid], SnmpExceptionValue)
+        ):
+            continue
+        result[if_index] = _status_dict(
+            _as_int(admin_oid, values[admin_oid]),
+            _as_int(oper_oid, values[oper_oid]),
+        )
+    return result
+
+
+async def snmp_get_if_status(
     host: str,
     if_index: int,
     community: str | None = None,
@@ -94,98 +270,92 @@ def snmp_get_if_status_sync(
       ifAdminStatus: 1.3.6.1.2.1.2.2.1.7.X
       ifOperStatus : 1.3.6.1.2.1.2.2.1.8.X
     """
-    if community is None:
-        community = settings.SNMP_COMMUNITY
+    statuses = await snmp_get_if_statuses(host, [if_index], community)
+    return statuses[if_index]
 
-    admin_oid = f"1.3.6.1.2.1.2.2.1.7.{if_index}"
-    oper_oid = f"1.3.6.1.2.1.2.2.1.8.{if_index}"
-
-    admin = snmp_get_raw(host, admin_oid, community)
-    oper = snmp_get_raw(host, oper_oid, community)
-
-    admin_map = {
-        1: "up",
-        2: "down",
-        3: "testing",
-    }
-    oper_map = {
-        1: "up",
-        2: "down",
-        3: "testing",
-        4: "unknown",
-        5: "dormant",
-        6: "notPresent",
-        7: "lowerLayerDown",
-    }
 
+def _new_trap_info(active: bool, last_oper_status: int | None) -> Dict[str, Any]:
     return {
-        "admin_status": admin,
-        "oper_status": oper,
-        "admin_status_text": admin_map.get(admin, f"unknown({admin})"),
-        "oper_status_text": oper_map.get(oper, f"unknown({oper})"),
+        "active": active,
+        "last_oper_status": last_oper_status,
+        "admin_status": None,
+        "checked_at": None,
+        "last_change": None,
+        "events": deque(maxlen=settings.LINK_EVENTS_PER_IF),
     }
 
 
-async def get_interface_state(
+def record_oper_status(
     host: str,
     if_index: int,
-    community: str | None = None,
+    cur: int,
+    source: str = "poll",
+    admin_status: int | None = None,
 ) -> Dict[str, Any]:
     """
-    Regresa el estado actual de la interfaz y, si la captura de trampas
-    está activa, registra eventos linkUp/linkDown cuando cambia operStatus.
-    """
-    global TRAP_STATE
-    loop = asyncio.get_event_loop()
-
-    status = await loop.run_in_executor(
-        None, snmp_get_if_status_sync, host, if_index, community
-    )
+    Registra el operStatus observado de una interfaz en TRAP_STATE. Si la
+    captura está activa y el estado cambió, agrega el evento linkUp/linkDown
+    a la historia de la interfaz, a LINK_EVENTS y al log persistente
+    (GET /eventos).
 
+    `source` indica de dónde vino el dato: "poll" (consulta SNMP), "watcher"
+    (link_watcher) o "trap" (trampa recibida por trap_receiver).
+    """
     key = (host, if_index)
     now = datetime.utcnow()
 
     info = TRAP_STATE.get(key)
     if info is None:
-        info = {
-            "active": False,
-            "last_oper_status": status["oper_status"],
-            "last_change": None,
-            "events": [],
-        }
+        info = _new_trap_info(False, cur)
         TRAP_STATE[key] = info
-    else:
-        if info["active"]:
-            prev = info.get("last_oper_status")
-            cur = status["oper_status"]
-
-            if prev is not None and cur != prev:
-                event_name = None
-                # Interpretamos cambio como trap lógico
-                if prev != 1 and cur == 1:
-                    event_name = "linkUp"
-                elif prev == 1 and cur != 1:
-                    event_name = "linkDown"
-
-                if event_name:
-                    ev = {
-                        "timestamp": now.isoformat() + "Z",
-                        "event": event_name,
-                        "old_status": prev,
-                        "new_status": cur,
-                    }
-                    info["events"].append(ev)
-                    # Opcional: limitar historial
-                    if len(info["events"]) > 100:
-                        info["events"] = info["events"][-100:]
-
-                info["last_change"] = now
-
-            info["last_oper_status"] = cur
-        else:
-            # Si no está activa la captura, solo actualizamos último estado
-            info["last_oper_status"] = status["oper_status"]
+    elif info["active"]:
+        prev = info.get("last_oper_status")
+
+        if prev is not None and cur != prev:
+            event_name = None
+            # Interpretamos cambio como trap lógico
+            if prev != 1 and cur == 1:
+                event_name = "linkUp"
+            elif prev == 1 and cur != 1:
+                event_name = "linkDown"
+
+            if event_name:
+                ev = {
+                    "timestamp": now.isoformat() + "Z",
+                    "event": event_name,
+                    "old_status": prev,
+                    "new_status": cur,
+                    "source": source,
+                }
+                # Las deques con maxlen tiran solas el evento más viejo
+                info["events"].append(ev)
+                LINK_EVENTS.append(dict(ev, host=host, if_index=if_index))
+                event_log.enqueue(dict(ev, host=host, if_index=if_index, timestamp=now))
+
+            info["last_change"] = now
+
+    info["last_oper_status"] = cur
+    if admin_status is not None:
+        info["admin_status"] = admin_status
+    info["checked_at"] = time.monotonic()
+    return info
+
+
+def _is_fresh(info: Dict[str, Any]) -> bool:
+    """
+    True si el estado en memoria lo mantiene link_watcher (captura activa
+    y actualizado hace menos de dos intervalos del watcher).
+    """
+    return (
+        info["active"]
+        and info["admin_status"] is not None
+        and info["checked_at"] is not None
+        and time.monotonic() - info["checked_at"] < 2 * settings.LINK_WATCH_INTERVAL
+    )
+
 
+def _interface_state(host: str, if_index: int, info: Dict[str, Any]) -> Dict[str, Any]:
+    status = _status_dict(info["admin_status"], info["last_oper_status"])
     return {
         "host": host,
         "if_index": if_index,
@@ -197,10 +367,38 @@ async def get_interface_state(
         "last_change": info["last_change"].isoformat() + "Z"
         if info["last_change"]
         else None,
-        "events": info["events"],
+        "events": list(info["events"]),
     }
 
 
+async def get_interface_state(
+    host: str,
+    if_index: int,
+    community: str | None = None,
+) -> Dict[str, Any]:
+    """
+    Regresa el estado actual de la interfaz y, si la captura de trampas
+    está activa, registra eventos linkUp/linkDown cuando cambia operStatus.
+
+    Con la captura activa el estado lo mantiene link_watcher en segundo
+    plano, así que se responde desde memoria sin consultar al equipo.
+    """
+    info = TRAP_STATE.get((host, if_index))
+    if info is not None and _is_fresh(info):
+        return _interface_state(host, if_index, info)
+
+    # El estado leído del equipo se comparte entre llamadas cercanas
+    status = await snmp_cache.get_or_compute(
+        ("if_status", host, if_index, community),
+        lambda: snmp_get_if_status(host, if_index, community),
+    )
+
+    info = record_oper_status(
+        host, if_index, status["oper_status"], admin_status=status["admin_status"]
+    )
+    return _interface_state(host, if_index, info)
+
+
 async def start_trap_capture(
     host: str,
     if_index: int,
@@ -209,29 +407,22 @@ async def start_trap_capture(
     """
     Activa la captura lógica de trampas linkUp/linkDown en una interfaz.
     """
-    global TRAP_STATE
     key = (host, if_index)
 
-    loop = asyncio.get_event_loop()
-    status = await loop.run_in_executor(
-        None, snmp_get_if_status_sync, host, if_index, community
-    )
+    status = await snmp_get_if_status(host, if_index, community)
 
     info = TRAP_STATE.get(key)
     if info is None:
-        info = {
-            "active": True,
-            "last_oper_status": status["oper_status"],
-            "last_change": None,
-            "events": [],
-        }
+        info = _new_trap_info(True, status["oper_status"])
         TRAP_STATE[key] = info
     else:
         info["active"] = True
         info["last_oper_status"] = status["oper_status"]
+    info["admin_status"] = status["admin_status"]
+    info["checked_at"] = time.monotonic()
 
     # Regresamos el estado actual (ya con active=True)
-    return await get_interface_state(host, if_index, community)
+    return _interface_state(host, if_index, info)
 
 
 async def stop_trap_capture(
@@ -242,17 +433,11 @@ async def stop_trap_capture(
     """
     Detiene la captura lógica de trampas linkUp/linkDown en una interfaz.
     """
-    global TRAP_STATE
     key = (host, if_index)
 
     info = TRAP_STATE.get(key)
     if info is None:
-        info = {
-            "active": False,
-            "last_oper_status": None,
-            "last_change": None,
-            "events": [],
-        }
+        info = _new_trap_info(False, None)
         TRAP_STATE[key] = info
     else:
         info["active"] = False
@@ -260,16 +445,61 @@ async def stop_trap_capture(
     return await get_interface_state(host, if_index, community)
 
 
-def snmp_get_sysuptime_sync(
+async def snmp_get_sysuptime(
     host: str,
     community: str | None = None,
 ) -> int:
     """
-    Regresa sysUpTime en ticks (1/100 segundos) con snmpget.
+    Regresa sysUpTime en ticks (1/100 segundos).
     OID: 1.3.6.1.2.1.1.3.0
     """
     oid = "1.3.6.1.2.1.1.3.0"
-    return snmp_get_raw(host, oid, community)
+    return await snmp_get_raw(host, oid, community)
+
+
+async def snmp_get_if_octets_timed(
+    host: str,
+    if_index: int,
+    community: str | None = None,
+) -> Dict[str, Any]:
+    """
+    Lee sysUpTime, ifInOctets e ifOutOctets en el mismo PDU, para tener
+    la marca de tiempo del propio equipo junto con los contadores.
+
+    Regresa {"uptime": ticks, "monotonic": s, "in_octets", "out_octets"}.
+    """
+    uptime_oid = "1.3.6.1.2.1.1.3.0"
+    in_oid = f"1.3.6.1.2.1.2.2.1.10.{if_index}"
+    out_oid = f"1.3.6.1.2.1.2.2.1.16.{if_index}"
+
+    t0 = time.monotonic()
+    values = await snmp_get_many(host, [uptime_oid, in_oid, out_oid], community)
+    t1 = time.monotonic()
+
+    uptime = values[uptime_oid]
+    return {
+        "uptime": uptime if isinstance(uptime, int) else None,
+        "monotonic": (t0 + t1) / 2,
+        "in_octets": _as_int(in_oid, values[in_oid]),
+        "out_octets": _as_int(out_oid, values[out_oid]),
+    }
+
+
+def _elapsed_seconds(prev: Dict[str, Any], cur: Dict[str, Any]) -> float:
+    """
+    Tiempo real entre dos lecturas. Se prefiere el sysUpTime del equipo
+    (es cuando el agente leyó los contadores); si no hay, o no cuadra con
+    el reloj local (reinicio del equipo, agente con caché), se usa el
+    reloj monotónico.
+    """
+    local = cur["monotonic"] - prev["monotonic"]
+
+    if prev["uptime"] is not None and cur["uptime"] is not None:
+        device = ((cur["uptime"] - prev["uptime"]) % 2**32) / 100.0
+        if device > 0 and 0.5 * local <= device <= 2 * local:
+            return device
+
+    return local if local > 0 else 1.0
 
 
 async def monitor_interface_octets(
@@ -277,10 +507,26 @@ async def monitor_interface_octets(
     if_index: int,
     seconds: int,
     community: str | None = None,
+    on_sample: Callable[[Dict[str, Any]], None] | None = None,
+    interval: float = 1.0,
+    keep_samples: bool = True,
 ) -> Dict[str, Any]:
     """
-    Durante 'seconds' segundos consulta los octetos y calcula
-    el tráfico promedio in/out (bps) por intervalos de 1 segundo.
+    Durante 'seconds' segundos consulta los octetos y calcula el tráfico
+    in/out (bps) por intervalos de `interval` segundos.
+
+    Las consultas salen en instantes absolutos (SamplingClock), y cada
+    tasa se divide entre el tiempo realmente transcurrido entre lecturas,
+    no entre el intervalo nominal. Si el event loop se atrasa y se pierden
+    ticks, se reportan en "missed_ticks" en lugar de correr el calendario.
+
+    Si se da `on_sample`, se llama con cada muestra completa
+    ({"t", "timestamp", "interval", "in_octets", "out_octets", "in_bps",
+    "out_bps", "missed_ticks"}) en cuanto se obtiene. Con
+    keep_samples=False no se acumula la lista "samples" (regresa vacía);
+    los promedios se calculan igual, con sumas. `timestamp` es el instante medido de
+    la lectura (punto medio del GET en el reloj monotónico, pasado a hora
+    de pared) y `t` son los segundos medidos desde la lectura de referencia.
 
     Regresa:
       {
@@ -291,45 +537,69 @@ async def monitor_interface_octets(
         "avg_in_bps": ...,
         "avg_out_bps": ...,
         "last_in_octets": ...,
-        "last_out_octets": ...
+        "last_out_octets": ...,
+        "missed_ticks": ...
       }
     """
     if seconds < 1:
         seconds = 1
 
-    loop = asyncio.get_event_loop()
-
-    # Primer muestreo (en thread, porque subprocess es bloqueante)
-    prev_in, prev_out = await loop.run_in_executor(
-        None, snmp_get_if_octets_sync, host, if_index, community
-    )
+    # Primer muestreo (referencia del reloj)
+    clock = SamplingClock(interval)
+    # Para pasar instantes del reloj monotónico a hora de pared
+    wall_offset = time.time() - time.monotonic()
+    prev = await snmp_get_if_octets_timed(host, if_index, community)
+    start = prev["monotonic"]
+    total_ticks = max(1, int(seconds / interval))
 
     samples: List[Dict[str, float]] = []
+    count = 0
+    sum_in = sum_out = 0.0
 
-    for t in range(1, seconds + 1):
-        await asyncio.sleep(1)
+    while True:
+        tick = await clock.next_tick()
+        if tick > total_ticks:
+            break
 
-        cur_in, cur_out = await loop.run_in_executor(
-            None, snmp_get_if_octets_sync, host, if_index, community
-        )
+        cur = await snmp_get_if_octets_timed(host, if_index, community)
+        elapsed = _elapsed_seconds(prev, cur)
 
-        delta_in = cur_in - prev_in
-        delta_out = cur_out - prev_out
+        delta_in = cur["in_octets"] - prev["in_octets"]
+        delta_out = cur["out_octets"] - prev["out_octets"]
         if delta_in < 0:
             delta_in += 2**32
         if delta_out < 0:
             delta_out += 2**32
 
-        in_bps = (delta_in * 8) / 1.0
-        out_bps = (delta_out * 8) / 1.0
-
-        samples.append({"t": t, "in_bps": in_bps, "out_bps": out_bps})
-
-        prev_in, prev_out = cur_in, cur_out
-
-    if samples:
-        avg_in = sum(s["in_bps"] for s in samples) / len(samples)
-        avg_out = sum(s["out_bps"] for s in samples) / len(samples)
+        in_bps = (delta_in * 8) / elapsed
+        out_bps = (delta_out * 8) / elapsed
+        t = cur["monotonic"] - start
+
+        count += 1
+        sum_in += in_bps
+        sum_out += out_bps
+        if keep_samples:
+            samples.append({"t": t, "in_bps": in_bps, "out_bps": out_bps})
+
+        if on_sample is not None:
+            on_sample(
+                {
+                    "t": t,
+                    "timestamp": cur["monotonic"] + wall_offset,
+                    "interval": elapsed,
+                    "in_octets": cur["in_octets"],
+                    "out_octets": cur["out_octets"],
+                    "in_bps": in_bps,
+                    "out_bps": out_bps,
+                    "missed_ticks": clock.missed,
+                }
+            )
+
+        prev = cur
+
+    if count:
+        avg_in = sum_in / count
+        avg_out = sum_out / count
     else:
         avg_in = avg_out = 0.0
 
@@ -337,26 +607,60 @@ async def monitor_interface_octets(
         "samples": samples,
         "avg_in_bps": avg_in,
         "avg_out_bps": avg_out,
-        "last_in_octets": prev_in,
-        "last_out_octets": prev_out,
+        "last_in_octets": prev["in_octets"],
+        "last_out_octets": prev["out_octets"],
+        "missed_ticks": clock.missed,
     }
 
 
 async def get_router_state(host: str, community: str | None = None) -> Dict[str, Any]:
     """
-    Intenta hacer SNMP GET a sysUpTime con snmpget.
+    Estado UP/DOWN del router. El resultado (también el DOWN) se guarda
+    SNMP_CACHE_TTL segundos, y las llamadas concurrentes al mismo host
+    comparten una sola consulta.
+    """
+    return await snmp_cache.get_or_compute(
+        ("estado", host, community),
+        lambda: _probe_router_state(host, community),
+    )
+
+
+async def get_fleet_state(
+    routers: List[Tuple[str, str]],
+    community: str | None = None,
+    concurrency: int | None = None,
+) -> List[Dict[str, Any]]:
+    """
+    Estado de varios routers a la vez. `routers` = [(hostname, ip), ...].
+
+    Las consultas corren en paralelo (máximo `concurrency` en vuelo), así
+    que el tiempo total se acerca al del equipo más lento y no a la suma.
+    Regresa un dict por router (get_router_state + hostname e ip_admin),
+    en el mismo orden.
+    """
+    if concurrency is None:
+        concurrency = settings.FLEET_STATUS_CONCURRENCY
+    sem = asyncio.Semaphore(max(1, concurrency))
+
+    async def probe(hostname: str, ip: str) -> Dict[str, Any]:
+        async with sem:
+            data = await get_router_state(ip, community)
+        return {"hostname": hostname, "ip_admin": ip, **data}
+
+    return await asyncio.gather(*[probe(h, ip) for h, ip in routers])
+
+
+async def _probe_router_state(host: str, community: str | None = None) -> Dict[str, Any]:
+    """
+    Intenta hacer SNMP GET a sysUpTime.
     Si responde: estado = UP, guarda timestamp de último OK.
     Si falla: estado = DOWN, calcula tiempo sin respuesta si se conoce.
     """
     global LAST_OK
     now = datetime.utcnow()
 
-    loop = asyncio.get_event_loop()
-
     try:
-        uptime_ticks = await loop.run_in_executor(
-            None, snmp_get_sysuptime_sync, host, community
-        )
+        uptime_ticks = await snmp_get_sysuptime(host, community)
         LAST_OK[host] = now
         uptime_seconds = uptime_ticks / 100.0
 
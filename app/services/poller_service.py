@@ -0,0 +1,244 @@
+# app/services/poller_service.py
+"""
+Poller de fondo de toda la red.
+
+Cada router de la tabla `routers` tiene su propio ciclo que, cada
+POLL_INTERVAL segundos, recorre su ifTable con GETBULK y guarda las tasas
+calculadas en POLL_RESULTS. Los ciclos arrancan desfasados al azar dentro
+del primer intervalo para no disparar todas las consultas al mismo tiempo.
+
+Límites:
+  - POLL_MAX_CONCURRENCY: consultas SNMP en vuelo en todo el proceso.
+  - POLL_MAX_INFLIGHT_PER_HOST: consultas en vuelo por equipo. Si un equipo
+    sigue ocupado cuando toca el siguiente tick, ese tick se salta.
+"""
+import asyncio
+import random
+import time
+from datetime import datetime
+from typing import Any, Dict
+
+from sqlalchemy import select
+
+from app.config import settings
+from app.db import AsyncSessionLocal
+from app.models.router import Router
+from app.services.iftable_service import compute_if_rates, walk_if_table
+from app.services.sample_hub import sample_hub
+from app.services.sampling_clock import SamplingClock
+from app.services.timeseries_store import SOURCE_POLLER, sample_store
+
+# Último ciclo por router (key = hostname)
+# value = {
+#   "host": ip_admin,
+#   "timestamp": "....Z",
+#   "interval": float,
+#   "interfaces": [ {if_index, descr, ..., in_bps, out_bps}, ... ],
+#   "error": str | None,
+#   "polls": int,
+#   "errors": int,
+#   "skipped": int,
+#   "missed_ticks": int,
+# }
+POLL_RESULTS: Dict[str, Dict[str, Any]] = {}
+
+
+class FleetPoller:
+    def __init__(
+        self,
+        interval: float | None = None,
+        max_concurrency: int | None = None,
+        max_inflight_per_host: int | None = None,
+        refresh_interval: float | None = None,
+    ):
+        self.interval = interval or settings.POLL_INTERVAL
+        self.max_concurrency = max_concurrency or settings.POLL_MAX_CONCURRENCY
+        self.max_inflight_per_host = (
+            max_inflight_per_host or settings.POLL_MAX_INFLIGHT_PER_HOST
+        )
+        self.refresh_interval = refresh_interval or settings.POLL_ROUTERS_REFRESH
+
+        self._global_sem: asyncio.Semaphore | None = None
+        self._host_sems: Dict[str, asyncio.Semaphore] = {}
+        self._router_tasks: Dict[str, asyncio.Task] = {}
+        self._router_hosts: Dict[str, str] = {}
+        self._poll_tasks: set[asyncio.Task] = set()
+        self._main_task: asyncio.Task | None = None
+        self._last_walk: Dict[str, Dict[str, Any]] = {}
+
+    @property
+    def running(self) -> bool:
+        return self._main_task is not None and not self._main_task.done()
+
+    # --------- ciclo de vida ---------
+
+    async def start(self) -> None:
+        if self.running:
+            return
+        self._global_sem = asyncio.Semaphore(self.max_concurrency)
+        self._main_task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        tasks = list(self._router_tasks.values()) + list(self._poll_tasks)
+        if self._main_task is not None:
+            tasks.append(self._main_task)
+
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+        self._router_tasks.clear()
+        self._router_hosts.clear()
+        self._poll_tasks.clear()
+        self._main_task = None
+
+    # --------- límites por equipo ---------
+
+    def host_semaphore(self, host: str) -> asyncio.Semaphore:
+        sem = self._host_sems.get(host)
+        if sem is None:
+            sem = asyncio.Semaphore(self.max_inflight_per_host)
+            self._host_sems[host] = sem
+        return sem
+
+    # --------- lista de routers ---------
+
+    async def _load_routers(self) -> Dict[str, str]:
+        async with AsyncSessionLocal() as db:
+            result = await db.execute(select(Router.hostname, Router.ip_admin))
+            return {hostname: ip for hostname, ip in result.all()}
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                routers = await self._load_routers()
+            except Exception as e:
+                print(f"Poller: no se pudo leer la lista de routers: {e}")
+                routers = None
+
+            if routers is not None:
+                self._sync_router_tasks(routers)
+
+            await asyncio.sleep(self.refresh_interval)
+
+    def _sync_router_tasks(self, routers: Dict[str, str]) -> None:
+        # Routers eliminados (o que cambiaron de IP)
+        for hostname, task in list(self._router_tasks.items()):
+            if routers.get(hostname) != self._router_hosts.get(hostname):
+                task.cancel()
+                del self._router_tasks[hostname]
+                self._router_hosts.pop(hostname, None)
+                self._last_walk.pop(hostname, None)
+                POLL_RESULTS.pop(hostname, None)
+                if hostname not in routers:
+                    sample_store.drop_router(hostname)
+
+        # Routers nuevos
+        for hostname, ip in routers.items():
+            if hostname not in self._router_tasks:
+                self._router_hosts[hostname] = ip
+                self._router_tasks[hostname] = asyncio.create_task(
+                    self._router_loop(hostname, ip)
+                )
+
+    # --------- sondeo por router ---------
+
+    async def _router_loop(self, hostname: str, host: str) -> None:
+        # Arranque desfasado para repartir la carga en el intervalo; a partir
+        # de ahí los ticks caen en instantes fijos (sin deriva)
+        clock = SamplingClock(
+            self.interval,
+            start=time.monotonic() + random.uniform(0, self.interval) - self.interval,
+        )
+
+        while True:
+            await clock.next_tick()
+            entry = POLL_RESULTS.setdefault(hostname, _empty_result(host))
+            entry["missed_ticks"] = clock.missed
+
+            sem = self.host_semaphore(host)
+            if sem.locked():
+                # El equipo sigue ocupado: saltamos este tick
+                entry["skipped"] += 1
+            else:
+                task = asyncio.create_task(self._poll_once(hostname, host))
+                self._poll_tasks.add(task)
+                task.add_done_callback(self._poll_tasks.discard)
+
+    async def _poll_once(self, hostname: str, host: str) -> None:
+        entry = POLL_RESULTS.setdefault(hostname, _empty_result(host))
+
+        async with self.host_semaphore(host):
+            async with self._global_sem:
+                try:
+                    walk = await walk_if_table(host)
+                except Exception as e:
+                    entry["errors"] += 1
+                    entry["error"] = str(e)
+                    return
+
+        entry["polls"] += 1
+        entry["error"] = None
+        entry["timestamp"] = datetime.utcnow().isoformat() + "Z"
+
+        prev = self._last_walk.get(hostname)
+        self._last_walk[hostname] = walk
+        if prev is not None:
+            entry["interval"] = walk["timestamp"] - prev["timestamp"]
+            entry["interfaces"] = compute_if_rates(prev, walk)
+            _store_rates(hostname, prev, walk, entry["interfaces"])
+
+
+def _store_rates(
+    hostname: str,
+    prev: Dict[str, Any],
+    walk: Dict[str, Any],
+    rates: list,
+) -> None:
+    """
+    Agrega las tasas del ciclo al buffer de cada interfaz y las publica a
+    los clientes en vivo.
+    """
+    for rate in rates:
+        if rate["in_bps"] is None or rate["out_bps"] is None:
+            continue
+        series = sample_store.get_or_create(hostname, rate["if_index"], SOURCE_POLLER)
+        if series.origin is None:
+            series.origin = prev["wall_time"]
+        series.append(
+            walk["wall_time"],
+            rate["in_octets"],
+            rate["out_octets"],
+            rate["in_bps"],
+            rate["out_bps"],
+        )
+        sample_hub.publish(
+            hostname,
+            rate["if_index"],
+            {
+                "t": walk["wall_time"] - series.origin,
+                "timestamp": walk["wall_time"],
+                "in_octets": rate["in_octets"],
+                "out_octets": rate["out_octets"],
+                "in_bps": rate["in_bps"],
+                "out_bps": rate["out_bps"],
+            },
+            SOURCE_POLLER,
+        )
+
+
+def _empty_result(host: str) -> Dict[str, Any]:
+    return {
+        "host": host,
+        "timestamp": None,
+        "interval": None,
+        "interfaces": [],
+        "error": None,
+        "polls": 0,
+        "errors": 0,
+        "skipped": 0,
+        "missed_ticks": 0,
+    }
+
+
+fleet_poller = FleetPoller()
@@ -0,0 +1,212 @@
+# app/services/sample_hub.py
+"""
+Distribución en vivo de muestras de tráfico.
+
+Cada muestra que se guarda en sample_store (monitoreos por POST, poller de
+fondo o el ciclo propio del hub) se publica aquí a los suscriptores de esa
+interfaz, con su fuente ("monitor" o "poller"; `t` es relativo al origen de
+la serie de esa fuente). Mientras la interfaz tiene muestreo de 1 s (ciclo
+del hub o monitoreo por POST) las muestras del poller no se publican, para
+que el stream tenga un solo ritmo. Cada suscriptor tiene una cola acotada:
+si un cliente lento se atrasa, se descarta la muestra más vieja en lugar de
+acumular memoria.
+
+Mientras una interfaz tenga suscriptores, el hub mantiene UN solo ciclo de
+muestreo para ella, compartido por todos los que la están viendo. Si se
+lanza un monitoreo por POST para esa interfaz, el ciclo del hub se detiene
+(sus muestras ya se publican) y se reanuda cuando el trabajo termina.
+"""
+import asyncio
+from typing import Any, Callable, Dict, Set, Tuple
+
+from app.config import settings
+from app.services.monitor_jobs import JOB_STARTED_HOOKS, MonitorJob, get_job_for
+from app.services.monitor_service import monitor_interface_octets
+from app.services.timeseries_store import SOURCE_MONITOR, SOURCE_POLLER, sample_store
+
+# Duración de cada llamada a monitor_interface_octets del ciclo compartido
+UPSTREAM_CHUNK_SECONDS = 3600
+
+
+class TooManySubscribers(Exception):
+    pass
+
+
+class Subscription:
+    def __init__(self, hostname: str, if_index: int, maxsize: int):
+        self.hostname = hostname
+        self.if_index = if_index
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize)
+        self.dropped = 0
+
+    @property
+    def key(self) -> Tuple[str, int]:
+        return (self.hostname, self.if_index)
+
+    def push(self, item: Dict[str, Any]) -> None:
+        if self.queue.full():
+            # Cliente lento: tiramos la muestra más vieja
+            self.queue.get_nowait()
+            self.dropped += 1
+        self.queue.put_nowait(item)
+
+
+class SampleHub:
+    def __init__(self):
+        self._subscribers: Dict[Tuple[str, int], Set[Subscription]] = {}
+        self._upstream: Dict[Tuple[str, int], asyncio.Task] = {}
+        # Muestreo en curso del ciclo compartido (se cancela si llega un POST)
+        self._sampling: Dict[Tuple[str, int], asyncio.Task] = {}
+        JOB_STARTED_HOOKS.append(self._job_started)
+
+    # --------- publicación ---------
+
+    def _monitor_active(self, hostname: str, if_index: int) -> bool:
+        """¿Hay muestreo de 1 s (ciclo del hub o POST) en esa interfaz?"""
+        if (hostname, if_index) in self._sampling:
+            return True
+        job = get_job_for(hostname, if_index)
+        return job is not None and job.running
+
+    def publish(
+        self,
+        hostname: str,
+        if_index: int,
+        sample: Dict[str, Any],
+        source: str = SOURCE_MONITOR,
+    ) -> None:
+        subs = self._subscribers.get((hostname, if_index))
+        if not subs:
+            return
+        if source == SOURCE_POLLER and self._monitor_active(hostname, if_index):
+            return
+
+        item = {
+            "hostname": hostname,
+            "if_index": if_index,
+            "source": source,
+            "t": sample["t"],
+            "timestamp": sample["timestamp"],
+            "in_octets": sample["in_octets"],
+            "out_octets": sample["out_octets"],
+            "in_bps": sample["in_bps"],
+            "out_bps": sample["out_bps"],
+        }
+        for sub in subs:
+            sub.push(item)
+
+    def sample_writer(
+        self, hostname: str, if_index: int
+    ) -> Callable[[Dict[str, Any]], None]:
+        """
+        Callback `on_sample` para monitor_interface_octets: guarda la muestra
+        en la serie "monitor" de sample_store y la publica a los suscriptores.
+        """
+
+        def on_sample(sample: Dict[str, Any]) -> None:
+            series = sample_store.get_or_create(hostname, if_index, SOURCE_MONITOR)
+            if series.origin is None:
+                series.origin = sample["timestamp"] - sample["t"]
+            series.append(
+                sample["timestamp"],
+                sample["in_octets"],
+                sample["out_octets"],
+                sample["in_bps"],
+                sample["out_bps"],
+            )
+            self.publish(
+                hostname,
+                if_index,
+                dict(sample, t=sample["timestamp"] - series.origin),
+                SOURCE_MONITOR,
+            )
+
+        return on_sample
+
+    # --------- suscripciones ---------
+
+    def subscribe(self, hostname: str, host: str, if_index: int) -> Subscription:
+        key = (hostname, if_index)
+        subs = self._subscribers.setdefault(key, set())
+        if len(subs) >= settings.STREAM_MAX_SUBSCRIBERS_PER_IF:
+            raise TooManySubscribers(
+                f"Máximo {settings.STREAM_MAX_SUBSCRIBERS_PER_IF} suscriptores por interfaz"
+            )
+
+        sub = Subscription(hostname, if_index, settings.STREAM_QUEUE_SIZE)
+        subs.add(sub)
+
+        task = self._upstream.get(key)
+        if task is None or task.done():
+            self._upstream[key] = asyncio.create_task(
+                self._upstream_loop(hostname, host, if_index)
+            )
+        return sub
+
+    def unsubscribe(self, sub: Subscription) -> None:
+        subs = self._subscribers.get(sub.key)
+        if subs is None:
+            return
+
+        subs.discard(sub)
+        if not subs:
+            del self._subscribers[sub.key]
+            task = self._upstream.pop(sub.key, None)
+            if task is not None:
+                task.cancel()
+
+    # --------- ciclo compartido ---------
+
+    def _job_started(self, job: MonitorJob) -> None:
+        sampling = self._sampling.get((job.hostname, job.if_index))
+        if sampling is not None:
+            sampling.cancel()
+
+    async def _upstream_loop(self, hostname: str, host: str, if_index: int) -> None:
+        key = (hostname, if_index)
+        writer = self.sample_writer(hostname, if_index)
+
+        while self._subscribers.get(key):
+            # Si hay un monitoreo por POST corriendo, sus muestras ya se
+            # publican: esperamos a que termine en lugar de duplicar consultas
+            job = get_job_for(hostname, if_index)
+            if job is not None and job.running:
+                await asyncio.wait({job.task})
+                continue
+
+            sampling = asyncio.create_task(
+                monitor_interface_octets(
+                    host=host,
+                    if_index=if_index,
+                    seconds=UPSTREAM_CHUNK_SECONDS,
+                    on_sample=writer,
+                    keep_samples=False,
+                )
+            )
+            self._sampling[key] = sampling
+            try:
+                # asyncio.wait no propaga la cancelación del muestreo
+                # (_job_started); solo la de este ciclo
+                await asyncio.wait({sampling})
+            finally:
+                sampling.cancel()
+                if self._sampling.get(key) is sampling:
+                    del self._sampling[key]
+
+            if sampling.cancelled():
+                continue
+            e = sampling.exception()
+            if e is not None:
+                for sub in list(self._subscribers.get(key, ())):
+                    sub.push({"hostname": hostname, "if_index": if_index, "error": str(e)})
+                await asyncio.sleep(settings.STREAM_RETRY_SECONDS)
+
+    async def close(self) -> None:
+        tasks = list(self._upstream.values())
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._upstream.clear()
+
+
+sample_hub = SampleHub()
@@ -0,0 +1,54 @@
+# app/services/sampling_clock.py
+import asyncio
+import math
+import time
+
+
+class SamplingClock:
+    """
+    Reloj de muestreo sin deriva.
+
+    Los ticks caen en instantes absolutos `start + k * interval` del reloj
+    monotónico, así que el tiempo que tarda cada consulta no se va sumando
+    al periodo. Si el event loop se atrasa más de un intervalo completo, los
+    ticks que ya pasaron no se recuperan: se cuentan en `missed` y el reloj
+    salta al tick más reciente.
+
+    Uso:
+        clock = SamplingClock(1.0)
+        while True:
+            tick = await clock.next_tick()
+            ...
+    """
+
+    def __init__(self, interval: float, start: float | None = None):
+        if interval <= 0:
+            raise ValueError("interval debe ser > 0")
+        self.interval = interval
+        self.start = time.monotonic() if start is None else start
+        self.tick = 0
+        self.missed = 0
+
+    def deadline(self, tick: int) -> float:
+        return self.start + tick * self.interval
+
+    async def next_tick(self) -> int:
+        """
+        Espera al siguiente tick y regresa su número (1, 2, ...).
+        Si hubo ticks perdidos, el número salta y `missed` aumenta.
+        """
+        target = self.tick + 1
+        now = time.monotonic()
+
+        # Último tick cuyo instante ya pasó
+        due = math.floor((now - self.start) / self.interval)
+        if due > target:
+            self.missed += due - target
+            target = due
+
+        delay = self.deadline(target) - now
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+        self.tick = target
+        return target
@@ -0,0 +1,540 @@
+# app/services/snmp_engine.py
+"""
+Motor SNMP v2c asíncrono que corre dentro del event loop.
+
+En lugar de lanzar un proceso `snmpget` por cada OID, todas las consultas
+salen por un único socket UDP y las respuestas se emparejan con su
+petición usando el request-id del PDU. Así se pueden tener cientos de
+peticiones en vuelo sin ocupar hilos del threadpool.
+
+Incluye un codificador/decodificador BER mínimo (solo lo que usa SNMP v2c),
+para no depender de la API de alto nivel de pysnmp, que cambia mucho entre
+versiones.
+"""
+import asyncio
+import ipaddress
+import secrets
+import socket
+import weakref
+from typing import Any, Dict, List, Tuple
+
+from app.config import settings
+
+
+# ----------------- TIPOS / TAGS BER -----------------
+
+TAG_INTEGER = 0x02
+TAG_OCTET_STRING = 0x04
+TAG_NULL = 0x05
+TAG_OID = 0x06
+TAG_SEQUENCE = 0x30
+TAG_IPADDRESS = 0x40
+TAG_COUNTER32 = 0x41
+TAG_GAUGE32 = 0x42
+TAG_TIMETICKS = 0x43
+TAG_OPAQUE = 0x44
+TAG_COUNTER64 = 0x46
+TAG_NO_SUCH_OBJECT = 0x80
+TAG_NO_SUCH_INSTANCE = 0x81
+TAG_END_OF_MIB_VIEW = 0x82
+
+PDU_GET = 0xA0
+PDU_GETNEXT = 0xA1
+PDU_RESPONSE = 0xA2
+PDU_GETBULK = 0xA5
+PDU_TRAP_V2 = 0xA7
+
+SNMP_VERSION_2C = 1
+
+ERROR_STATUS_NAMES = {
+    0: "noError",
+    1: "tooBig",
+    2: "noSuchName",
+    3: "badValue",
+    4: "readOnly",
+    5: "genErr",
+    6: "noAccess",
+    7: "wrongType",
+    8: "wrongLength",
+    9: "wrongEncoding",
+    10: "wrongValue",
+    11: "noCreation",
+    12: "inconsistentValue",
+    13: "resourceUnavailable",
+    14: "commitFailed",
+    15: "undoFailed",
+    16: "authorizationError",
+    17: "notWritable",
+    18: "inconsistentName",
+}
+
+
+class SnmpError(RuntimeError):
+    """Error genérico del motor SNMP."""
+
+
+class SnmpTimeout(SnmpError):
+    """El agente no respondió dentro del tiempo (y reintentos) configurado."""
+
+
+class SnmpTooBig(SnmpError):
+    """La respuesta no cabe en un PDU (error-status tooBig)."""
+
+
+class SnmpExceptionValue:
+    """
+    Valores especiales de SNMP v2c (noSuchObject, noSuchInstance,
+    endOfMibView). Se regresan en lugar del valor del varbind.
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+
+    def __repr__(self) -> str:
+        return self.name
+
+    __str__ = __repr__
+
+
+NO_SUCH_OBJECT = SnmpExceptionValue("noSuchObject")
+NO_SUCH_INSTANCE = SnmpExceptionValue("noSuchInstance")
+END_OF_MIB_VIEW = SnmpExceptionValue("endOfMibView")
+
+_EXCEPTION_VALUES = {
+    TAG_NO_SUCH_OBJECT: NO_SUCH_OBJECT,
+    TAG_NO_SUCH_INSTANCE: NO_SUCH_INSTANCE,
+    TAG_END_OF_MIB_VIEW: END_OF_MIB_VIEW,
+}
+
+
+# ----------------- CODIFICACIÓN BER -----------------
+
+
+def _encode_length(length: int) -> bytes:
+    if length < 0x80:
+        return bytes([length])
+    raw = length.to_bytes((length.bit_length() + 7) // 8, "big")
+    return bytes([0x80 | len(raw)]) + raw
+
+
+def _encode_tlv(tag: int, payload: bytes) -> bytes:
+    return bytes([tag]) + _encode_length(len(payload)) + payload
+
+
+def _encode_integer(value: int) -> bytes:
+    length = max(1, (value.bit_length() + 8) // 8)
+    return _encode_tlv(TAG_INTEGER, value.to_bytes(length, "big", signed=True))
+
+
+def _encode_oid(oid: str) -> bytes:
+    parts = [int(p) for p in oid.strip(".").split(".")]
+    if len(parts) < 2:
+        raise ValueError(f"OID inválido: {oid}")
+
+    out = bytearray([parts[0] * 40 + parts[1]])
+    for arc in parts[2:]:
+        chunk = [arc & 0x7F]
+        arc >>= 7
+        while arc:
+            chunk.append(0x80 | (arc & 0x7F))
+            arc >>= 7
+        out.extend(reversed(chunk))
+    return _encode_tlv(TAG_OID, bytes(out))
+
+
+def encode_request(
+    pdu_tag: int,
+    request_id: int,
+    community: str,
+    oids: List[str],
+    non_repeaters: int = 0,
+    max_repetitions: int = 0,
+) -> bytes:
+    """
+    Arma un mensaje SNMP v2c completo (GET, GETNEXT o GETBULK) con
+    varbinds NULL para cada OID.
+    """
+    varbinds = b"".join(
+        _encode_tlv(TAG_SEQUENCE, _encode_oid(oid) + _encode_tlv(TAG_NULL, b""))
+        for oid in oids
+    )
+
+    if pdu_tag == PDU_GETBULK:
+        field2, field3 = non_repeaters, max_repetitions
+    else:
+        field2, field3 = 0, 0
+
+    pdu = _encode_tlv(
+        pdu_tag,
+        _encode_integer(request_id)
+        + _encode_integer(field2)
+        + _encode_integer(field3)
+        + _encode_tlv(TAG_SEQUENCE, varbinds),
+    )
+
+    return _encode_tlv(
+        TAG_SEQUENCE,
+        _encode_integer(SNMP_VERSION_2C)
+        + _encode_tlv(TAG_OCTET_STRING, community.encode())
+        + pdu,
+    )
+
+
+# ----------------- DECODIFICACIÓN BER -----------------
+
+
+def _decode_tlv(data: bytes, pos: int) -> Tuple[int, bytes, int]:
+    """Regresa (tag, contenido, posición siguiente)."""
+    if pos + 2 > len(data):
+        raise SnmpError("Mensaje SNMP truncado")
+
+    tag = data[pos]
+    length = data[pos + 1]
+    pos += 2
+
+    if length & 0x80:
+        n = length & 0x7F
+        length = int.from_bytes(data[pos:pos + n], "big")
+        pos += n
+
+    end = pos + length
+    if end > len(data):
+        raise SnmpError("Mensaje SNMP truncado")
+    return tag, data[pos:end], end
+
+
+def _decode_integer(raw: bytes) -> int:
+    return int.from_bytes(raw, "big", signed=True) if raw else 0
+
+
+def _decode_oid(raw: bytes) -> str:
+    if not raw:
+        return ""
+
+    first = raw[0]
+    if first < 80:
+        parts = [first // 40, first % 40]
+    else:
+        parts = [2, first - 80]
+
+    arc = 0
+    for b in raw[1:]:
+        arc = (arc << 7) | (b & 0x7F)
+        if not b & 0x80:
+            parts.append(arc)
+            arc = 0
+    return ".".join(str(p) for p in parts)
+
+
+def _decode_value(tag: int, raw: bytes) -> Any:
+    if tag == TAG_INTEGER:
+        return _decode_integer(raw)
+    if tag in (TAG_COUNTER32, TAG_GAUGE32, TAG_TIMETICKS, TAG_COUNTER64):
+        return int.from_bytes(raw, "big", signed=False)
+    if tag in (TAG_OCTET_STRING, TAG_OPAQUE):
+        return bytes(raw)
+    if tag == TAG_OID:
+        return _decode_oid(raw)
+    if tag == TAG_IPADDRESS:
+        return ".".join(str(b) for b in raw)
+    if tag == TAG_NULL:
+        return None
+    if tag in _EXCEPTION_VALUES:
+        return _EXCEPTION_VALUES[tag]
+    return bytes(raw)
+
+
+def decode_message(data: bytes) -> Dict[str, Any]:
+    """
+    Decodifica un mensaje SNMP v2c (respuesta o trap) y regresa:
+      {
+        "version": int,
+        "community": str,
+        "pdu_tag": int,
+        "request_id": int,
+        "error_status": int,
+        "error_index": int,
+        "varbinds": [(oid, valor), ...]
+      }
+    """
+    tag, body, _ = _decode_tlv(data, 0)
+    if tag != TAG_SEQUENCE:
+        raise SnmpError("El mensaje no es una SEQUENCE")
+
+    _, version_raw, pos = _decode_tlv(body, 0)
+    _, community_raw, pos = _decode_tlv(body, pos)
+    pdu_tag, pdu, _ = _decode_tlv(body, pos)
+
+    _, req_raw, p = _decode_tlv(pdu, 0)
+    _, err_raw, p = _decode_tlv(pdu, p)
+    _, idx_raw, p = _decode_tlv(pdu, p)
+    _, vbl, _ = _decode_tlv(pdu, p)
+
+    varbinds: List[Tuple[str, Any]] = []
+    p = 0
+    while p < len(vbl):
+        _, vb, p = _decode_tlv(vbl, p)
+        _, oid_raw, q = _decode_tlv(vb, 0)
+        vtag, vraw, _ = _decode_tlv(vb, q)
+        varbinds.append((_decode_oid(oid_raw), _decode_value(vtag, vraw)))
+
+    return {
+        "version": _decode_integer(version_raw),
+        "community": community_raw.decode(errors="replace"),
+        "pdu_tag": pdu_tag,
+        "request_id": _decode_integer(req_raw),
+        "error_status": _decode_integer(err_raw),
+        "error_index": _decode_integer(idx_raw),
+        "varbinds": varbinds,
+    }
+
+
+# ----------------- MOTOR ASÍNCRONO -----------------
+
+
+class SnmpEngine(asyncio.DatagramProtocol):
+    """
+    Cliente SNMP v2c multiplexado sobre un único socket UDP.
+
+    Cada petición se registra en `_pending` con su request-id (aleatorio),
+    la dirección a la que se mandó y la comunidad; un datagrama solo
+    resuelve el future si es un Response que viene de esa dirección con
+    esa comunidad. Lo demás se descarta.
+    Los reintentos reenvían el mismo mensaje (mismo request-id), así que una
+    respuesta tardía al primer envío también se acepta.
+    """
+
+    def __init__(self):
+        self._transport: asyncio.DatagramTransport | None = None
+        # request-id -> (future, dirección destino, comunidad)
+        self._pending: Dict[int, Tuple[asyncio.Future, Tuple[str, int], str]] = {}
+        self._addr_cache: Dict[Tuple[str, int], Tuple[str, int]] = {}
+
+    # --- ciclo de vida ---
+
+    async def start(self) -> None:
+        loop = asyncio.get_running_loop()
+        await loop.create_datagram_endpoint(
+            lambda: self,
+            local_addr=("0.0.0.0", 0),
+            family=socket.AF_INET,
+        )
+
+    def close(self) -> None:
+        if self._transport is not None:
+            self._transport.close()
+            self._transport = None
+
+    @property
+    def is_open(self) -> bool:
+        return self._transport is not None and not self._transport.is_closing()
+
+    # --- callbacks de asyncio ---
+
+    def connection_made(self, transport) -> None:
+        self._transport = transport
+
+    def datagram_received(self, data: bytes, addr) -> None:
+        try:
+            msg = decode_message(data)
+        except Exception:
+            # Datagrama basura: lo ignoramos
+            return
+
+        pending = self._pending.get(msg["request_id"])
+        if pending is None:
+            return
+        fut, expected_addr, community = pending
+        if (
+            msg["pdu_tag"] != PDU_RESPONSE
+            or tuple(addr[:2]) != expected_addr
+            or msg["community"] != community
+        ):
+            return
+        if not fut.done():
+            fut.set_result(msg)
+
+    def error_received(self, exc: Exception) -> None:
+        # ICMP port unreachable, etc. Las peticiones afectadas
+        # terminan por timeout.
+        pass
+
+    def connection_lost(self, exc: Exception | None) -> None:
+        for fut, _, _ in self._pending.values():
+            if not fut.done():
+                fut.set_exception(SnmpError("Socket SNMP cerrado"))
+        self._pending.clear()
+        self._transport = None
+
+    # --- peticiones ---
+
+    def _new_request_id(self) -> int:
+        # Aleatorio en cada petición para que no se pueda adivinar
+        while True:
+            request_id = secrets.randbelow(2**31 - 1) + 1
+            if request_id not in self._pending:
+                return request_id
+
+    async def _resolve(self, host: str, port: int) -> Tuple[str, int]:
+        key = (host, port)
+        addr = self._addr_cache.get(key)
+        if addr is not None:
+            return addr
+
+        try:
+            ipaddress.IPv4Address(host)
+            addr = (host, port)
+        except ValueError:
+            loop = asyncio.get_running_loop()
+            infos = await loop.getaddrinfo(
+                host, port, family=socket.AF_INET, type=socket.SOCK_DGRAM
+            )
+            if not infos:
+                raise SnmpError(f"No se pudo resolver {host}")
+            addr = infos[0][4][:2]
+
+        self._addr_cache[key] = addr
+        return addr
+
+    async def request(
+        self,
+        host: str,
+        pdu_tag: int,
+        oids: List[str],
+        community: str | None = None,
+        port: int | None = None,
+        non_repeaters: int = 0,
+        max_repetitions: int = 0,
+        timeout: float | None = None,
+        retries: int | None = None,
+    ) -> Dict[str, Any]:
+        """
+        Envía un PDU y espera la respuesta. Regresa el mensaje decodificado
+        (ver `decode_message`). Lanza SnmpTimeout si no hay respuesta.
+        """
+        if not self.is_open:
+            raise SnmpError("El motor SNMP no está iniciado")
+
+        if community is None:
+            community = settings.SNMP_COMMUNITY
+        if port is None:
+            port = settings.SNMP_PORT
+        if timeout is None:
+            timeout = settings.SNMP_TIMEOUT
+        if retries is None:
+            retries = settings.SNMP_RETRIES
+
+        addr = await self._resolve(host, port)
+
+        loop = asyncio.get_running_loop()
+        request_id = self._new_request_id()
+        payload = encode_request(
+            pdu_tag, request_id, community, oids, non_repeaters, max_repetitions
+        )
+
+        fut: asyncio.Future = loop.create_future()
+        self._pending[request_id] = (fut, addr, community)
+        try:
+            for _ in range(retries + 1):
+                self._transport.sendto(payload, addr)
+                try:
+                    return await asyncio.wait_for(asyncio.shield(fut), timeout)
+                except asyncio.TimeoutError:
+                    continue
+            raise SnmpTimeout(f"Timeout SNMP con {host}:{port}")
+        finally:
+            self._pending.pop(request_id, None)
+            if not fut.done():
+                fut.cancel()
+
+    async def get(
+        self,
+        host: str,
+        oids: List[str],
+        community: str | None = None,
+        port: int | None = None,
+    ) -> List[Tuple[str, Any]]:
+        """
+        SNMP GET. Regresa la lista de varbinds [(oid, valor), ...].
+        Lanza SnmpError si el agente regresa error-status distinto de 0.
+        """
+        msg = await self.request(host, PDU_GET, oids, community, port)
+        _raise_for_error_status(host, msg)
+        return msg["varbinds"]
+
+    async def get_bulk(
+        self,
+        host: str,
+        oids: List[str],
+        max_repetitions: int,
+        non_repeaters: int = 0,
+        community: str | None = None,
+        port: int | None = None,
+    ) -> List[Tuple[str, Any]]:
+        """
+        SNMP GETBULK. Los varbinds vienen en orden de filas: primero los
+        `non_repeaters`, luego una repetición por cada OID repetido, etc.
+        """
+        msg = await self.request(
+            host,
+            PDU_GETBULK,
+            oids,
+            community,
+            port,
+            non_repeaters=non_repeaters,
+            max_repetitions=max_repetitions,
+        )
+        _raise_for_error_status(host, msg)
+        return msg["varbinds"]
+
+
+def _raise_for_error_status(host: str, msg: Dict[str, Any]) -> None:
+    status = msg["error_status"]
+    if status:
+        name = ERROR_STATUS_NAMES.get(status, str(status))
+        exc_class = SnmpTooBig if status == 1 else SnmpError
+        raise exc_class(
+            f"snmp error en {host}: {name} (index {msg['error_index']})"
+        )
+
+
+# ----------------- INSTANCIA COMPARTIDA -----------------
+
+_ENGINE: SnmpEngine | None = None
+_ENGINE_LOOP: asyncio.AbstractEventLoop | None = None
+_ENGINE_LOCKS: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, asyncio.Lock]" = (
+    weakref.WeakKeyDictionary()
+)
+
+
+async def get_snmp_engine() -> SnmpEngine:
+    """
+    Regresa el motor SNMP del event loop actual, creándolo (y abriendo el
+    socket UDP) la primera vez que se usa.
+    """
+    global _ENGINE, _ENGINE_LOOP
+    loop = asyncio.get_running_loop()
+
+    if _ENGINE is not None and _ENGINE_LOOP is loop and _ENGINE.is_open:
+        return _ENGINE
+
+    lock = _ENGINE_LOCKS.get(loop)
+    if lock is None:
+        lock = _ENGINE_LOCKS[loop] = asyncio.Lock()
+
+    async with lock:
+        if _ENGINE is None or _ENGINE_LOOP is not loop or not _ENGINE.is_open:
+            engine = SnmpEngine()
+            await engine.start()
+            _ENGINE = engine
+            _ENGINE_LOOP = loop
+    return _ENGINE
+
+
+def close_snmp_engine() -> None:
+    """Cierra el socket del motor compartido (se llama en el shutdown)."""
+    global _ENGINE, _ENGINE_LOOP
+    if _ENGINE is not None:
+        _ENGINE.close()
+        _ENGINE = None
+        _ENGINE_LOOP = None
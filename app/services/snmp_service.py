@@ -1,65 +1,67 @@
 # app/services/snmp_service.py
-import subprocess
-from fastapi.concurrency import run_in_threadpool
 from app.config import settings
+from app.services.cache import snmp_cache
+from app.services.monitor_service import snmp_get_many
+from app.services.snmp_engine import SnmpExceptionValue
 
 
-def _snmp_get_sysinfo_sync(host: str) -> dict:
+def _format_timeticks(ticks: int) -> str:
     """
-    Obtiene info básica por SNMP usando el comando del sistema `snmpget`:
-    - sysName (1.3.6.1.2.1.1.5.0)
-    - sysUpTime (1.3.6.1.2.1.1.3.0)
+    Formatea TimeTicks igual que net-snmp:
+    (1234567) 3:25:45.67  /  (12345678) 1 day, 10:17:36.78
+    """
+    cs = ticks % 100
+    total = ticks // 100
+    days, rem = divmod(total, 86400)
+    hours, rem = divmod(rem, 3600)
+    minutes, seconds = divmod(rem, 60)
+
+    clock = f"{hours}:{minutes:02d}:{seconds:02d}.{cs:02d}"
+    if days:
+        clock = f"{days} day{'s' if days != 1 else ''}, {clock}"
+    return f"({ticks}) {clock}"
+
+
+async def snmp_get_sysinfo(host: str) -> dict:
+    """
+    Info básica por SNMP (sysName, sysUpTime), con caché de
+    SNMP_CACHE_TTL segundos y una sola consulta en vuelo por host.
     """
+    return await snmp_cache.get_or_compute(
+        ("sysinfo", host),
+        lambda: _snmp_get_sysinfo(host),
+    )
 
-    base_cmd = [
-        "snmpget",
-        "-v2c",
-        "-c",
-        settings.SNMP_COMMUNITY,
-        host,
-    ]
 
+async def _snmp_get_sysinfo(host: str) -> dict:
+    """
+    Obtiene info básica por SNMP en un solo PDU GET:
+    - sysName (1.3.6.1.2.1.1.5.0)
+    - sysUpTime (1.3.6.1.2.1.1.3.0)
+    """
     oids = {
         "sysName": "1.3.6.1.2.1.1.5.0",
         "sysUpTime": "1.3.6.1.2.1.1.3.0",
     }
 
-    result: dict[str, str] = {}
+    try:
+        values = await snmp_get_many(
+            host, list(oids.values()), settings.SNMP_COMMUNITY
+        )
+    except Exception as e:
+        return {key: f"error: {e}" for key in oids}
 
+    result: dict[str, str] = {}
     for key, oid in oids.items():
-        try:
-            proc = subprocess.run(
-                base_cmd + [oid],
-                capture_output=True,
-                text=True,
-                timeout=3,
-            )
-
-            if proc.returncode != 0:
-                # Error de SNMP (timeout, comunidad incorrecta, etc.)
-                msg = proc.stderr.strip() or proc.stdout.strip()
-                result[key] = f"error: {msg or 'snmpget failed'}"
-                continue
+        value = values[oid]
 
-            # Ejemplo de salida:
-            # SNMPv2-MIB::sysName.0 = STRING: R1
-            line = proc.stdout.strip()
-            # Nos quedamos con la parte después de '=' y luego de ':'
-            try:
-                after_equals = line.split("=", 1)[1]
-                after_colon = after_equals.split(":", 1)[1]
-                value = after_colon.strip()
-            except Exception:
-                value = line
-
-            result[key] = value
-
-        except Exception as e:
-            result[key] = f"error: {e}"
+        if isinstance(value, SnmpExceptionValue):
+            result[key] = f"error: {value}"
+        elif isinstance(value, bytes):
+            result[key] = value.decode(errors="replace")
+        elif key == "sysUpTime":
+            result[key] = _format_timeticks(value)
+        else:
+            result[key] = str(value)
 
     return result
-
-
-async def snmp_get_sysinfo(host: str) -> dict:
-    """Wrapper asíncrono para FastAPI."""
-    return await run_in_threadpool(_snmp_get_sysinfo_sync, host)
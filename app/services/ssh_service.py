@@ -1,90 +1,395 @@
 # app/services/ssh_service.py
-import paramiko
-from fastapi.concurrency import run_in_threadpool
-from app.config import settings
+"""
+SSH a los routers con asyncssh (todo en el event loop, sin hilos).
+
+Cada operación es una corutina: tocar cientos de equipos a la vez cuesta
+corutinas, no hilos del threadpool de Starlette.
+
+Las conexiones ya autenticadas se guardan en un pool por equipo: el
+intercambio de llaves diffie-hellman-group1-sha1 y el login se pagan una
+vez y cada comando solo abre un canal nuevo sobre una conexión existente.
+
+- Cada conexión lleva un canal a la vez; por equipo hay a lo más
+  SSH_POOL_MAX_PER_HOST sesiones simultáneas (las demás esperan).
+- Las conexiones sin uso por más de SSH_POOL_IDLE_TIMEOUT se cierran.
+- asyncssh manda keepalives cada SSH_POOL_HEALTH_CHECK segundos y cierra
+  la conexión si el equipo deja de responder; las cerradas no se reusan.
+- Si el equipo cerró la conexión (reinicio, timeout del lado del router),
+  se reconecta una vez de forma transparente al abrir el canal.
+
+Los cambios de configuración (usuarios) pasan por config_batcher: los que
+llegan al mismo router dentro de CONFIG_BATCH_WINDOW se aplican en una sola
+sesión "configure terminal" con un solo "write memory".
+
+La salida de un comando se lee por pedazos hasta EOF (el equipo terminó)
+o hasta SSH_COMMAND_TIMEOUT; stream_command() entrega esos pedazos
+conforme llegan, sin juntar la salida completa en memoria.
+
+asyncssh se importa al abrir la primera conexión (tarda ~0.3 s en cargar
+y no hace falta para arrancar la API).
+"""
+import asyncio
+import time
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Tuple
 
+from app.config import settings
 
-def _run_command_sync(host: str, command: str) -> str:
+# Equipos IOS viejos: solo soportan este intercambio de llaves
+LEGACY_KEX = ["diffie-hellman-group1-sha1"]
+# ... y suelen ofrecer solo cifrados CBC, MACs SHA1/MD5 y llaves ssh-rsa
+# (asyncssh no los propone por defecto; Paramiko sí los aceptaba)
+LEGACY_ENCRYPTION = [
+    "aes128-ctr",
+    "aes192-ctr",
+    "aes256-ctr",
+    "aes128-cbc",
+    "aes192-cbc",
+    "aes256-cbc",
+    "3des-cbc",
+]
+LEGACY_MACS = ["hmac-sha2-256", "hmac-sha1", "hmac-sha1-96", "hmac-md5", "hmac-md5-96"]
+LEGACY_HOST_KEYS = ["rsa-sha2-256", "rsa-sha2-512", "ssh-rsa", "ssh-dss"]
+
+
+class PooledConnection:
+    def __init__(self, host: str, conn: Any):
+        self.host = host
+        # asyncssh.SSHClientConnection
+        self.conn = conn
+        self.last_used = time.monotonic()
+
+    def idle_for(self) -> float:
+        return time.monotonic() - self.last_used
+
+    def is_closed(self) -> bool:
+        return self.conn.is_closed()
+
+    def close(self) -> None:
+        self.conn.close()
+
+
+class SSHPool:
+    def __init__(self):
+        # host -> conexiones libres (la más reciente al final)
+        self._idle: Dict[str, List[PooledConnection]] = {}
+        # host -> sesiones disponibles
+        self._slots: Dict[str, asyncio.Semaphore] = {}
+
+        self.connects = 0
+        self.reused = 0
+        self.reconnects = 0
+
+    # --------- conexiones ---------
+
+    async def _connect(self, host: str) -> PooledConnection:
+        import asyncssh
+
+        conn = await asyncssh.connect(
+            host,
+            port=settings.SSH_PORT,
+            username=settings.SSH_USERNAME,
+            password=settings.SSH_PASSWORD,
+            known_hosts=None,
+            kex_algs=LEGACY_KEX,
+            encryption_algs=LEGACY_ENCRYPTION,
+            mac_algs=LEGACY_MACS,
+            server_host_key_algs=LEGACY_HOST_KEYS,
+            connect_timeout=settings.SSH_CONNECT_TIMEOUT,
+            login_timeout=settings.SSH_CONNECT_TIMEOUT,
+            keepalive_interval=settings.SSH_POOL_HEALTH_CHECK,
+            keepalive_count_max=3,
+        )
+        self.connects += 1
+        return PooledConnection(host, conn)
+
+    def _reap(self) -> None:
+        """Cierra las conexiones libres vencidas o que el equipo ya cerró."""
+        for host, conns in self._idle.items():
+            alive = []
+            for conn in conns:
+                if conn.is_closed() or conn.idle_for() > settings.SSH_POOL_IDLE_TIMEOUT:
+                    conn.close()
+                else:
+                    alive.append(conn)
+            self._idle[host] = alive
+
+    async def _checkout(self, host: str) -> Tuple[PooledConnection, bool]:
+        """Regresa (conexión, True si salió del pool de libres)."""
+        self._reap()
+        conns = self._idle.get(host)
+        if conns:
+            self.reused += 1
+            return conns.pop(), True
+        return await self._connect(host), False
+
+    def _checkin(self, conn: PooledConnection) -> None:
+        conn.last_used = time.monotonic()
+        self._idle.setdefault(conn.host, []).append(conn)
+
+    def _slot(self, host: str) -> asyncio.Semaphore:
+        slot = self._slots.get(host)
+        if slot is None:
+            slot = asyncio.Semaphore(settings.SSH_POOL_MAX_PER_HOST)
+            self._slots[host] = slot
+        return slot
+
+    # --------- API ---------
+
+    @asynccontextmanager
+    async def session(self, host: str, command: str) -> AsyncIterator[Any]:
+        """
+        Ejecuta `command` en un canal nuevo sobre una conexión del pool y
+        entrega el proceso (asyncssh.SSHClientProcess). Al salir, el canal
+        se cierra y la conexión regresa al pool (o se descarta si hubo
+        error).
+        """
+        import asyncssh
+
+        slot = self._slot(host)
+        try:
+            await asyncio.wait_for(slot.acquire(), settings.SSH_POOL_WAIT)
+        except asyncio.TimeoutError:
+            raise TimeoutError(f"No hay sesiones SSH libres para {host}")
+
+        try:
+            conn, pooled = await self._checkout(host)
+            try:
+                process = await conn.conn.create_process(command, errors="ignore")
+            except (asyncssh.Error, OSError):
+                conn.close()
+                if not pooled:
+                    raise
+                # La conexión libre ya la había cerrado el equipo;
+                # reconectamos una sola vez
+                self.reconnects += 1
+                conn = await self._connect(host)
+                try:
+                    process = await conn.conn.create_process(command, errors="ignore")
+                except BaseException:
+                    conn.close()
+                    raise
+            except BaseException:
+                conn.close()
+                raise
+
+            ok = False
+            try:
+                yield process
+                ok = True
+            finally:
+                process.close()
+                if ok and not conn.is_closed():
+                    self._checkin(conn)
+                else:
+                    conn.close()
+        finally:
+            slot.release()
+
+    async def close_all(self) -> None:
+        """Se llama en el shutdown de la app."""
+        conns = [c for cs in self._idle.values() for c in cs]
+        self._idle.clear()
+        for conn in conns:
+            conn.close()
+        for conn in conns:
+            await conn.conn.wait_closed()
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "connects": self.connects,
+            "reused": self.reused,
+            "reconnects": self.reconnects,
+            "idle": sum(len(cs) for cs in self._idle.values()),
+        }
+
+
+ssh_pool = SSHPool()
+
+
+async def _read_until_eof(process: Any, timeout: float | None) -> AsyncIterator[str]:
     """
-    Ejecuta un comando por SSH usando Paramiko (versión síncrona).
-    Esta función se manda a un threadpool desde FastAPI.
+    Pedazos de stdout hasta EOF. Lanza TimeoutError si la salida no termina
+    dentro del plazo (por defecto SSH_COMMAND_TIMEOUT).
     """
-
-    USER = settings.SSH_USERNAME
-    PWD = settings.SSH_PASSWORD
-
-    transport = paramiko.Transport((host, 22))
-
-    sec_opts = transport.get_security_options()
-
-    try:
-        sec_opts.kex = ["diffie-hellman-group1-sha1"]
-    except Exception as e:
-        print("Error al configurar KEX en Paramiko:", e)
-
-    transport.connect(username=USER, password=PWD)
-
-    session = transport.open_session()
-    session.exec_command(command)
-
-    output = session.recv(65535).decode(errors="ignore")
-
-    session.close()
-    transport.close()
-
-    return output
+    loop = asyncio.get_running_loop()
+    if timeout is None:
+        timeout = settings.SSH_COMMAND_TIMEOUT
+    deadline = loop.time() + timeout
+    received = 0
+
+    while True:
+        remaining = deadline - loop.time()
+        try:
+            if remaining <= 0:
+                raise asyncio.TimeoutError
+            chunk = await asyncio.wait_for(
+                process.stdout.read(settings.SSH_READ_CHUNK), remaining
+            )
+        except asyncio.TimeoutError:
+            raise TimeoutError(
+                f"La salida no terminó en {timeout:g} s ({received} caracteres recibidos)"
+            )
+        if not chunk:
+            return
+        received += len(chunk)
+        yield chunk
+
+
+async def stream_command(
+    host: str,
+    command: str,
+    timeout: float | None = None,
+) -> AsyncIterator[str]:
+    """
+    Ejecuta un comando por SSH y entrega la salida por pedazos conforme
+    llega. Si el consumidor deja de leer, el canal se cierra.
+    """
+    async with ssh_pool.session(host, command) as process:
+        async for chunk in _read_until_eof(process, timeout):
+            yield chunk
 
 
-async def run_command(host: str, command: str) -> str:
+async def run_command(host: str, command: str, timeout: float | None = None) -> str:
     """
-    Wrapper asíncrono para usar desde FastAPI.
-    Lanza la función bloqueante en un threadpool.
+    Ejecuta un comando por SSH y regresa la salida completa.
     """
-    return await run_in_threadpool(_run_command_sync, host, command)
+    chunks = [chunk async for chunk in stream_command(host, command, timeout)]
+    return "".join(chunks)
 
 
-def _push_config_sync(host: str, config_commands: list[str]) -> str:
+async def push_config(
+    host: str,
+    config_commands: list[str],
+    timeout: float | None = None,
+) -> str:
     """
     Abre sesión SSH y ejecuta una serie de comandos de configuración:
     entra a 'conf t', aplica los comandos, sale y guarda config (wr).
     """
-    USER = settings.SSH_USERNAME
-    PWD = settings.SSH_PASSWORD
-
-    transport = paramiko.Transport((host, 22))
-
-    sec_opts = transport.get_security_options()
-    try:
-        sec_opts.kex = ["diffie-hellman-group1-sha1"]
-    except Exception as e:
-        print("Error al configurar KEX en Paramiko:", e)
-
-    transport.connect(username=USER, password=PWD)
-
-    session = transport.open_session()
-
     # armamos el "script" de configuración
     cmds = ["configure terminal"]
     cmds.extend(config_commands)
     cmds.extend(["end", "write memory"])
 
     full_cmd = "\n".join(cmds) + "\n"
-    session.exec_command(full_cmd)
-
-    output = session.recv(65535).decode(errors="ignore")
+    return await run_command(host, full_cmd, timeout)
 
-    session.close()
-    transport.close()
 
-    return output
+class ConfigBatch:
+    def __init__(self):
+        # (comandos, future del que llamó)
+        self.entries: List[Tuple[List[str], asyncio.Future]] = []
+        self.size = 0
+        self.full = asyncio.Event()
 
 
-async def push_config(host: str, config_commands: list[str]) -> str:
+class ConfigBatcher:
     """
-    Versión asíncrona para usar desde FastAPI.
+    Cola de cambios de configuración por router.
+
+    submit() encola los comandos y espera el resultado del lote en el que
+    quedaron. El primer cambio de un router abre un lote que se junta por
+    CONFIG_BATCH_WINDOW segundos (o hasta CONFIG_BATCH_MAX comandos); todo
+    lo que llegó en ese tiempo se manda con un solo push_config(). Los
+    lotes de un mismo router se aplican en orden, uno a la vez.
     """
-    return await run_in_threadpool(_push_config_sync, host, config_commands)
 
+    def __init__(self):
+        # host -> lote que todavía acepta cambios
+        self._open: Dict[str, ConfigBatch] = {}
+        # host -> Lock que aplica sus lotes en orden (solo mientras haya lotes)
+        self._locks: Dict[str, asyncio.Lock] = {}
+        # host -> lotes abiertos o en curso
+        self._active: Dict[str, int] = {}
+        self._tasks: set[asyncio.Task] = set()
+
+        self.batches = 0
+        self.commands = 0
+
+    async def submit(self, host: str, commands: List[str]) -> str:
+        """Regresa la salida de la sesión en la que se aplicaron los comandos."""
+        batch = self._open.get(host)
+        if batch is None:
+            batch = ConfigBatch()
+            self._open[host] = batch
+            self._active[host] = self._active.get(host, 0) + 1
+            task = asyncio.create_task(self._run(host, batch))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+        fut = asyncio.get_running_loop().create_future()
+        batch.entries.append((commands, fut))
+        batch.size += len(commands)
+        if batch.size >= settings.CONFIG_BATCH_MAX:
+            # Lleno: se manda ya y lo siguiente abre otro lote
+            self._close_batch(host, batch)
+
+        return await fut
+
+    def _close_batch(self, host: str, batch: ConfigBatch) -> None:
+        if self._open.get(host) is batch:
+            del self._open[host]
+        batch.full.set()
+
+    async def _run(self, host: str, batch: ConfigBatch) -> None:
+        try:
+            try:
+                await asyncio.wait_for(batch.full.wait(), settings.CONFIG_BATCH_WINDOW)
+            except asyncio.TimeoutError:
+                pass
+            self._close_batch(host, batch)
+
+            lock = self._locks.get(host)
+            if lock is None:
+                lock = asyncio.Lock()
+                self._locks[host] = lock
+            async with lock:
+                await self._apply(host, batch)
+        finally:
+            # Sin lotes pendientes para el router ya no hace falta su lock
+            self._active[host] -= 1
+            if self._active[host] == 0:
+                del self._active[host]
+                self._locks.pop(host, None)
+
+    async def _apply(self, host: str, batch: ConfigBatch) -> None:
+        """Aplica un lote (con el lock del router tomado)."""
+        # Los que ya se dieron por vencidos (timeout) no se aplican
+        entries = [(cmds, fut) for cmds, fut in batch.entries if not fut.done()]
+        if not entries:
+            return
+
+        lines = [c for cmds, _ in entries for c in cmds]
+        self.batches += 1
+        self.commands += len(lines)
+        try:
+            output = await push_config(host, lines)
+        except Exception as e:
+            for _, fut in entries:
+                if not fut.done():
+                    fut.set_exception(e)
+        else:
+            for _, fut in entries:
+                if not fut.done():
+                    fut.set_result(output)
+
+    async def close(self) -> None:
+        """Manda de inmediato lo pendiente y espera los lotes en curso."""
+        for host, batch in list(self._open.items()):
+            self._close_batch(host, batch)
+        if self._tasks:
+            await asyncio.gather(*self._tasks, return_exceptions=True)
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "batches": self.batches,
+            "commands": self.commands,
+            "pending": sum(len(b.entries) for b in self._open.values()),
+        }
+
+
+config_batcher = ConfigBatcher()
 
 
 async def create_user_on_router(
@@ -102,7 +407,7 @@ async def create_user_on_router(
         password = settings.NEW_USER_PASSWORD
 
     cmd = f"username {username} privilege {privilege} secret {password}"
-    return await push_config(host, [cmd])
+    return await config_batcher.submit(host, [cmd])
 
 
 async def update_user_on_router(
@@ -121,7 +426,7 @@ async def update_user_on_router(
         password = settings.NEW_USER_PASSWORD
 
     cmd = f"username {username} privilege {privilege} secret {password}"
-    return await push_config(host, [cmd])
+    return await config_batcher.submit(host, [cmd])
 
 
 async def delete_user_on_router(host: str, username: str):
@@ -129,4 +434,50 @@ async def delete_user_on_router(host: str, username: str):
     Elimina usuario del router.
     """
     cmd = f"no username {username}"
-    return await push_config(host, [cmd])
+    return await config_batcher.submit(host, [cmd])
+
+
+async def run_on_routers(
+    routers: List[Tuple[str, str]],
+    action: Callable[[str], Awaitable[Any]],
+    concurrency: int | None = None,
+    timeout: float | None = None,
+) -> List[Dict[str, Any]]:
+    """
+    Ejecuta action(ip_admin) en varios routers a la vez.
+    `routers` = [(hostname, ip_admin), ...].
+
+    Corren a lo más `concurrency` en paralelo y cada uno tiene `timeout`
+    segundos. Un error en un router no detiene a los demás: regresa un
+    reporte por router (hostname, ip_admin, ok, error, latencia en
+    segundos), en el mismo orden.
+    """
+    if concurrency is None:
+        concurrency = settings.USER_FANOUT_CONCURRENCY
+    if timeout is None:
+        timeout = settings.USER_FANOUT_TIMEOUT
+    sem = asyncio.Semaphore(max(1, concurrency))
+
+    async def run(hostname: str, ip: str) -> Dict[str, Any]:
+        async with sem:
+            start = time.monotonic()
+            error = None
+            try:
+                await asyncio.wait_for(action(ip), timeout)
+            except asyncio.TimeoutError:
+                error = f"Sin respuesta en {timeout:g} s"
+            except Exception as e:
+                error = str(e) or type(e).__name__
+            latency = time.monotonic() - start
+
+        if error is not None:
+            print(f"Error en {hostname} ({ip}): {error}")
+        return {
+            "hostname": hostname,
+            "ip_admin": ip,
+            "ok": error is None,
+            "error": error,
+            "latencia": round(latency, 3),
+        }
+
+    return await asyncio.gather(*[run(h, ip) for h, ip in routers])
@@ -0,0 +1,297 @@
+# app/services/timeseries_store.py
+"""
+Almacén compacto de muestras de tráfico por interfaz.
+
+Cada interfaz (hostname, if_index) tiene un buffer circular de capacidad
+fija con columnas `array` (timestamps, octetos y tasas). Una muestra ocupa
+~40 bytes en lugar de un dict por muestra, y al llenarse se sobrescribe la
+más vieja sin mover memoria. Las columnas empiezan chicas y se duplican
+hasta la capacidad conforme llegan muestras, así que miles de series
+recién creadas (el poller crea una por interfaz) no reservan de golpe la
+capacidad completa.
+
+Cada productor escribe en su propia serie (`source`): los monitoreos por
+POST y el streaming muestrean cada segundo y el poller de fondo cada
+POLL_INTERVAL, así que mezclarlos en un buffer daría ritmos distintos y
+timestamps casi repetidos.
+
+Los promedios de todo el buffer se mantienen con sumas acumuladas (O(1)).
+Min/max y ventanas parciales se calculan sobre las columnas con NumPy
+(vistas sin copia) si está instalado.
+"""
+from array import array
+from bisect import bisect_right
+from typing import Any, Dict, List, Tuple
+
+from app.config import settings
+
+try:
+    import numpy as np
+except ImportError:  # NumPy es opcional (normalmente llega con matplotlib)
+    np = None
+
+
+def _reduce(values, op: str) -> float:
+    """sum/min/max vectorizado con NumPy, o con los builtins si no hay."""
+    if np is not None:
+        return float(getattr(values, op)())
+    return float({"sum": sum, "min": min, "max": max}[op](values))
+
+
+# Muestras que se reservan al crear una serie (luego se duplica)
+INITIAL_SIZE = 64
+
+
+class InterfaceSeries:
+    """Buffer circular de muestras de una interfaz."""
+
+    def __init__(self, capacity: int):
+        if capacity < 1:
+            raise ValueError("capacity debe ser >= 1")
+
+        self.capacity = capacity
+        # Instante (time.time()) del primer contador leído; las muestras
+        # se reportan con t relativo a este origen
+        self.origin: float | None = None
+
+        # Tamaño reservado de las columnas (crece hasta `capacity`)
+        self._size = min(capacity, INITIAL_SIZE)
+        self._t = array("d", bytes(8 * self._size))
+        self._in_octets = array("Q", bytes(8 * self._size))
+        self._out_octets = array("Q", bytes(8 * self._size))
+        self._in_bps = array("d", bytes(8 * self._size))
+        self._out_bps = array("d", bytes(8 * self._size))
+
+        self._start = 0   # índice físico de la muestra más vieja
+        self._count = 0
+        self._sum_in = 0.0
+        self._sum_out = 0.0
+        self._appends = 0
+
+    def __len__(self) -> int:
+        return self._count
+
+    # --------- escritura ---------
+
+    def _grow(self) -> None:
+        """
+        Duplica las columnas (sin pasar de `capacity`). Solo se llama antes
+        de llenarse por primera vez, cuando las muestras todavía están en
+        [0, count) y basta con extender cada columna.
+        """
+        extra = min(self.capacity, 2 * self._size) - self._size
+        zeros = bytes(8 * extra)
+        for column in (
+            self._t, self._in_octets, self._out_octets, self._in_bps, self._out_bps
+        ):
+            column.frombytes(zeros)
+        self._size += extra
+
+    def append(
+        self,
+        t: float,
+        in_octets: int,
+        out_octets: int,
+        in_bps: float,
+        out_bps: float,
+    ) -> None:
+        cap = self.capacity
+        if self._count < cap:
+            if self._count == self._size:
+                self._grow()
+            idx = self._start + self._count
+            self._count += 1
+        else:
+            # Buffer lleno: sobrescribimos la más vieja
+            idx = self._start
+            self._start = (self._start + 1) % self._size
+            self._sum_in -= self._in_bps[idx]
+            self._sum_out -= self._out_bps[idx]
+
+        self._t[idx] = t
+        self._in_octets[idx] = in_octets
+        self._out_octets[idx] = out_octets
+        self._in_bps[idx] = in_bps
+        self._out_bps[idx] = out_bps
+        self._sum_in += in_bps
+        self._sum_out += out_bps
+
+        # Recalcular las sumas de vez en cuando para que no se acumule
+        # error de punto flotante
+        self._appends += 1
+        if self._appends >= cap:
+            self._appends = 0
+            self._sum_in = self._column_sum(self._in_bps)
+            self._sum_out = self._column_sum(self._out_bps)
+
+    def clear(self) -> None:
+        self._start = 0
+        self._count = 0
+        self._sum_in = 0.0
+        self._sum_out = 0.0
+        self._appends = 0
+        self.origin = None
+
+    # --------- índices ---------
+
+    def _segments(self, n: int) -> List[Tuple[int, int]]:
+        """
+        Rangos físicos [lo, hi) de las últimas `n` muestras, en orden
+        cronológico (máximo dos tramos).
+        """
+        n = max(0, min(n, self._count))
+        if n == 0:
+            return []
+
+        size = self._size
+        lo = (self._start + self._count - n) % size
+        hi = lo + n
+        if hi <= size:
+            return [(lo, hi)]
+        return [(lo, size), (0, hi - size)]
+
+    def _time_at(self, i: int) -> float:
+        return self._t[(self._start + i) % self._size]
+
+    def count_after(self, t: float) -> int:
+        """Número de muestras con timestamp > t (búsqueda binaria)."""
+        first = bisect_right(range(self._count), t, key=self._time_at)
+        return self._count - first
+
+    def _column_sum(self, column: array) -> float:
+        return _reduce(self._column_values(column, self._count), "sum")
+
+    def _column_values(self, column: array, n: int):
+        segments = self._segments(n)
+        if np is not None:
+            dtype = np.float64 if column.typecode == "d" else np.uint64
+            view = np.frombuffer(column, dtype=dtype)
+            if len(segments) == 1:
+                lo, hi = segments[0]
+                return view[lo:hi]
+            return np.concatenate([view[lo:hi] for lo, hi in segments])
+
+        values: List[Any] = []
+        for lo, hi in segments:
+            values.extend(column[lo:hi])
+        return values
+
+    # --------- lectura ---------
+
+    def last(self) -> Dict[str, Any] | None:
+        if self._count == 0:
+            return None
+        idx = (self._start + self._count - 1) % self._size
+        return self._row(idx)
+
+    def _row(self, idx: int) -> Dict[str, Any]:
+        t = self._t[idx]
+        return {
+            "t": t - self.origin if self.origin is not None else t,
+            "timestamp": t,
+            "in_octets": self._in_octets[idx],
+            "out_octets": self._out_octets[idx],
+            "in_bps": self._in_bps[idx],
+            "out_bps": self._out_bps[idx],
+        }
+
+    def latest(self, n: int | None = None) -> List[Dict[str, Any]]:
+        """Últimas `n` muestras (todas si n es None), en orden cronológico."""
+        if n is None:
+            n = self._count
+        rows: List[Dict[str, Any]] = []
+        for lo, hi in self._segments(n):
+            rows.extend(self._row(idx) for idx in range(lo, hi))
+        return rows
+
+    def between(self, start: float, end: float) -> List[Dict[str, Any]]:
+        """Muestras con start < timestamp <= end, en orden cronológico."""
+        lo = bisect_right(range(self._count), start, key=self._time_at)
+        hi = bisect_right(range(self._count), end, key=self._time_at)
+        return [
+            self._row((self._start + i) % self._size) for i in range(lo, hi)
+        ]
+
+    def stats(self, n: int | None = None) -> Dict[str, Any]:
+        """
+        Promedio, mínimo y máximo de in/out bps de las últimas `n`
+        muestras (todas si n es None). Para el buffer completo el promedio
+        es O(1).
+        """
+        if n is None or n > self._count:
+            n = self._count
+
+        if n == 0:
+            return {
+                "count": 0,
+                "avg_in_bps": 0.0,
+                "avg_out_bps": 0.0,
+                "min_in_bps": None,
+                "max_in_bps": None,
+                "min_out_bps": None,
+                "max_out_bps": None,
+            }
+
+        in_values = self._column_values(self._in_bps, n)
+        out_values = self._column_values(self._out_bps, n)
+
+        if n == self._count:
+            avg_in = self._sum_in / n
+            avg_out = self._sum_out / n
+        else:
+            avg_in = _reduce(in_values, "sum") / n
+            avg_out = _reduce(out_values, "sum") / n
+
+        return {
+            "count": n,
+            "avg_in_bps": avg_in,
+            "avg_out_bps": avg_out,
+            "min_in_bps": _reduce(in_values, "min"),
+            "max_in_bps": _reduce(in_values, "max"),
+            "min_out_bps": _reduce(out_values, "min"),
+            "max_out_bps": _reduce(out_values, "max"),
+        }
+
+
+# Productores de muestras (una serie por productor)
+SOURCE_MONITOR = "monitor"   # monitoreos por POST y streaming en vivo
+SOURCE_POLLER = "poller"     # poller de fondo
+SOURCES = (SOURCE_MONITOR, SOURCE_POLLER)
+
+
+class SeriesStore:
+    """Buffers de todas las interfaces, key = (hostname, if_index, source)."""
+
+    def __init__(self, capacity: int | None = None):
+        self.capacity = capacity or settings.TS_CAPACITY
+        self._series: Dict[Tuple[str, int, str], InterfaceSeries] = {}
+
+    def get(
+        self, hostname: str, if_index: int, source: str = SOURCE_MONITOR
+    ) -> InterfaceSeries | None:
+        return self._series.get((hostname, if_index, source))
+
+    def get_or_create(
+        self, hostname: str, if_index: int, source: str = SOURCE_MONITOR
+    ) -> InterfaceSeries:
+        key = (hostname, if_index, source)
+        series = self._series.get(key)
+        if series is None:
+            series = InterfaceSeries(self.capacity)
+            self._series[key] = series
+        return series
+
+    def drop(
+        self, hostname: str, if_index: int, source: str = SOURCE_MONITOR
+    ) -> InterfaceSeries | None:
+        return self._series.pop((hostname, if_index, source), None)
+
+    def drop_router(self, hostname: str) -> None:
+        for key in [k for k in self._series if k[0] == hostname]:
+            del self._series[key]
+
+    def keys(self) -> List[Tuple[str, int, str]]:
+        return list(self._series)
+
+
+sample_store = SeriesStore()
@@ -0,0 +1,334 @@
+# app/services/topology_service.py
+"""
+Versiones, fotos (snapshots) y acomodo (layout) de la topología.
+
+- Cada vez que cambian routers o enlaces (CRUD, demonio de descubrimiento)
+  se llama refresh_topology(): lee la topología de la BD y, si es distinta
+  de la última foto, guarda una foto nueva con TOPOLOGY_VERSION + 1. Se
+  conservan las últimas TOPOLOGY_SNAPSHOTS fotos para que
+  topology_changes(N) regrese solo lo que cambió desde la versión N.
+  Las versiones viven en memoria y vuelven a empezar en 1 al reiniciar el
+  proceso; TOPOLOGY_EPOCH (distinto en cada arranque) permite al cliente
+  darse cuenta.
+- Mientras la versión no cambie, el grafo y su PNG se reutilizan sin leer
+  la BD ni volver a dibujar.
+- Las posiciones de los nodos se conservan entre versiones: al cambiar la
+  topología solo se acomodan los nodos nuevos (spring_layout con los
+  viejos fijos), arrancando junto a sus vecinos ya colocados. Así el dibujo
+  no "brinca" entre cargas y el costo no se paga completo cada vez.
+
+Este módulo también se importa en los procesos de gráficas
+(compute_layout), por eso la BD se importa solo dentro de refresh_topology.
+"""
+import asyncio
+import random
+import uuid
+from collections import OrderedDict
+from datetime import datetime
+from typing import Any, Dict, FrozenSet, List, Sequence, Tuple
+
+from app.config import settings
+from app.services.charts import run_in_pool
+
+# Semilla fija: el mismo grafo siempre da el mismo acomodo
+LAYOUT_SEED = 42
+
+Position = Tuple[float, float]
+# (source, target, interface)
+LinkKey = Tuple[str, str, str | None]
+
+TOPOLOGY_VERSION: int = 0
+# Identifica a este proceso: las versiones solo se comparan dentro de él
+TOPOLOGY_EPOCH: str = uuid.uuid4().hex
+
+
+# ----------------- FOTOS Y VERSIONES -----------------
+
+
+class TopologySnapshot:
+    def __init__(
+        self,
+        version: int,
+        routers: Dict[str, Dict[str, Any]],
+        links: List[LinkKey],
+    ):
+        self.version = version
+        self.created_at = datetime.utcnow()
+        # hostname -> {ip_admin, loopback, role, vendor, os_version}
+        self.routers = routers
+        # En el orden de build_topology (por router y por interfaz)
+        self.links = links
+        self.link_set: FrozenSet[LinkKey] = frozenset(links)
+
+    @property
+    def nodes(self) -> List[str]:
+        return list(self.routers)
+
+    @property
+    def edges(self) -> List[Tuple[str, str]]:
+        return [(source, target) for source, target, _ in self.links]
+
+    def same_as(self, routers: Dict[str, Dict[str, Any]], links: List[LinkKey]) -> bool:
+        return self.routers == routers and self.link_set == frozenset(links)
+
+
+# version -> foto (las más viejas se descartan)
+SNAPSHOTS: "OrderedDict[int, TopologySnapshot]" = OrderedDict()
+
+
+def topology_version() -> int:
+    return TOPOLOGY_VERSION
+
+
+def current_snapshot() -> TopologySnapshot | None:
+    return SNAPSHOTS.get(TOPOLOGY_VERSION)
+
+
+def topology_from_routers(routers) -> Tuple[Dict[str, Dict[str, Any]], List[LinkKey]]:
+    """
+    Routers (modelo Router con interfaces) -> (nodos, enlaces). Los vecinos
+    que no están en la tabla routers se agregan como nodos "huérfanos".
+    """
+    nodes: Dict[str, Dict[str, Any]] = {}
+    for r in routers:
+        nodes[r.hostname] = {
+            "ip_admin": r.ip_admin,
+            "loopback": r.loopback,
+            "role": r.role,
+            "vendor": r.vendor,
+            "os_version": r.os_version,
+        }
+
+    links: List[LinkKey] = []
+    orphan = dict.fromkeys(["ip_admin", "loopback", "role", "vendor", "os_version"])
+    for r in routers:
+        for iface in r.interfaces:
+            if iface.neighbor_hostname:
+                links.append((r.hostname, iface.neighbor_hostname, iface.name))
+                if iface.neighbor_hostname not in nodes:
+                    nodes[iface.neighbor_hostname] = dict(orphan)
+    return nodes, links
+
+
+def record_topology(
+    routers: Dict[str, Dict[str, Any]],
+    links: List[LinkKey],
+) -> TopologySnapshot:
+    """
+    Guarda una foto nueva solo si la topología cambió. Regresa la foto
+    vigente.
+    """
+    global TOPOLOGY_VERSION
+    current = current_snapshot()
+    if current is not None and current.same_as(routers, links):
+        return current
+
+    TOPOLOGY_VERSION += 1
+    snap = TopologySnapshot(TOPOLOGY_VERSION, routers, links)
+    SNAPSHOTS[TOPOLOGY_VERSION] = snap
+    while len(SNAPSHOTS) > settings.TOPOLOGY_SNAPSHOTS:
+        SNAPSHOTS.popitem(last=False)
+    return snap
+
+
+async def refresh_topology(db=None) -> TopologySnapshot:
+    """
+    Lee la topología de la BD y la registra (nueva versión si cambió).
+    Se llama después de cualquier cambio en routers o enlaces.
+    """
+    from sqlalchemy import select
+
+    from app.db import AsyncSessionLocal
+    from app.models.router import Router
+
+    if db is None:
+        async with AsyncSessionLocal() as session:
+            result = await session.execute(select(Router))
+            routers = result.scalars().unique().all()
+    else:
+        result = await db.execute(select(Router))
+        routers = result.scalars().unique().all()
+
+    return record_topology(*topology_from_routers(routers))
+
+
+def topology_changes(since_version: int, epoch: str | None = None) -> Dict[str, Any]:
+    """
+    Diferencias entre la foto `since_version` y la vigente. Si esa versión
+    ya no se conserva (o es 0), es mayor que la vigente, o `epoch` no es la
+    de este proceso (la app se reinició), se compara contra una topología
+    vacía y se marca `completo=True`: el cliente debe reemplazar todo lo
+    que tenga.
+    """
+    current = current_snapshot()
+    if current is None:
+        raise ValueError("Todavía no hay topología registrada")
+
+    if epoch is not None and epoch != TOPOLOGY_EPOCH:
+        base = None
+    else:
+        base = SNAPSHOTS.get(since_version)
+    full = base is None
+    old_routers = base.routers if base else {}
+    old_links = base.link_set if base else frozenset()
+
+    return {
+        "desde_version": since_version,
+        "version": current.version,
+        "epoca": TOPOLOGY_EPOCH,
+        "completo": full,
+        "routers_agregados": [
+            dict(data, hostname=h)
+            for h, data in current.routers.items()
+            if h not in old_routers
+        ],
+        "routers_modificados": [
+            dict(data, hostname=h)
+            for h, data in current.routers.items()
+            if h in old_routers and old_routers[h] != data
+        ],
+        "routers_eliminados": [h for h in old_routers if h not in current.routers],
+        "enlaces_agregados": [
+            {"source": s, "target": t, "interface": i}
+            for s, t, i in current.links
+            if (s, t, i) not in old_links
+        ],
+        "enlaces_eliminados": [
+            {"source": s, "target": t, "interface": i}
+            for s, t, i in (base.links if base else [])
+            if (s, t, i) not in current.link_set
+        ],
+    }
+
+
+# ----------------- ACOMODO (corre en el pool de procesos) -----------------
+
+
+def compute_layout(
+    nodes: Sequence[str],
+    edges: Sequence[Tuple[str, str]],
+    previous: Dict[str, Position],
+) -> Dict[str, Position]:
+    """
+    Posiciones de todos los nodos. Los que ya estaban en `previous`
+    conservan su lugar; solo se calculan los nuevos.
+    """
+    # Import perezoso: networkx solo se carga en el proceso trabajador
+    import networkx as nx
+
+    G = nx.Graph()
+    G.add_nodes_from(nodes)
+    G.add_edges_from(edges)
+
+    known = [n for n in G.nodes if n in previous]
+    new = [n for n in G.nodes if n not in previous]
+
+    if not new:
+        return {n: previous[n] for n in G.nodes}
+    if not known:
+        pos = nx.spring_layout(G, seed=LAYOUT_SEED)
+        return {n: (float(x), float(y)) for n, (x, y) in pos.items()}
+
+    # Posición inicial de cada nodo nuevo: junto a sus vecinos ya colocados
+    # (recorriendo desde los conocidos), o al azar dentro del dibujo actual
+    rng = random.Random(LAYOUT_SEED)
+    init: Dict[str, Position] = {n: previous[n] for n in known}
+    xs = [p[0] for p in init.values()]
+    ys = [p[1] for p in init.values()]
+
+    pending = list(new)
+    while pending:
+        placed_any = False
+        for n in list(pending):
+            placed = [init[m] for m in G.neighbors(n) if m in init]
+            if placed:
+                cx = sum(p[0] for p in placed) / len(placed)
+                cy = sum(p[1] for p in placed) / len(placed)
+                init[n] = (cx + rng.uniform(-0.1, 0.1), cy + rng.uniform(-0.1, 0.1))
+                pending.remove(n)
+                placed_any = True
+        if not placed_any:
+            # Nodos sin vecinos colocados (componentes nuevas)
+            n = pending.pop(0)
+            init[n] = (
+                rng.uniform(min(xs) - 0.5, max(xs) + 0.5),
+                rng.uniform(min(ys) - 0.5, max(ys) + 0.5),
+            )
+
+    # Solo se simulan los nodos nuevos y sus vecinos (fijos); la distancia
+    # ideal k es la del grafo completo para que queden a la misma escala
+    area = set(new)
+    for n in new:
+        area.update(G.neighbors(n))
+    H = G.subgraph(area)
+    fixed = [n for n in H.nodes if n not in new]
+    moved = nx.spring_layout(
+        H,
+        k=1 / len(G) ** 0.5,
+        pos={n: init[n] for n in H.nodes},
+        fixed=fixed or None,
+        seed=LAYOUT_SEED,
+    )
+
+    pos = {n: init[n] for n in G.nodes}
+    pos.update(moved)
+    return {n: (float(x), float(y)) for n, (x, y) in pos.items()}
+
+
+# ----------------- CACHÉ (proceso principal) -----------------
+
+
+class TopologyGraph:
+    def __init__(
+        self,
+        version: int,
+        nodes: List[str],
+        edges: List[Tuple[str, str]],
+        positions: Dict[str, Position],
+    ):
+        self.version = version
+        self.nodes = nodes
+        self.edges = edges
+        self.positions = positions
+
+
+class TopologyGraphCache:
+    def __init__(self):
+        self._graph: TopologyGraph | None = None
+        self._positions: Dict[str, Position] = {}
+        self._lock = asyncio.Lock()
+
+    async def get(self) -> TopologyGraph:
+        """Grafo (con posiciones) de la versión vigente de la topología."""
+        graph = self._graph
+        if graph is not None and graph.version == TOPOLOGY_VERSION:
+            return graph
+
+        async with self._lock:
+            # Otra petición pudo reconstruirlo mientras esperábamos
+            if self._graph is not None and self._graph.version == TOPOLOGY_VERSION:
+                return self._graph
+
+            snap = current_snapshot()
+            if snap is None:
+                snap = await refresh_topology()
+            # Al proceso de gráficas solo viajan las posiciones que le sirven
+            previous = {
+                n: self._positions[n] for n in snap.nodes if n in self._positions
+            }
+            positions = await run_in_pool(
+                compute_layout, snap.nodes, snap.edges, previous
+            )
+
+            # Solo se guardan los nodos de la versión vigente: los routers
+            # eliminados no se acumulan
+            self._positions = dict(positions)
+            self._graph = TopologyGraph(snap.version, snap.nodes, snap.edges, positions)
+            return self._graph
+
+    def clear(self) -> None:
+        self._graph = None
+        self._positions.clear()
+
+
+topology_cache = TopologyGraphCache()
@@ -0,0 +1,184 @@
+# app/services/trap_receiver.py
+"""
+Receptor de trampas SNMP v2c (linkUp / linkDown).
+
+Escucha en UDP (SNMP_TRAP_HOST:SNMP_TRAP_PORT). Cada trampa linkUp/linkDown
+se traduce a (host, ifIndex) y se registra en TRAP_STATE con
+record_oper_status, igual que si la hubiera detectado una consulta.
+
+El host de TRAP_STATE es el ip_admin del router. Como un equipo puede
+mandar la trampa desde otra de sus IPs, se usa primero el varbind
+snmpTrapAddress (si viene) y luego un mapa IP -> ip_admin construido con
+las IPs de loopback e interfaces guardadas en la BD.
+
+Por defecto escucha en 1162 (162 requiere root); en el router:
+    snmp-server host <ip> version 2c REDES udp-port 1162
+Si no se puede abrir el puerto, el error queda en `error` y se reporta en
+GET /routers/{hostname}/interfaces/{if_index}/estado.
+"""
+import asyncio
+import socket
+import time
+from typing import Any, Dict
+
+from sqlalchemy import select
+
+from app.config import settings
+from app.db import AsyncSessionLocal
+from app.models.router import Router
+from app.services.cache import snmp_cache
+from app.services.monitor_service import record_oper_status
+from app.services.snmp_engine import PDU_TRAP_V2, decode_message
+
+SNMP_TRAP_OID = "1.3.6.1.6.3.1.1.4.1.0"
+SNMP_TRAP_ADDRESS = "1.3.6.1.6.3.18.1.3.0"
+LINK_DOWN = "1.3.6.1.6.3.1.1.5.3"
+LINK_UP = "1.3.6.1.6.3.1.1.5.4"
+
+IF_INDEX_PREFIX = "1.3.6.1.2.1.2.2.1.1."
+IF_OPER_STATUS_PREFIX = "1.3.6.1.2.1.2.2.1.8."
+
+# operStatus que se asume si la trampa no trae ifOperStatus
+DEFAULT_OPER_STATUS = {LINK_UP: 1, LINK_DOWN: 2}
+
+
+class TrapReceiver(asyncio.DatagramProtocol):
+    def __init__(self):
+        self._transport: asyncio.DatagramTransport | None = None
+        self._aliases: Dict[str, str] = {}
+        self._aliases_task: asyncio.Task | None = None
+        self.received = 0
+        self.ignored = 0
+        self.last_trap_at: float | None = None
+        # Por qué no se pudo abrir el puerto (None si está escuchando)
+        self.error: str | None = None
+
+    # --------- ciclo de vida ---------
+
+    async def start(self) -> None:
+        loop = asyncio.get_running_loop()
+        try:
+            await loop.create_datagram_endpoint(
+                lambda: self,
+                local_addr=(settings.SNMP_TRAP_HOST, settings.SNMP_TRAP_PORT),
+                family=socket.AF_INET,
+            )
+        except OSError as e:
+            self.error = (
+                f"No se pudo escuchar en "
+                f"{settings.SNMP_TRAP_HOST}:{settings.SNMP_TRAP_PORT}: {e}"
+            )
+            print(f"[TRAPS] {self.error}")
+            return
+
+        self.error = None
+        self._aliases_task = asyncio.create_task(self._aliases_loop())
+
+    async def stop(self) -> None:
+        if self._aliases_task is not None:
+            self._aliases_task.cancel()
+            await asyncio.gather(self._aliases_task, return_exceptions=True)
+            self._aliases_task = None
+
+        if self._transport is not None:
+            self._transport.close()
+            self._transport = None
+
+    @property
+    def running(self) -> bool:
+        return self._transport is not None and not self._transport.is_closing()
+
+    # --------- mapa IP -> ip_admin ---------
+
+    async def _load_aliases(self) -> Dict[str, str]:
+        async with AsyncSessionLocal() as session:
+            result = await session.execute(select(Router))
+            routers = result.scalars().all()
+
+        aliases: Dict[str, str] = {}
+        for r in routers:
+            for iface in r.interfaces:
+                if iface.ip_address:
+                    aliases[iface.ip_address] = r.ip_admin
+            if r.loopback:
+                aliases[r.loopback] = r.ip_admin
+            aliases[r.ip_admin] = r.ip_admin
+        return aliases
+
+    async def _aliases_loop(self) -> None:
+        while True:
+            try:
+                self._aliases = await self._load_aliases()
+            except Exception as e:
+                print(f"[TRAPS] Error leyendo routers: {e}")
+            await asyncio.sleep(settings.POLL_ROUTERS_REFRESH)
+
+    def resolve_host(self, source_ip: str, trap_address: str | None = None) -> str:
+        for ip in (trap_address, source_ip):
+            if ip and ip in self._aliases:
+                return self._aliases[ip]
+        return source_ip
+
+    # --------- callbacks de asyncio ---------
+
+    def connection_made(self, transport) -> None:
+        self._transport = transport
+
+    def datagram_received(self, data: bytes, addr) -> None:
+        try:
+            msg = decode_message(data)
+        except Exception:
+            # Datagrama basura: lo ignoramos
+            self.ignored += 1
+            return
+
+        if msg["pdu_tag"] != PDU_TRAP_V2 or msg["community"] != settings.SNMP_COMMUNITY:
+            self.ignored += 1
+            return
+
+        if not self.handle_trap(addr[0], msg["varbinds"]):
+            self.ignored += 1
+
+    # --------- interpretación ---------
+
+    def handle_trap(self, source_ip: str, varbinds: list) -> bool:
+        """
+        Registra una trampa linkUp/linkDown. Regresa False si la trampa no
+        es de ese tipo o no trae el ifIndex.
+        """
+        values: Dict[str, Any] = dict(varbinds)
+        trap_oid = values.get(SNMP_TRAP_OID)
+        if trap_oid not in DEFAULT_OPER_STATUS:
+            return False
+
+        if_index = None
+        oper_status = DEFAULT_OPER_STATUS[trap_oid]
+        for oid, val in varbinds:
+            if oid.startswith(IF_INDEX_PREFIX) and isinstance(val, int):
+                if_index = val
+            elif oid.startswith(IF_OPER_STATUS_PREFIX):
+                suffix = oid[len(IF_OPER_STATUS_PREFIX):]
+                # ifOperStatus.<ifIndex>: un solo componente numérico
+                if not suffix.isdigit():
+                    continue
+                if if_index is None:
+                    if_index = int(suffix)
+                if isinstance(val, int):
+                    oper_status = val
+
+        if if_index is None:
+            return False
+
+        host = self.resolve_host(source_ip, values.get(SNMP_TRAP_ADDRESS))
+        record_oper_status(host, if_index, oper_status, source="trap")
+
+        # El estado guardado en caché ya no es válido
+        for community in (None, settings.SNMP_COMMUNITY):
+            snmp_cache.invalidate(("if_status", host, if_index, community))
+
+        self.received += 1
+        self.last_trap_at = time.time()
+        return True
+
+
+trap_receiver = TrapReceiver()
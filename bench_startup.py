@@ -0,0 +1,94 @@
+# bench_startup.py
+"""
+Mide cuánto tarda en importarse la app (lo que paga cada worker al
+arrancar) usando `python -X importtime`.
+
+Uso:
+    python bench_startup.py            # 5 corridas, top 15 módulos
+    python bench_startup.py -n 10 --top 25
+
+Además de `import app.main`, mide aparte matplotlib.pyplot y networkx:
+es lo que se ahorra al arranque ahora que solo se importan en los
+procesos de gráficas (app/services/charts.py), y sirve para comparar
+contra una versión que los importe al cargar los routers.
+"""
+import argparse
+import re
+import statistics
+import subprocess
+import sys
+from typing import Dict, List, Tuple
+
+LINE_RE = re.compile(r"import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)")
+
+TARGETS = {
+    "app.main": "import app.main",
+    "matplotlib.pyplot + networkx": "import matplotlib.pyplot, networkx",
+}
+
+
+def importtime(code: str) -> Tuple[float, Dict[str, int]]:
+    """
+    Corre `code` en un intérprete nuevo con -X importtime. Regresa el total
+    en ms (suma de los imports de primer nivel) y el acumulado en µs de
+    cada módulo.
+    """
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        capture_output=True,
+        text=True,
+    )
+    if proc.returncode != 0:
+        raise RuntimeError(proc.stderr.strip().splitlines()[-1])
+
+    total_us = 0
+    cumulative: Dict[str, int] = {}
+    for line in proc.stderr.splitlines():
+        m = LINE_RE.match(line)
+        if not m:
+            continue
+        cum_us, indent, module = int(m.group(2)), len(m.group(3)), m.group(4)
+        cumulative[module] = cum_us
+        # Los módulos de primer nivel tienen un solo espacio de sangría
+        if indent == 1:
+            total_us += cum_us
+    return total_us / 1000, cumulative
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("-n", type=int, default=5, help="corridas por medición")
+    parser.add_argument("--top", type=int, default=15, help="módulos más lentos a mostrar")
+    args = parser.parse_args()
+
+    last: Dict[str, int] = {}
+    for name, code in TARGETS.items():
+        try:
+            runs: List[float] = []
+            for _ in range(args.n):
+                total, last_run = importtime(code)
+                runs.append(total)
+                if name == "app.main":
+                    last = last_run
+        except RuntimeError as e:
+            print(f"{name:32s} no se pudo importar: {e}")
+            continue
+        print(
+            f"{name:32s} mediana {statistics.median(runs):8.1f} ms"
+            f"   (min {min(runs):.1f}, max {max(runs):.1f}, n={args.n})"
+        )
+
+    if last:
+        print("\nMódulos más lentos de `import app.main` (acumulado):")
+        for module, cum_us in sorted(last.items(), key=lambda kv: -kv[1])[: args.top]:
+            print(f"  {cum_us / 1000:8.1f} ms  {module}")
+
+        heavy = [m for m in last if m.split(".")[0] in ("matplotlib", "networkx")]
+        print(
+            "\nmatplotlib/networkx cargados al arrancar:",
+            ", ".join(sorted(heavy)[:5]) if heavy else "ninguno",
+        )
+
+
+if __name__ == "__main__":
+    main()